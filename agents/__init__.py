@@ -0,0 +1,40 @@
+"""
+Evolutionary question generation and answering agents.
+
+The pipeline nodes are re-exported here but imported on first access, so
+``import agents`` stays cheap and a worker that runs a single stage only
+loads that stage's dependencies.
+"""
+
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    "QAState": ".state_config",
+    "load_documents_and_generate_embeddings": ".document_loader",
+    "question_generation_pipeline": ".question_generator",
+    "generate_initial_questions": ".question_generator",
+    "evolution_agent": ".evolution_agent",
+    "critic_agent": ".question_critic_agent",
+    "context_gathering": ".context_gathering",
+    "answer_generator": ".answer_generator",
+    "export_agent": ".export_agent",
+    "get_evolution_techniques": ".evolution_techniques",
+    "RunMetrics": ".instrumentation",
+    "EmbeddingStore": ".embedding_store",
+    "RecordStore": ".records",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,294 @@
+import contextvars
+import logging
+import math
+import random
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .corpus_index import page_hash
+from .evolution_agent import apply_evolution, create_evolved_question
+from .instrumentation import current_metrics
+from .prefilter import ACCEPT, REJECT
+from .question_critic_agent import create_critic_prompt, validate_question
+from .records import EvolvedQuestion, RecordStore
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class AcceptanceTracker:
+    """
+    Online per-technique critic acceptance rates.
+
+    Each rate is the mean of a Beta posterior, so techniques start at the
+    prior and converge to their observed rate as results arrive.
+
+    Args:
+        prior_accepts (float): Pseudo-count of accepted questions per technique.
+        prior_rejects (float): Pseudo-count of rejected questions per technique.
+        floor (float): Lowest rate used for planning, which caps over-generation.
+    """
+
+    def __init__(
+        self,
+        prior_accepts: float = 1.0,
+        prior_rejects: float = 1.0,
+        floor: float = 0.05,
+    ):
+        self.prior_accepts = prior_accepts
+        self.prior_rejects = prior_rejects
+        self.floor = floor
+        self.accepted: Dict[str, int] = {}
+        self.attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, technique: str, accepted: bool) -> None:
+        with self._lock:
+            self.attempts[technique] = self.attempts.get(technique, 0) + 1
+            self.accepted[technique] = self.accepted.get(technique, 0) + int(accepted)
+
+    def rate(self, technique: str) -> float:
+        accepted = self.accepted.get(technique, 0)
+        attempts = self.attempts.get(technique, 0)
+        rate = (self.prior_accepts + accepted) / (
+            self.prior_accepts + self.prior_rejects + attempts
+        )
+        return max(rate, self.floor)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            technique: {
+                "attempts": attempts,
+                "accepted": self.accepted.get(technique, 0),
+                "rate": self.rate(technique),
+            }
+            for technique, attempts in sorted(self.attempts.items())
+        }
+
+
+def plan_wave(
+    remaining: int,
+    weights: Dict[str, float],
+    tracker: AcceptanceTracker,
+    max_wave_size: int,
+    rng: Optional[random.Random] = None,
+) -> Dict[str, int]:
+    """
+    Decides how many generations of each technique the next wave runs.
+
+    Each technique is asked for its weighted share of the remaining validated
+    questions, divided by its current acceptance rate. The wave runs the
+    rounded-up total of these, capped at ``max_wave_size``, split across
+    techniques in proportion to their shares. Whole parts of the shares are
+    allocated directly; the leftover calls go to techniques drawn with
+    probability equal to their fractional parts, so no technique is favoured
+    when many techniques each want less than one call.
+
+    Args:
+        remaining (int): Validated questions still needed.
+        weights (Dict[str, float]): Relative share of each technique.
+        tracker (AcceptanceTracker): Current acceptance rates.
+        max_wave_size (int): Maximum generations in the wave.
+        rng (Optional[random.Random]): Source of the leftover draws.
+
+    Returns:
+        Dict[str, int]: Generations to run per technique.
+    """
+    total_weight = sum(weights.values())
+    if remaining <= 0 or total_weight <= 0 or max_wave_size <= 0:
+        return {}
+    rng = rng or random.Random()
+    wanted = {
+        technique: remaining * weight / total_weight / tracker.rate(technique)
+        for technique, weight in weights.items()
+        if weight > 0
+    }
+    expected = sum(wanted.values())
+    size = min(max_wave_size, math.ceil(expected - 1e-9))
+    shares = {technique: calls * size / expected for technique, calls in wanted.items()}
+    plan = {technique: int(share) for technique, share in shares.items()}
+    fractions = {technique: shares[technique] - plan[technique] for technique in plan}
+    leftover = size - sum(plan.values())
+
+    # Systematic sampling: points u, u + 1, ... over the shuffled fractions
+    # pick each technique with probability equal to its fraction.
+    order = list(fractions)
+    rng.shuffle(order)
+    point, cumulative = rng.random(), 0.0
+    for technique in order:
+        cumulative += fractions[technique]
+        if leftover and point < cumulative:
+            plan[technique] += 1
+            leftover -= 1
+            point += 1
+    # Float error can leave a call unallocated.
+    for technique in sorted(fractions, key=fractions.get, reverse=True)[:leftover]:
+        plan[technique] += 1
+    return {technique: calls for technique, calls in plan.items() if calls > 0}
+
+
+def generate_validated_questions(
+    documents: List[Any],
+    evolution_techniques: List[Tuple[str, "PromptTemplate", float]],
+    model: Any,
+    critic_model: Any,
+    target: int,
+    threshold: int = 3,
+    prefilter: Any = None,
+    max_concurrency: int = 8,
+    max_wave_size: Optional[int] = None,
+    max_generation_calls: Optional[int] = None,
+    tracker: Optional[AcceptanceTracker] = None,
+) -> Tuple[RecordStore[EvolvedQuestion], RecordStore[EvolvedQuestion]]:
+    """
+    Generates and critiques questions in adaptive waves until ``target`` are validated.
+
+    Each wave over-generates according to the per-technique acceptance rates
+    observed so far. Work runs concurrently, and once the target is reached,
+    queued work is cancelled and in-flight work skips its remaining LLM calls.
+    A task whose model call fails is logged and counted against the budget.
+
+    Args:
+        documents (List[Any]): Pages to generate questions from.
+        evolution_techniques (List[Tuple[str, PromptTemplate, float]]): (name, template, weight) triples.
+        model: The generator language model.
+        critic_model: The critic language model.
+        target (int): Number of validated questions wanted.
+        threshold (int): Minimum critic score for a valid question.
+        prefilter (Optional[Prefilter]): Prefilter applied before the critic.
+        max_concurrency (int): Generate-and-critique tasks running at once.
+        max_wave_size (Optional[int]): Generations per wave; defaults to 4 x max_concurrency.
+        max_generation_calls (Optional[int]): Budget of generations; defaults to 10 x target.
+        tracker (Optional[AcceptanceTracker]): Acceptance rates to start from and update.
+
+    Returns:
+        Tuple[RecordStore[EvolvedQuestion], RecordStore[EvolvedQuestion]]: All critiqued
+        questions and the validated ones (at most ``target``).
+    """
+    if not documents:
+        raise ValueError("No documents found to generate questions from.")
+    tracker = tracker or AcceptanceTracker()
+    max_wave_size = max_wave_size or 4 * max_concurrency
+    budget = max_generation_calls or 10 * target
+    templates = {name: template for name, template, _ in evolution_techniques}
+    weights = {name: weight for name, _, weight in evolution_techniques}
+    if not any(weight > 0 for weight in weights.values()):
+        weights = {name: 1.0 for name in weights}
+
+    critic_prompt = create_critic_prompt()
+    metrics = current_metrics()
+    stop = threading.Event()
+    prefilter_lock = threading.Lock()
+    evolved_questions = RecordStore(EvolvedQuestion)
+    validated_questions = RecordStore(EvolvedQuestion)
+
+    def task(technique: str, document: Any) -> Optional[Tuple[EvolvedQuestion, bool]]:
+        if stop.is_set():
+            return None
+        prompt_template = templates[technique]
+        text = apply_evolution(
+            "",
+            document.page_content,
+            prompt_template.template,
+            prompt_template.input_variables,
+            prompt_template,
+            model,
+            technique=technique,
+        )
+        question = create_evolved_question(
+            str(uuid.uuid4()), technique, text, page_hash(document.page_content)
+        )
+        if not text:
+            return question, False
+        decision = None
+        if prefilter is not None:
+            with prefilter_lock:
+                decision, reason = prefilter.decide(text, technique)
+                audit = decision in (ACCEPT, REJECT) and prefilter.should_audit()
+            if decision in (ACCEPT, REJECT) and not audit:
+                question.critic_feedback = {"prefilter": decision, "reason": reason}
+                if metrics is not None:
+                    metrics.increment("critic_calls_saved")
+                return question, decision == ACCEPT
+        if stop.is_set():
+            return None
+        feedback = validate_question(question, critic_prompt, critic_model)
+        accepted = feedback["Independence"] + feedback["Clear Intent"] >= threshold
+        question.critic_feedback = feedback
+        if metrics is not None:
+            metrics.record_critic_result(accepted)
+        if decision in (ACCEPT, REJECT):
+            with prefilter_lock:
+                prefilter.record_audit(decision, accepted)
+        return question, accepted
+
+    calls = 0
+    waves = 0
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        while len(validated_questions) < target and calls < budget:
+            plan = plan_wave(
+                target - len(validated_questions),
+                weights,
+                tracker,
+                min(max_wave_size, budget - calls),
+            )
+            if not plan:
+                break
+            waves += 1
+            logger.debug("Wave %d plan: %s", waves, plan)
+            futures = set()
+            for technique, count in plan.items():
+                for _ in range(count):
+                    futures.add(
+                        pool.submit(
+                            contextvars.copy_context().run,
+                            task,
+                            technique,
+                            random.choice(documents),
+                        )
+                    )
+            calls += len(futures)
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The failed generation still counts against the budget.
+                        logger.warning("Generation task failed: %s", e)
+                        if metrics is not None:
+                            metrics.increment("generation_failures")
+                        continue
+                    if result is None:
+                        continue
+                    question, accepted = result
+                    tracker.record(question.evolution_type, accepted)
+                    evolved_questions.add(question)
+                    if accepted and len(validated_questions) < target:
+                        validated_questions.add(question)
+                if len(validated_questions) >= target and not stop.is_set():
+                    stop.set()
+                    for future in futures:
+                        future.cancel()
+
+    if len(validated_questions) < target:
+        logger.warning(
+            "Reached the budget of %d generations with %d of %d validated questions.",
+            budget,
+            len(validated_questions),
+            target,
+        )
+    logger.info(
+        "Adaptive generation: %d validated from %d critiqued in %d waves; rates %s",
+        len(validated_questions),
+        len(evolved_questions),
+        waves,
+        tracker.report(),
+    )
+    return evolved_questions, validated_questions
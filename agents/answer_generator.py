@@ -1,10 +1,20 @@
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 from .state_config import QAState
-from langchain_core.prompts import PromptTemplate
-from langchain.schema.runnable import Runnable
+from .instrumentation import current_metrics, instrument_node, invoke_model
+from .json_output import parse_json_output
+from .model_router import ModelRouter, answer_is_confident
+from .records import Answer, QuestionContext, RecordStore, as_record_store
+import logging
 
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+
+def create_answer_prompt() -> "PromptTemplate":
+    from langchain_core.prompts import PromptTemplate
 
-def create_answer_prompt() -> PromptTemplate:
     return PromptTemplate(
         input_variables=["question", "context"],
         template="""
@@ -20,70 +30,300 @@ def create_answer_prompt() -> PromptTemplate:
 
 
 def generate_answer(
-    question: str, context: str, prompt_template: PromptTemplate, model: Any
+    question: str, context: str, prompt_template: "PromptTemplate", model: Any
 ) -> str:
     input_dict = {"question": question, "context": context}
     prompt = prompt_template.format(**input_dict)
-    result = model.invoke(prompt)
+    if isinstance(model, ModelRouter):
+        result, _ = model.run(
+            prompt,
+            "answer",
+            lambda r: answer_is_confident(getattr(r, "content", str(r))),
+            context=context,
+        )
+    else:
+        result = invoke_model(model, prompt, "answer")
     return result.content.strip() if hasattr(result, "content") else str(result).strip()
 
 
+def create_group_answer_prompt() -> "PromptTemplate":
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        input_variables=["questions", "contexts"],
+        template="""
+        Answer each numbered question below using the given contexts.
+        Answer every question in paragraph format, don't use font styles or bullet points.
+        Return a JSON array with one object per question and nothing else. Each object must have a "number" key with the question's number and an "answer" key with its answer.
+
+        Questions:
+        {questions}
+
+        Contexts:
+        {contexts}
+
+        JSON:
+        """,
+    )
+
+
+def group_by_context(
+    items: List[Tuple[str, List[str]]],
+    max_group_size: int,
+    max_group_contexts: Optional[int] = None,
+) -> List[List[Tuple[str, List[str]]]]:
+    """
+    Groups questions whose retrieved contexts overlap.
+
+    A question joins the first open group that already holds at least half of
+    its contexts, as long as the group stays within ``max_group_size``
+    questions and ``max_group_contexts`` distinct contexts.
+
+    Args:
+        items (List[Tuple[str, List[str]]]): (question id, contexts) pairs.
+        max_group_size (int): Maximum questions per group.
+        max_group_contexts (Optional[int]): Maximum distinct contexts per group;
+            defaults to twice the question's own context count.
+
+    Returns:
+        List[List[Tuple[str, List[str]]]]: The groups, in order of their first question.
+    """
+    groups: List[List[Tuple[str, List[str]]]] = []
+    group_contexts: List[Dict[str, None]] = []
+    # Context -> groups containing it that still have room. Questions without
+    # contexts share the None key with groups that have none.
+    open_groups: Dict[Optional[str], Set[int]] = {}
+    for item in items:
+        context_data = item[1]
+        limit = max_group_contexts or 2 * len(context_data)
+        shared: Dict[int, int] = {}
+        for context in context_data or [None]:
+            for position in open_groups.get(context, ()):
+                shared[position] = shared.get(position, 0) + 1
+        if not context_data:
+            shared = dict.fromkeys(shared, 0)
+        for position in sorted(shared):
+            union = group_contexts[position]
+            added = len(context_data) - shared[position]
+            if (
+                2 * shared[position] >= len(context_data)
+                and len(union) + added <= limit
+            ):
+                groups[position].append(item)
+                for context in context_data:
+                    if context not in union:
+                        union[context] = None
+                        open_groups.setdefault(context, set()).add(position)
+                break
+        else:
+            position = len(groups)
+            groups.append([item])
+            group_contexts.append(dict.fromkeys(context_data))
+            for context in context_data or [None]:
+                open_groups.setdefault(context, set()).add(position)
+        if len(groups[position]) >= max_group_size:
+            for context in group_contexts[position] or [None]:
+                open_groups[context].discard(position)
+    return groups
+
+
+def generate_group_answers(
+    questions: List[str],
+    contexts: List[str],
+    prompt_template: "PromptTemplate",
+    model: Any,
+) -> List[Optional[str]]:
+    """
+    Answers several questions over a shared set of contexts in one model call.
+
+    If ``model`` is a ModelRouter, the call escalates while fewer than half of
+    the questions get a confident answer, and answers that are not confident
+    are returned as None so that they are answered individually.
+
+    Args:
+        questions (List[str]): The questions.
+        contexts (List[str]): The distinct contexts retrieved for them.
+        prompt_template (PromptTemplate): The group answer prompt.
+        model: The language model or ModelRouter to use.
+
+    Returns:
+        List[Optional[str]]: The answer to each question, or None where the
+        output could not be parsed.
+    """
+    prompt = prompt_template.format(
+        questions="\n".join(f"{n}. {q}" for n, q in enumerate(questions, 1)),
+        contexts="\n\n".join(f"[{n}] {c}" for n, c in enumerate(contexts, 1)),
+    )
+    if not isinstance(model, ModelRouter):
+        result = invoke_model(model, prompt, "answer")
+        return parse_group_answers(_text(result), len(questions))
+
+    def confident(result) -> List[Optional[str]]:
+        return [
+            answer if answer and answer_is_confident(answer) else None
+            for answer in parse_group_answers(_text(result), len(questions))
+        ]
+
+    result, _ = model.run(
+        prompt,
+        "answer",
+        lambda r: 2 * sum(a is not None for a in confident(r)) >= len(questions),
+        context=" ".join(contexts),
+    )
+    return confident(result)
+
+
+def _text(result: Any) -> str:
+    return result.content if hasattr(result, "content") else str(result)
+
+
+def parse_group_answers(text: str, count: int) -> List[Optional[str]]:
+    """
+    Parses the JSON array returned for a group answer prompt.
+
+    Args:
+        text (str): The model output.
+        count (int): The number of questions asked.
+
+    Returns:
+        List[Optional[str]]: The answer to each question, or None where the
+        output could not be parsed.
+    """
+    answers: List[Optional[str]] = [None] * count
+    try:
+        items = parse_json_output(text)
+    except ValueError as e:
+        logger.warning("Could not parse group answer: %s", e)
+        items = []
+    if not isinstance(items, list):
+        items = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        number = item.get("number", position + 1)
+        answer = item.get("answer")
+        if (
+            isinstance(number, int)
+            and 1 <= number <= count
+            and isinstance(answer, str)
+            and answer.strip()
+        ):
+            answers[number - 1] = answer.strip()
+    return answers
+
+
+@instrument_node("answer_generation")
 def answer_generator(
     state: QAState,
     max_answers: int = 10,
+    answer_group_size: Optional[int] = None,
 ) -> QAState:
+    """
+    Answers the evolved questions from their retrieved contexts.
+
+    With ``answer_group_size`` (or ``state["answer_group_size"]``) above 1,
+    questions whose contexts overlap are answered together in one call that
+    sends each shared context once. Questions missing from a group's output
+    are answered individually.
+
+    Args:
+        state (QAState): The current state of the QA system.
+        max_answers (int): Maximum number of questions to answer.
+        answer_group_size (Optional[int]): Maximum questions answered per call.
+
+    Returns:
+        QAState: The updated state with answers.
+    """
     model = state.get("model")
     evolved_questions = state.get("evolved_questions", [])
-    contexts = state.get("contexts", [])
-    answers = []
+    contexts = as_record_store(state.get("contexts"), QuestionContext)
+    answers = RecordStore(Answer)
     answer_prompt = create_answer_prompt()
+    answer_group_size = answer_group_size or state.get("answer_group_size") or 1
 
+    selected = []
     for q in evolved_questions:
-        if len(answers) >= max_answers:
+        if len(selected) >= max_answers:
             break
+        selected.append(q)
 
-        context_data = next(
-            (c["contexts"] for c in contexts if c["id"] == q["id"]), None
-        )
+    grouped_answers: Dict[str, str] = {}
+    if answer_group_size > 1:
+        items = []
+        for q in selected:
+            context_record = contexts.get(q["id"])
+            if context_record and context_record.contexts:
+                items.append((q["id"], context_record.contexts))
+        group_prompt = create_group_answer_prompt()
+        questions_by_id = {q["id"]: q["evolved_question"] for q in selected}
+        metrics = current_metrics()
+        for group in group_by_context(items, answer_group_size):
+            if len(group) == 1:
+                continue
+            group_contexts = list(
+                dict.fromkeys(c for _, context_data in group for c in context_data)
+            )
+            group_answers = generate_group_answers(
+                [questions_by_id[question_id] for question_id, _ in group],
+                group_contexts,
+                group_prompt,
+                model,
+            )
+            missing = 0
+            for (question_id, _), answer in zip(group, group_answers):
+                if answer:
+                    grouped_answers[question_id] = answer
+                else:
+                    missing += 1
+            if metrics is not None:
+                metrics.increment("grouped_answers", "answer", len(group) - missing)
+                if missing:
+                    metrics.increment("group_answer_fallbacks", "answer", missing)
+
+    for q in selected:
+        context_record = contexts.get(q["id"])
+        context_data = context_record.contexts if context_record else None
         if not context_data:
-            print(
-                f"No context found for question ID {q['id']}. Marking as research required."
+            logger.info(
+                "No context found for question ID %s. Marking as research required.",
+                q["id"],
             )
-            answers.append(
-                {
-                    "id": q["id"],
-                    "question": q["evolved_question"],
-                    "answer": "Research required: Insufficient context to provide an accurate answer.",
-                    "context": "",
-                }
+            answers.add(
+                Answer(
+                    id=q["id"],
+                    question=q["evolved_question"],
+                    answer="Research required: Insufficient context to provide an accurate answer.",
+                    context="",
+                )
             )
             continue
 
         combined_context = " ".join(context_data)
-        answer = generate_answer(
+        answer = grouped_answers.get(q["id"]) or generate_answer(
             q["evolved_question"], combined_context, answer_prompt, model
         )
 
         if answer:
-            answers.append(
-                {
-                    "id": q["id"],
-                    "question": q["evolved_question"],
-                    "answer": answer,
-                    "context": combined_context,
-                }
+            answers.add(
+                Answer(
+                    id=q["id"],
+                    question=q["evolved_question"],
+                    answer=answer,
+                    context=combined_context,
+                )
             )
         else:
-            print(
-                f"No answer generated for question ID {q['id']}. Marking as research required."
+            logger.info(
+                "No answer generated for question ID %s. Marking as research required.",
+                q["id"],
             )
-            answers.append(
-                {
-                    "id": q["id"],
-                    "question": q["evolved_question"],
-                    "answer": "Research required: Unable to generate an answer based on the given context.",
-                    "context": combined_context,
-                }
+            answers.add(
+                Answer(
+                    id=q["id"],
+                    question=q["evolved_question"],
+                    answer="Research required: Unable to generate an answer based on the given context.",
+                    context=combined_context,
+                )
             )
 
     state["answers"] = answers
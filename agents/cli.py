@@ -0,0 +1,601 @@
+"""
+Headless batch runner for the question generation and answering graph.
+
+Usage:
+
+    evol-aie4 run manifest.jsonl --workers 4 --output-dir out/
+    evol-aie4 run manifest.txt --config evol.toml
+    evol-aie4 shard plan queue.db manifest.txt --questions-per-technique 10
+    evol-aie4 shard work queue.db --workers 8
+    evol-aie4 shard merge queue.db questions.jsonl
+    evol-aie4 corpus build paper.pdf corpus/
+
+The manifest lists one job per line, either a PDF path or URL, a directory of
+PDFs, or a JSON object with ``pdf_path`` plus optional ``id`` and QAState
+overrides. Jobs run in long-lived worker processes that build their models,
+clients and compiled graph once and reuse them for every job they receive.
+
+The ``shard`` commands split question generation into work units on a SQLite
+queue. Any number of ``shard work`` processes can drain it, and ``shard merge``
+combines their results into one export.
+
+``corpus build`` parses and embeds a PDF once into a SharedCorpus directory.
+Jobs and shard workers whose state sets ``shared_corpus`` to it map the pages,
+embeddings and index read-only instead of each loading their own copy.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "workers": 1,
+    "output_dir": "output",
+    "model": "gpt-4o",
+    "critic_model": "gpt-4o-mini",
+    "embedding_model": "text-embedding-ada-002",
+    "model_factory": None,
+    "state": {"max_evolved_questions": 20, "max_evolutions_per_technique": 1},
+    # USD per million tokens, keyed by model name.
+    "prices": {
+        "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+        "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+    },
+}
+
+# Per-process cache of models and the compiled graph, filled by _init_worker.
+_WORKER: Dict[str, Any] = {}
+
+
+def load_config(path: Optional[str]) -> Dict[str, Any]:
+    """
+    Loads a TOML or JSON config file on top of DEFAULT_CONFIG.
+
+    Args:
+        path (Optional[str]): The config file, or None for the defaults.
+
+    Returns:
+        Dict[str, Any]: The merged config.
+    """
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if not path:
+        return config
+    if path.endswith(".toml"):
+        import tomllib
+
+        with open(path, "rb") as handle:
+            overrides = tomllib.load(handle)
+    else:
+        with open(path, encoding="utf-8") as handle:
+            overrides = json.load(handle)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    return config
+
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads a manifest into job dictionaries with at least ``id`` and ``pdf_path``.
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        List[Dict[str, Any]]: One job per PDF.
+    """
+    jobs = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            job = json.loads(line) if line.startswith("{") else {"pdf_path": line}
+            for pdf_path in _expand(job["pdf_path"]):
+                entry = dict(job, pdf_path=pdf_path)
+                if "id" not in job or pdf_path != job["pdf_path"]:
+                    entry["id"] = _job_id(pdf_path, len(jobs))
+                jobs.append(entry)
+    return jobs
+
+
+def _expand(pdf_path: str) -> Iterator[str]:
+    if os.path.isdir(pdf_path):
+        for name in sorted(os.listdir(pdf_path)):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(pdf_path, name)
+    else:
+        yield pdf_path
+
+
+def _job_id(pdf_path: str, position: int) -> str:
+    stem = os.path.splitext(os.path.basename(pdf_path.split("?", 1)[0]))[0]
+    return f"{position:05d}_{stem or 'document'}"
+
+
+def tiered_model(config: Dict[str, Any], key: str, build: Callable[[str], Any]) -> Any:
+    """
+    Builds the model for ``key``, or a ModelRouter if the config lists ``<key>_tiers``.
+
+    Routing options come from the config's ``routing`` table: ``stage_tiers``,
+    ``technique_tiers`` and ``long_context_chars``.
+    """
+    tiers = config.get(f"{key}_tiers")
+    if not tiers:
+        return build(config[key])
+    from .model_router import ModelRouter
+
+    routing = config.get("routing", {})
+    return ModelRouter(
+        [build(name) for name in tiers],
+        stage_tiers=routing.get("stage_tiers"),
+        technique_tiers=routing.get("technique_tiers"),
+        long_context_chars=routing.get("long_context_chars"),
+        prices=config.get("prices"),
+    )
+
+
+def default_model_factory(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the OpenAI models named in the config, as the notebook does.
+    """
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+    def build(name: str) -> Any:
+        return ChatOpenAI(model=name)
+
+    return {
+        "model": tiered_model(config, "model", build),
+        "critic_model": tiered_model(config, "critic_model", build),
+        "embedding_model": OpenAIEmbeddings(model=config["embedding_model"]),
+    }
+
+
+def resolve_factory(path: Optional[str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Resolves a ``module:callable`` model factory, defaulting to OpenAI models.
+    """
+    if not path:
+        return default_model_factory
+    module, _, name = path.partition(":")
+    return getattr(import_module(module), name)
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    from .graph import build_qa_graph
+
+    logging.basicConfig(level=config.get("log_level", "WARNING"))
+    _WORKER.clear()
+    _WORKER.update(resolve_factory(config.get("model_factory"))(config))
+    _WORKER["graph"] = build_qa_graph()
+    _WORKER["config"] = config
+    shared_corpus = config["state"].get("shared_corpus")
+    if shared_corpus:
+        from .shared_corpus import SharedCorpus
+
+        # Mapped once per worker; jobs reuse the mapping.
+        SharedCorpus.attach(shared_corpus)
+
+
+def estimate_cost(report: Dict[str, Any], prices: Dict[str, Dict[str, float]]) -> float:
+    """
+    Estimates the USD cost of a run from its metrics report.
+
+    Args:
+        report (Dict[str, Any]): The output of RunMetrics.summary().
+        prices (Dict[str, Dict[str, float]]): USD per million prompt and completion tokens by model.
+
+    Returns:
+        float: The estimated cost; models without a price count as free.
+    """
+    cost = 0.0
+    for entry in report["llm_calls"]:
+        price = prices.get(entry["model"], {})
+        cost += entry["prompt_tokens"] * price.get("prompt", 0.0) / 1e6
+        cost += entry["completion_tokens"] * price.get("completion", 0.0) / 1e6
+    return cost
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the graph for one manifest entry inside an initialised worker.
+
+    Writes ``<id>.jsonl`` with the exported records and ``<id>.metrics.json``
+    with the run report to the output directory.
+
+    Args:
+        job (Dict[str, Any]): The manifest entry.
+
+    Returns:
+        Dict[str, Any]: Per-job throughput and cost summary.
+    """
+    from .graph import initialize_state
+    from .instrumentation import RunMetrics
+
+    config = _WORKER["config"]
+    metrics = RunMetrics(run_id=job["id"])
+    overrides = {k: v for k, v in job.items() if k not in ("id", "pdf_path")}
+    state = initialize_state(
+        job["pdf_path"],
+        _WORKER["embedding_model"],
+        _WORKER["model"],
+        _WORKER["critic_model"],
+        **{**config["state"], **overrides, "metrics": metrics},
+    )
+
+    start = time.perf_counter()
+    try:
+        result = _WORKER["graph"].invoke(state)
+    except Exception as e:
+        logger.exception("Job %s failed", job["id"])
+        return {"id": job["id"], "status": "failed", "error": str(e)}
+    seconds = time.perf_counter() - start
+
+    output_dir = config["output_dir"]
+    with open(
+        os.path.join(output_dir, f"{job['id']}.jsonl"), "w", encoding="utf-8"
+    ) as handle:
+        for record in result["final_output"]:
+            handle.write(json.dumps(record) + "\n")
+    metrics.write(os.path.join(output_dir, f"{job['id']}.metrics.json"))
+
+    report = metrics.summary()
+    questions = len(result["final_output"])
+    return {
+        "id": job["id"],
+        "status": "ok",
+        "pid": os.getpid(),
+        "seconds": seconds,
+        "pages": len(result.get("documents") or []),
+        "questions": questions,
+        "questions_per_second": questions / seconds if seconds else None,
+        "prompt_tokens": report["prompt_tokens"],
+        "completion_tokens": report["completion_tokens"],
+        "cost_usd": estimate_cost(report, config["prices"]),
+        "critic_acceptance_rate": report["critic_acceptance_rate"],
+        **{
+            f"{key}_routing": _WORKER[key].report(metrics)
+            for key in ("model", "critic_model")
+            if hasattr(_WORKER[key], "report")
+        },
+    }
+
+
+def run_batch(
+    jobs: List[Dict[str, Any]], config: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Runs every job, in-process for one worker or in a pool of warm workers.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Manifest entries.
+        config (Dict[str, Any]): The merged config.
+
+    Returns:
+        List[Dict[str, Any]]: Per-job summaries in completion order.
+    """
+    os.makedirs(config["output_dir"], exist_ok=True)
+    workers = max(1, int(config["workers"]))
+    results = []
+    if workers == 1:
+        _init_worker(config)
+        for job in jobs:
+            results.append(run_job(job))
+            _print_job(results[-1])
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)) or 1,
+        initializer=_init_worker,
+        initargs=(config,),
+    ) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+            _print_job(results[-1])
+    return results
+
+
+def _print_job(result: Dict[str, Any]) -> None:
+    if result["status"] != "ok":
+        print(f"{result['id']}: FAILED {result['error']}", flush=True)
+        return
+    print(
+        f"{result['id']}: {result['questions']} questions from {result['pages']} pages"
+        f" in {result['seconds']:.1f}s ({result['questions_per_second'] or 0:.2f} q/s),"
+        f" {result['prompt_tokens']}+{result['completion_tokens']} tokens,"
+        f" ${result['cost_usd']:.4f}",
+        flush=True,
+    )
+
+
+def _config_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    config = load_config(args.config)
+    for key in ("workers", "output_dir", "model", "critic_model", "model_factory"):
+        value = getattr(args, key, None)
+        if value is not None:
+            config[key] = value
+    for key in (
+        "max_evolved_questions",
+        "max_evolutions_per_technique",
+        "max_retries",
+    ):
+        value = getattr(args, key, None)
+        if value is not None:
+            config["state"][key] = value
+    config["log_level"] = args.log_level
+    return config
+
+
+def _command_run(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+
+    jobs = read_manifest(args.manifest)
+    if not jobs:
+        print("Manifest contains no jobs.", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    results = run_batch(jobs, config)
+    elapsed = time.perf_counter() - start
+
+    succeeded = [r for r in results if r["status"] == "ok"]
+    summary = {
+        "jobs": len(jobs),
+        "succeeded": len(succeeded),
+        "seconds": elapsed,
+        "jobs_per_minute": 60 * len(succeeded) / elapsed if elapsed else None,
+        "questions": sum(r["questions"] for r in succeeded),
+        "cost_usd": sum(r["cost_usd"] for r in succeeded),
+        "results": sorted(results, key=lambda r: r["id"]),
+    }
+    with open(
+        os.path.join(config["output_dir"], "batch_summary.json"), "w", encoding="utf-8"
+    ) as handle:
+        json.dump(summary, handle, indent=2)
+    print(
+        f"{summary['succeeded']}/{summary['jobs']} jobs, {summary['questions']} questions"
+        f" in {elapsed:.1f}s, ${summary['cost_usd']:.4f}"
+    )
+    return 0 if len(succeeded) == len(jobs) else 1
+
+
+def _command_shard_plan(args: argparse.Namespace) -> int:
+    from .evolution_techniques import evolution_technique_names
+    from .sharding import plan_work_units
+    from .work_queue import SQLiteWorkQueue
+
+    config = _config_from_args(args)
+    quotas = config.get("technique_quotas") or {
+        name: args.questions_per_technique
+        for name in (args.techniques or evolution_technique_names())
+    }
+    pdf_paths = [job["pdf_path"] for job in read_manifest(args.manifest)]
+    units = plan_work_units(
+        pdf_paths, quotas, args.pages_per_shard, args.questions_per_unit
+    )
+    SQLiteWorkQueue(args.queue).put(units)
+    print(f"Queued {len(units)} units for {len(pdf_paths)} documents.")
+    return 0
+
+
+def _shard_worker(queue_path: str, config: Dict[str, Any], args: Dict[str, Any]) -> int:
+    from .instrumentation import retry_policy
+    from .sharding import load_pdf_pages, run_worker
+    from .work_queue import SQLiteWorkQueue
+
+    logging.basicConfig(level=config.get("log_level", "WARNING"))
+    models = resolve_factory(config.get("model_factory"))(config)
+    cache_dir = config.get("state", {}).get("cache_dir")
+    if cache_dir:
+        from .pdf_cache import PDFCache
+
+        document_loader = PDFCache(cache_dir).load_pages
+    else:
+        document_loader = load_pdf_pages
+    shared_corpus = config.get("state", {}).get("shared_corpus")
+    if shared_corpus:
+        from .shared_corpus import SharedCorpus
+
+        corpus = SharedCorpus.attach(shared_corpus)
+        parse = document_loader
+
+        def document_loader(pdf_path: str) -> Any:
+            return corpus.documents if pdf_path == corpus.source else parse(pdf_path)
+
+    state = config.get("state", {})
+    backoff = state.get("retry_backoff")
+    with retry_policy(
+        state.get("max_retries") or 0, 1.0 if backoff is None else backoff
+    ):
+        return run_worker(
+            SQLiteWorkQueue(queue_path, max_attempts=args["max_attempts"]),
+            models["model"],
+            models["critic_model"],
+            lease_seconds=args["lease_seconds"],
+            quality_threshold=args["quality_threshold"],
+            exit_when_idle=not args["wait"],
+            document_loader=document_loader,
+        )
+
+
+def _command_shard_work(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    worker_args = {
+        "max_attempts": args.max_attempts,
+        "lease_seconds": args.lease_seconds,
+        "quality_threshold": args.quality_threshold,
+        "wait": args.wait,
+    }
+    workers = max(1, int(config["workers"]))
+    start = time.perf_counter()
+    if workers == 1:
+        _shard_worker(args.queue, config, worker_args)
+    else:
+        processes = [
+            multiprocessing.Process(
+                target=_shard_worker, args=(args.queue, config, worker_args)
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    return _command_shard_status(args, time.perf_counter() - start)
+
+
+def _command_shard_merge(args: argparse.Namespace) -> int:
+    from .sharding import merge_results
+    from .work_queue import SQLiteWorkQueue
+
+    written = 0
+    with open(args.output, "w", encoding="utf-8") as handle:
+        for row in merge_results(
+            SQLiteWorkQueue(args.queue), validated_only=not args.include_rejected
+        ):
+            handle.write(json.dumps(row) + "\n")
+            written += 1
+    print(f"Wrote {written} questions to {args.output}.")
+    return 0
+
+
+def _command_shard_status(
+    args: argparse.Namespace, seconds: Optional[float] = None
+) -> int:
+    from .work_queue import SQLiteWorkQueue
+
+    counts = SQLiteWorkQueue(args.queue).counts()
+    line = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    if seconds is not None:
+        line += f" ({counts.get('done', 0) / seconds * 60:.1f} units/min)"
+    print(line)
+    return 1 if counts.get("failed") else 0
+
+
+def _command_corpus_build(args: argparse.Namespace) -> int:
+    from .embedding_store import EmbeddingStore
+    from .shared_corpus import SharedCorpus
+
+    config = _config_from_args(args)
+    embedding_model = resolve_factory(config.get("model_factory"))(config)[
+        "embedding_model"
+    ]
+    cache_dir = config["state"].get("cache_dir")
+    if cache_dir:
+        from .pdf_cache import PDFCache
+
+        documents = PDFCache(cache_dir).load_pages(args.pdf_path)
+    else:
+        from .sharding import load_pdf_pages
+
+        documents = load_pdf_pages(args.pdf_path)
+    if not documents:
+        print(f"No pages in {args.pdf_path}.", file=sys.stderr)
+        return 1
+    embeddings = EmbeddingStore.from_model(
+        embedding_model, [document.page_content for document in documents]
+    )
+    corpus = SharedCorpus.create(
+        args.directory, documents, embeddings, source=args.pdf_path
+    )
+    print(f"Wrote {len(corpus)} pages to {args.directory}.")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="evol-aie4", description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Process every PDF in a manifest.")
+    run.add_argument("manifest", help="Text or JSON-lines manifest of PDFs.")
+    run.add_argument("--config", help="TOML or JSON config file.")
+    run.add_argument("--workers", type=int, help="Number of warm worker processes.")
+    run.add_argument("--output-dir")
+    run.add_argument("--model", help="Generator model name.")
+    run.add_argument("--critic-model", help="Critic model name.")
+    run.add_argument("--model-factory", help="module:callable returning the models.")
+    run.add_argument("--max-evolved-questions", type=int)
+    run.add_argument("--max-evolutions-per-technique", type=int)
+    run.add_argument(
+        "--max-retries", type=int, help="Retries per failed model call, with backoff."
+    )
+    run.set_defaults(handler=_command_run)
+
+    shard = commands.add_parser(
+        "shard", help="Sharded question generation over a work queue."
+    ).add_subparsers(dest="shard_command", required=True)
+
+    plan = shard.add_parser("plan", help="Queue work units for a manifest.")
+    plan.add_argument("queue", help="SQLite queue file.")
+    plan.add_argument("manifest")
+    plan.add_argument("--config")
+    plan.add_argument("--questions-per-technique", type=int, default=5)
+    plan.add_argument("--techniques", nargs="+", help="Defaults to every technique.")
+    plan.add_argument("--pages-per-shard", type=int, default=50)
+    plan.add_argument("--questions-per-unit", type=int, default=5)
+    plan.set_defaults(handler=_command_shard_plan)
+
+    work = shard.add_parser("work", help="Drain the queue with worker processes.")
+    work.add_argument("queue")
+    work.add_argument("--config")
+    work.add_argument("--workers", type=int)
+    work.add_argument("--model", help="Generator model name.")
+    work.add_argument("--critic-model", help="Critic model name.")
+    work.add_argument("--model-factory", help="module:callable returning the models.")
+    work.add_argument("--lease-seconds", type=float, default=300.0)
+    work.add_argument("--max-attempts", type=int, default=3)
+    work.add_argument("--quality-threshold", type=int, default=3)
+    work.add_argument(
+        "--max-retries", type=int, help="Retries per failed model call, with backoff."
+    )
+    work.add_argument(
+        "--wait", action="store_true", help="Keep polling after the queue drains."
+    )
+    work.set_defaults(handler=_command_shard_work)
+
+    merge = shard.add_parser("merge", help="Merge completed units into one export.")
+    merge.add_argument("queue")
+    merge.add_argument("output", help="JSON-lines file to write.")
+    merge.add_argument("--include-rejected", action="store_true")
+    merge.set_defaults(handler=_command_shard_merge)
+
+    status = shard.add_parser("status", help="Show unit counts per status.")
+    status.add_argument("queue")
+    status.set_defaults(handler=_command_shard_status)
+
+    corpus = commands.add_parser(
+        "corpus", help="Corpora shared read-only between worker processes."
+    ).add_subparsers(dest="corpus_command", required=True)
+
+    build = corpus.add_parser("build", help="Parse and embed a PDF once.")
+    build.add_argument("pdf_path", help="PDF path or URL.")
+    build.add_argument("directory", help="Directory to write the corpus to.")
+    build.add_argument("--config")
+    build.add_argument("--model-factory", help="module:callable returning the models.")
+    build.set_defaults(handler=_command_corpus_build)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
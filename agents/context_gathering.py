@@ -1,21 +1,43 @@
-import faiss
 import numpy as np
-from typing import Any, List, Dict
+from typing import TYPE_CHECKING, Any, List, Dict
 from .state_config import QAState
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from .instrumentation import call_with_retries, instrument_node
+from .corpus_index import page_hash
+from .embedding_store import as_embedding_store
+from .records import QuestionContext, RecordStore
+import logging
 
+if TYPE_CHECKING:
+    import faiss
+    from qdrant_client import QdrantClient
 
+logger = logging.getLogger(__name__)
+
+# Contexts retrieved per question unless the caller asks for another k.
+DEFAULT_K = 5
+
+
+@instrument_node("context_gathering")
 def context_gathering(
     state: QAState,
-    k: int = 5,
+    k: int = DEFAULT_K,
     use_qdrant: bool = False,
-    qdrant_client: QdrantClient = None,
+    # Annotated as Any: LangGraph resolves node type hints at graph build time,
+    # and qdrant_client is only imported for type checking.
+    qdrant_client: Any = None,
     collection_name: str = None,
 ) -> QAState:
     """
     Handles context dynamically using FAISS or Qdrant for evolved questions.
 
+    If the state holds a persisted ``document_index`` (see IncrementalCorpus), it is
+    searched instead of building an index from ``document_embeddings``, and its ids
+    are mapped to pages through ``document_ids``. Without ``document_ids`` the ids
+    are page positions, as in a SharedCorpus.
+
+    If ``state["query_vectors"]`` is a dict, question embeddings found there by
+    question id are reused, and the ones computed are added to it.
+
     Args:
         state (QAState): The current state of the QA system.
         k (int): The number of relevant contexts to retrieve for each question.
@@ -27,11 +49,16 @@ def context_gathering(
         QAState: The updated state with relevant contexts for each evolved question.
     """
     embedding_model = state.get("embedding_model")
-    document_embeddings = state.get("document_embeddings", [])
+    document_embeddings = state.get("document_embeddings")
     documents = state.get("documents", [])
     evolved_questions = state.get("evolved_questions", [])
+    document_index = state.get("document_index")
 
-    if not document_embeddings and not use_qdrant:
+    if (
+        (document_embeddings is None or len(document_embeddings) == 0)
+        and document_index is None
+        and not use_qdrant
+    ):
         raise ValueError("Document embeddings are missing from the state.")
 
     if use_qdrant and (qdrant_client is None or collection_name is None):
@@ -39,22 +66,50 @@ def context_gathering(
             "Qdrant client and collection name are required when using Qdrant."
         )
 
-    contexts = []
+    contexts = RecordStore(QuestionContext)
 
     if use_qdrant:
 
         def search_func(query_vector):
             return qdrant_search(qdrant_client, collection_name, query_vector, k)
 
+    elif document_index is not None and state.get("document_ids") is None:
+
+        def search_func(query_vector):
+            return [
+                position
+                for position in faiss_search(document_index, query_vector, k)
+                if position >= 0
+            ]
+
+    elif document_index is not None:
+        positions = {
+            faiss_id: position
+            for position, faiss_id in enumerate(state["document_ids"])
+        }
+
+        def search_func(query_vector):
+            return [
+                positions[faiss_id]
+                for faiss_id in faiss_search(document_index, query_vector, k)
+                if faiss_id in positions
+            ]
+
     else:
-        index = faiss.IndexFlatL2(len(document_embeddings[0]))
-        index.add(np.array(document_embeddings).astype("float32"))
+        index = as_embedding_store(document_embeddings).build_index()
 
         def search_func(query_vector):
             return faiss_search(index, query_vector, k)
 
+    query_vectors = state.get("query_vectors")
     for q in evolved_questions:
-        query_vector = embedding_model.embed_query(q["evolved_question"])
+        query_vector = query_vectors.get(q["id"]) if query_vectors is not None else None
+        if query_vector is None:
+            query_vector = call_with_retries(
+                "embedding", embedding_model.embed_query, q["evolved_question"]
+            )
+            if query_vectors is not None:
+                query_vectors[q["id"]] = query_vector
         relevant_indices = search_func(query_vector)
 
         relevant_contexts = [
@@ -62,21 +117,22 @@ def context_gathering(
         ]
 
         if relevant_contexts:
-            contexts.append(
-                {
-                    "id": q["id"],
-                    "question": q["evolved_question"],
-                    "contexts": relevant_contexts,
-                }
+            contexts.add(
+                QuestionContext(
+                    id=q["id"],
+                    question=q["evolved_question"],
+                    contexts=relevant_contexts,
+                    context_ids=[page_hash(context) for context in relevant_contexts],
+                )
             )
         else:
-            print(f"No contexts found for question ID {q['id']}.")
+            logger.info("No contexts found for question ID %s.", q["id"])
 
     state["contexts"] = contexts
     return state
 
 
-def faiss_search(index: faiss.Index, query_vector: np.ndarray, k: int) -> List[int]:
+def faiss_search(index: "faiss.Index", query_vector: np.ndarray, k: int) -> List[int]:
     """
     Perform a k-nearest neighbors search using FAISS.
 
@@ -88,12 +144,12 @@ def faiss_search(index: faiss.Index, query_vector: np.ndarray, k: int) -> List[i
     Returns:
         List[int]: The indices of the k-nearest neighbors.
     """
-    _, indices = index.search(np.array([query_vector]).astype("float32"), k=k)
+    _, indices = index.search(np.asarray([query_vector], dtype="float32"), k=k)
     return indices[0].tolist()
 
 
 def qdrant_search(
-    client: QdrantClient, collection_name: str, query_vector: List[float], k: int
+    client: "QdrantClient", collection_name: str, query_vector: List[float], k: int
 ) -> List[int]:
     """
     Perform a k-nearest neighbors search using Qdrant.
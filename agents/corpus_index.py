@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .instrumentation import call_with_retries, model_name
+
+if TYPE_CHECKING:
+    import faiss
+
+logger = logging.getLogger(__name__)
+
+
+def page_hash(text: str) -> str:
+    """
+    Returns the content hash that identifies a page across corpus versions.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def page_faiss_id(hash_: str) -> int:
+    """
+    Returns the FAISS id of a page hash: its first 60 bits, a positive int64.
+    """
+    return int(hash_[:15], 16)
+
+
+@dataclass(slots=True)
+class CorpusDiff:
+    added: List[str]
+    removed: List[str]
+    unchanged: List[str]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+class IncrementalCorpus:
+    """
+    Page embeddings and their FAISS index, persisted in a directory and updated in place.
+
+    Pages are identified by a hash of their text, so a page that moves within
+    an amended document keeps its embedding. ``update`` embeds only pages whose
+    hash is new and removes pages whose hash disappeared from an
+    ``IndexIDMap2`` keyed by :func:`page_faiss_id`. Changing the embedding
+    model rebuilds the index from scratch. ``update`` changes only the object;
+    call ``save`` once the outputs derived from the new corpus are saved, so a
+    failed run leaves the previous corpus to diff against.
+
+    Args:
+        directory (str): Where ``manifest.json`` and ``index.faiss`` are kept.
+    """
+
+    MANIFEST = "manifest.json"
+    INDEX = "index.faiss"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest: Dict[str, Any] = {"embedding_model": None, "pages": []}
+        self.index: Optional["faiss.Index"] = None
+        manifest_path = os.path.join(directory, self.MANIFEST)
+        index_path = os.path.join(directory, self.INDEX)
+        if os.path.exists(manifest_path) and os.path.exists(index_path):
+            import faiss
+
+            with open(manifest_path) as handle:
+                self.manifest = json.load(handle)
+            self.index = faiss.read_index(index_path)
+
+    @property
+    def page_hashes(self) -> List[str]:
+        return list(self.manifest["pages"])
+
+    def __len__(self) -> int:
+        return len(self.manifest["pages"])
+
+    def update(
+        self, texts: Sequence[str], embedding_model: Any, batch_size: int = 1000
+    ) -> CorpusDiff:
+        """
+        Brings the index in line with the given pages, embedding only new ones.
+
+        Args:
+            texts (Sequence[str]): The text of every page in the current corpus.
+            embedding_model: Model exposing ``embed_documents``.
+            batch_size (int): Number of texts per ``embed_documents`` call.
+
+        Returns:
+            CorpusDiff: The page hashes added, removed and unchanged.
+        """
+        import faiss
+
+        name = model_name(embedding_model)
+        if self.manifest["embedding_model"] != name:
+            if self.index is not None:
+                logger.info(
+                    "Embedding model changed from %s to %s; rebuilding the index.",
+                    self.manifest["embedding_model"],
+                    name,
+                )
+            self.manifest = {"embedding_model": name, "pages": []}
+            self.index = None
+
+        new_texts = {}
+        for text in texts:
+            new_texts.setdefault(page_hash(text), text)
+        old_hashes = set(self.manifest["pages"])
+        added = [h for h in new_texts if h not in old_hashes]
+        removed = [h for h in self.manifest["pages"] if h not in new_texts]
+        unchanged = [h for h in self.manifest["pages"] if h in new_texts]
+
+        if removed and self.index is not None:
+            self.index.remove_ids(
+                np.array([page_faiss_id(h) for h in removed], dtype=np.int64)
+            )
+        for start in range(0, len(added), batch_size):
+            batch = added[start : start + batch_size]
+            vectors = np.asarray(
+                call_with_retries(
+                    "embedding",
+                    embedding_model.embed_documents,
+                    [new_texts[h] for h in batch],
+                ),
+                dtype=np.float32,
+            )
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+            self.index.add_with_ids(
+                np.ascontiguousarray(vectors),
+                np.array([page_faiss_id(h) for h in batch], dtype=np.int64),
+            )
+
+        self.manifest["pages"] = unchanged + added
+        diff = CorpusDiff(added, removed, unchanged)
+        logger.info(
+            "Corpus update: %d pages added, %d removed, %d unchanged",
+            len(added),
+            len(removed),
+            len(unchanged),
+        )
+        return diff
+
+    def save(self) -> None:
+        """
+        Writes the index and manifest, replacing the previous files atomically.
+        """
+        import faiss
+
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, self.INDEX)
+        manifest_path = os.path.join(self.directory, self.MANIFEST)
+        if self.index is not None:
+            faiss.write_index(self.index, f"{index_path}.tmp")
+            os.replace(f"{index_path}.tmp", index_path)
+        with open(f"{manifest_path}.tmp", "w") as handle:
+            json.dump(self.manifest, handle)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
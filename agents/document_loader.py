@@ -1,8 +1,13 @@
-from langchain_community.document_loaders import PyMuPDFLoader
-from typing import Any
 from .state_config import QAState
+from .corpus_index import IncrementalCorpus, page_faiss_id, page_hash
+from .embedding_store import EmbeddingStore
+from .pdf_cache import PDFCache
+from .shared_corpus import SharedCorpus
+from .instrumentation import current_metrics, instrument_node, model_name
+import time
 
 
+@instrument_node("load_documents")
 def load_documents_and_generate_embeddings(state: QAState) -> QAState:
     """
     Load documents from a PDF file and generate embeddings for the document content.
@@ -13,6 +18,12 @@ def load_documents_and_generate_embeddings(state: QAState) -> QAState:
 
     Args:
         state (QAState): The current state of the QA system, containing pdf_path and embedding_model.
+            Optional embedding_dtype ("float32", "float16" or "int8") and embedding_mmap_path
+            control how the embedding matrix is stored. With corpus_dir set, page embeddings
+            are kept in an IncrementalCorpus there instead, and only new pages are embedded.
+            With cache_dir set, the PDF is fetched and parsed through a PDFCache there.
+            With shared_corpus set, the pages, embeddings and index are mapped from a
+            SharedCorpus directory built for pdf_path, and nothing is parsed or embedded.
 
     Returns:
         QAState: The updated state with the loaded documents and their embeddings.
@@ -26,16 +37,54 @@ def load_documents_and_generate_embeddings(state: QAState) -> QAState:
     if not pdf_path or not embedding_model:
         raise ValueError("pdf_path and embedding_model must be provided in the state.")
 
+    if state.get("shared_corpus"):
+        corpus = SharedCorpus.attach(state["shared_corpus"])
+        if corpus.source is not None and corpus.source != pdf_path:
+            raise ValueError(
+                f"Shared corpus {state['shared_corpus']} was built from {corpus.source}, not {pdf_path}."
+            )
+        state.update(corpus.state())
+        return state
+
     # Load documents
-    loader = PyMuPDFLoader(file_path=pdf_path)
-    documents = loader.load()
+    cache_dir = state.get("cache_dir")
+    if cache_dir:
+        documents = PDFCache(cache_dir).load_pages(pdf_path)
+    else:
+        from langchain_community.document_loaders import PyMuPDFLoader
+
+        loader = PyMuPDFLoader(file_path=pdf_path)
+        documents = loader.load()
 
     if not documents:
         raise ValueError("No documents were loaded from the PDF.")
 
     # Generate embeddings
     document_texts = [doc.page_content for doc in documents]
-    document_embeddings = embedding_model.embed_documents(document_texts)
+    metrics = current_metrics()
+    start = time.perf_counter()
+    corpus_dir = state.get("corpus_dir")
+    if corpus_dir:
+        corpus = IncrementalCorpus(corpus_dir)
+        state["corpus_diff"] = corpus.update(document_texts, embedding_model)
+        # Saved by incremental_update after the outputs.
+        state["incremental_corpus"] = corpus
+        state["document_index"] = corpus.index
+        state["document_ids"] = [
+            page_faiss_id(page_hash(text)) for text in document_texts
+        ]
+        document_embeddings = None
+    else:
+        document_embeddings = EmbeddingStore.from_model(
+            embedding_model,
+            document_texts,
+            dtype=state.get("embedding_dtype") or "float32",
+            mmap_path=state.get("embedding_mmap_path"),
+        )
+    if metrics is not None:
+        metrics.record_llm_call(
+            "embedding", model_name(embedding_model), time.perf_counter() - start
+        )
 
     # Update state
     state["documents"] = documents
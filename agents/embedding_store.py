@@ -0,0 +1,303 @@
+import logging
+import os
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
+
+import numpy as np
+
+from .instrumentation import call_with_retries
+
+if TYPE_CHECKING:
+    import faiss
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+class EmbeddingStore:
+    """
+    Document embeddings held in one contiguous matrix.
+
+    Rows are stored as float32 by default. ``float16`` halves the footprint and
+    ``int8`` quarters it using symmetric per-row scalar quantization; rows are
+    dequantized to float32 on access. The matrix may live in a memory-mapped
+    ``.npy`` file instead of the heap.
+
+    Args:
+        data (np.ndarray): The (n, dim) matrix of stored codes.
+        scales (Optional[np.ndarray]): Per-row scales, required for int8 data.
+    """
+
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None):
+        if data.ndim != 2:
+            raise ValueError("Embedding matrix must be two-dimensional.")
+        if str(data.dtype) not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {data.dtype}")
+        if data.dtype == np.int8 and scales is None:
+            raise ValueError("int8 embeddings require per-row scales.")
+        self.data = data
+        self.scales = scales
+        self.recall_estimate: Optional[float] = None
+
+    @classmethod
+    def allocate(
+        cls,
+        rows: int,
+        dim: int,
+        dtype: str = "float32",
+        mmap_path: Optional[str] = None,
+    ) -> "EmbeddingStore":
+        """
+        Creates an empty store, on the heap or backed by a ``.npy`` file.
+
+        Args:
+            rows (int): Number of embeddings.
+            dim (int): Embedding dimensionality.
+            dtype (str): One of ``float32``, ``float16`` or ``int8``.
+            mmap_path (Optional[str]): File to memory-map the matrix into.
+
+        Returns:
+            EmbeddingStore: The store with zeroed rows.
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding dtype {dtype!r}; expected one of {SUPPORTED_DTYPES}."
+            )
+        if mmap_path:
+            data = np.lib.format.open_memmap(
+                mmap_path, mode="w+", dtype=dtype, shape=(rows, dim)
+            )
+        else:
+            data = np.zeros((rows, dim), dtype=dtype)
+        scales = np.ones(rows, dtype=np.float32) if dtype == "int8" else None
+        return cls(data, scales)
+
+    @classmethod
+    def open(cls, mmap_path: str) -> "EmbeddingStore":
+        """
+        Opens a store previously written with ``mmap_path`` read-only.
+        """
+        data = np.load(mmap_path, mmap_mode="r")
+        scales_path = _scales_path(mmap_path)
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        return cls(data, scales)
+
+    @classmethod
+    def from_vectors(
+        cls, vectors: Any, dtype: str = "float32", mmap_path: Optional[str] = None
+    ) -> "EmbeddingStore":
+        """
+        Builds a store from a list of vectors or an array.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if dtype == "float32" and not mmap_path:
+            return cls(np.ascontiguousarray(matrix))
+        store = cls.allocate(matrix.shape[0], matrix.shape[1], dtype, mmap_path)
+        store.set_rows(0, matrix)
+        store.flush(mmap_path)
+        return store
+
+    @classmethod
+    def from_model(
+        cls,
+        embedding_model: Any,
+        texts: Sequence[str],
+        dtype: str = "float32",
+        mmap_path: Optional[str] = None,
+        batch_size: int = 1000,
+        accuracy_sample: int = 2048,
+        k: int = 5,
+    ) -> "EmbeddingStore":
+        """
+        Embeds texts in batches, writing each batch straight into the matrix.
+
+        Only one batch of Python float lists exists at a time. For quantized
+        stores the recall@k of the quantized index against exact float32
+        search is estimated on the first ``accuracy_sample`` rows (half as
+        database, half as queries) and kept in ``recall_estimate``.
+
+        Args:
+            embedding_model: Model exposing ``embed_documents``.
+            texts (Sequence[str]): The texts to embed.
+            dtype (str): Storage dtype.
+            mmap_path (Optional[str]): File to memory-map the matrix into.
+            batch_size (int): Number of texts per ``embed_documents`` call.
+            accuracy_sample (int): Rows kept in float32 for the accuracy check.
+            k (int): Neighbours used by the accuracy check.
+
+        Returns:
+            EmbeddingStore: The populated store.
+        """
+        store = None
+        reference: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            batch = np.asarray(
+                call_with_retries(
+                    "embedding",
+                    embedding_model.embed_documents,
+                    list(texts[start : start + batch_size]),
+                ),
+                dtype=np.float32,
+            )
+            if store is None:
+                store = cls.allocate(len(texts), batch.shape[1], dtype, mmap_path)
+            store.set_rows(start, batch)
+            kept = sum(len(rows) for rows in reference)
+            if dtype != "float32" and kept < accuracy_sample:
+                reference.append(batch[: accuracy_sample - kept])
+        if store is None:
+            raise ValueError("No texts were provided to embed.")
+        store.flush(mmap_path)
+
+        if reference:
+            sample = np.concatenate(reference)
+            if len(sample) > 1:
+                database, queries = sample[::2], sample[1::2]
+                store.recall_estimate = quantization_recall(
+                    database, cls.from_vectors(database, dtype), queries, k
+                )
+                logger.info(
+                    "%s embeddings: recall@%d against float32 search is %.3f",
+                    dtype,
+                    k,
+                    store.recall_estimate,
+                )
+        return store
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.rows(index, index + 1)[0]
+
+    @property
+    def dim(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        return str(self.data.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def set_rows(self, start: int, vectors: np.ndarray) -> None:
+        """
+        Writes float32 vectors into rows ``start`` onwards, quantizing as needed.
+        """
+        stop = start + len(vectors)
+        if self.data.dtype == np.int8:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self.scales[start:stop] = scales
+            self.data[start:stop] = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            self.data[start:stop] = vectors
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Returns rows ``start:stop`` as float32, without copying float32 storage.
+        """
+        codes = self.data[start:stop]
+        if self.data.dtype == np.float32:
+            return codes
+        if self.data.dtype == np.int8:
+            return codes.astype(np.float32) * self.scales[start:stop, None]
+        return codes.astype(np.float32)
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Returns the rows at ``positions`` as float32.
+        """
+        codes = self.data[positions]
+        if self.data.dtype == np.int8:
+            return codes.astype(np.float32) * self.scales[positions, None]
+        return codes.astype(np.float32, copy=False)
+
+    def flush(self, mmap_path: Optional[str] = None) -> None:
+        """
+        Flushes a memory-mapped matrix and writes its int8 scales next to it.
+        """
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+        if mmap_path and self.scales is not None:
+            np.save(_scales_path(mmap_path), self.scales)
+
+    def build_index(self, chunk_size: int = 65536) -> "faiss.Index":
+        """
+        Builds an L2 FAISS index matching the storage precision.
+
+        float32 stores get an exact flat index; float16 and int8 stores get a
+        scalar-quantizer index of the same width, filled in chunks so no full
+        float32 copy of a quantized matrix is made. The quantizer is trained
+        on up to ``chunk_size`` rows sampled across the whole matrix, so its
+        value ranges cover rows added late as well as early ones.
+
+        Args:
+            chunk_size (int): Rows dequantized at a time, and the training sample size.
+
+        Returns:
+            faiss.Index: The populated index.
+        """
+        import faiss
+
+        if self.data.dtype == np.float32:
+            index = faiss.IndexFlatL2(self.dim)
+        else:
+            quantizer = (
+                faiss.ScalarQuantizer.QT_fp16
+                if self.data.dtype == np.float16
+                else faiss.ScalarQuantizer.QT_8bit
+            )
+            index = faiss.IndexScalarQuantizer(self.dim, quantizer, faiss.METRIC_L2)
+            sample = np.arange(len(self))
+            if len(self) > chunk_size:
+                rng = np.random.default_rng(0)
+                sample = np.sort(rng.choice(len(self), chunk_size, replace=False))
+            index.train(np.ascontiguousarray(self.take(sample)))
+        for start in range(0, len(self), chunk_size):
+            index.add(np.ascontiguousarray(self.rows(start, start + chunk_size)))
+        return index
+
+
+def _scales_path(mmap_path: str) -> str:
+    return f"{os.path.splitext(mmap_path)[0]}.scales.npy"
+
+
+def as_embedding_store(document_embeddings: Any) -> EmbeddingStore:
+    """
+    Wraps embeddings from the state in an EmbeddingStore if they are not one already.
+    """
+    if isinstance(document_embeddings, EmbeddingStore):
+        return document_embeddings
+    return EmbeddingStore.from_vectors(document_embeddings)
+
+
+def quantization_recall(
+    reference: np.ndarray, store: EmbeddingStore, queries: np.ndarray, k: int = 5
+) -> float:
+    """
+    Measures recall@k of a store's index against exact float32 search.
+
+    Args:
+        reference (np.ndarray): The float32 vectors the store was built from.
+        store (EmbeddingStore): The (possibly quantized) store to evaluate.
+        queries (np.ndarray): Query vectors.
+        k (int): Number of neighbours compared per query.
+
+    Returns:
+        float: The fraction of exact neighbours also returned by the store's index.
+    """
+    import faiss
+
+    k = min(k, len(reference))
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    exact = faiss.IndexFlatL2(reference.shape[1])
+    exact.add(np.ascontiguousarray(reference, dtype=np.float32))
+    _, expected = exact.search(queries, k)
+    _, found = store.build_index().search(queries, k)
+    hits = sum(len(set(e) & set(f)) for e, f in zip(expected.tolist(), found.tolist()))
+    return hits / (len(queries) * k)
@@ -1,9 +1,25 @@
-from langchain_core.prompts import PromptTemplate
 from .state_config import QAState
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Tuple
+import json
+import logging
+import re
 import uuid
 import random
-from .evolution_techniques import evolution_techniques
+from .corpus_index import page_hash
+from .evolution_techniques import get_evolution_instruction
+from .instrumentation import current_metrics, instrument_node, invoke_model
+from .json_output import loads_lenient, parse_json_output
+from .model_router import ModelRouter
+from .prefilter import rule_check
+from .records import EvolvedQuestion, RecordStore
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+_JSON_OBJECT = re.compile(r"\{[^{}]*\}")
+_QUESTION_FIELD = re.compile(r'"question"\s*:\s*"((?:[^"\\]|\\.)+)"')
 
 
 def apply_evolution(
@@ -11,19 +27,24 @@ def apply_evolution(
     context: str,
     instruction: str,
     examples: List[Dict],
-    prompt_template: PromptTemplate,
+    prompt_template: "PromptTemplate",
     model,
+    technique: Optional[str] = None,
 ) -> str:
     """
     Applies an evolution technique to generate a question using a language model.
 
+    If ``model`` is a ModelRouter, generation starts on the technique's tier and
+    escalates while the output fails the prefilter's rule checks.
+
     Args:
         question (str): The original question or a prompt to generate a question.
         context (str): The context for the question.
         instruction (str): The instruction for evolving the question.
         examples (List[Dict]): A list of example evolutions.
         prompt_template (PromptTemplate): The prompt template for evolution.
-        model: The language model to use.
+        model: The language model or ModelRouter to use.
+        technique (Optional[str]): The evolution technique, used for routing.
 
     Returns:
         str: The evolved question.
@@ -34,10 +55,49 @@ def apply_evolution(
             question if question else "Generate a question about the following context:"
         )
     prompt = prompt_template.format(**input_dict)
-    result = model.invoke(prompt)
+    if isinstance(model, ModelRouter):
+        result, _ = model.run(
+            prompt,
+            "evolution",
+            lambda r: rule_check(_content(r), technique or "") is None,
+            technique=technique,
+        )
+    else:
+        result = invoke_model(model, prompt, "evolution")
+    return _content(result)
+
+
+def _content(result) -> str:
     return result.content.strip() if hasattr(result, "content") else str(result).strip()
 
 
+def create_evolved_question(
+    question_id: str,
+    evolution_type: str,
+    evolved_question: str,
+    source_id: Optional[str] = None,
+) -> EvolvedQuestion:
+    """
+    Creates a record representing an evolved question.
+
+    Args:
+        question_id (str): The ID of the original question.
+        evolution_type (str): The type of evolution applied.
+        evolved_question (str): The evolved question.
+        source_id (Optional[str]): The page hash of the context the question was generated from.
+
+    Returns:
+        EvolvedQuestion: The evolved question record.
+    """
+    return EvolvedQuestion(
+        id=f"{question_id}_{evolution_type}_{uuid.uuid4().hex[:8]}",
+        original_question_id=question_id,
+        evolved_question=evolved_question,
+        evolution_type=evolution_type,
+        source_id=source_id,
+    )
+
+
 def create_evolved_question_dict(
     question_id: str, evolution_type: str, evolved_question: str
 ) -> Dict[str, str]:
@@ -52,22 +112,243 @@ def create_evolved_question_dict(
     Returns:
         Dict[str, str]: A dictionary containing the evolved question information.
     """
-    return {
-        "id": f"{question_id}_{evolution_type}_{uuid.uuid4().hex[:8]}",
-        "original_question_id": question_id,
-        "evolved_question": evolved_question,
-        "evolution_type": evolution_type,
-    }
+    return create_evolved_question(
+        question_id, evolution_type, evolved_question
+    ).to_dict()
+
+
+def create_batch_evolution_prompt() -> "PromptTemplate":
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        input_variables=["context", "requests"],
+        template="""
+        Write the questions requested below about the context. Follow each request's instruction; the example shows the expected style.
+        Return a JSON array with one object per requested question, in the order requested, and nothing else.
+        Each object must have a "technique" key with the request's technique name and a "question" key with the question text only, with no labels or comments.
+
+        Requests:
+        {requests}
+
+        Context: {context}
+
+        JSON:
+        """,
+    )
+
+
+def format_batch_requests(techniques: List[str]) -> str:
+    """
+    Formats one numbered request per question for the batch evolution prompt.
+
+    Args:
+        techniques (List[str]): The technique of each requested question, repeats allowed.
+
+    Returns:
+        str: The request list.
+    """
+    lines = []
+    for number, name in enumerate(techniques, 1):
+        instruction, examples = get_evolution_instruction(name)
+        example = f" Example: {examples[0]['output']}" if examples else ""
+        lines.append(f"{number}. {name}: {instruction}{example}")
+    return "\n".join(lines)
+
+
+def _question_field(text: str) -> List[Any]:
+    match = _QUESTION_FIELD.search(text)
+    if not match:
+        return []
+    try:
+        return [{"question": loads_lenient(f'"{match.group(1)}"')}]
+    except json.JSONDecodeError:
+        return []
+
+
+def _salvage_batch_items(text: str) -> List[Any]:
+    # Recover what we can from a malformed array: complete objects first,
+    # then bare "question" fields from objects that were cut off.
+    items = []
+    for match in _JSON_OBJECT.finditer(text):
+        try:
+            items.append(loads_lenient(match.group()))
+        except json.JSONDecodeError:
+            items.extend(_question_field(match.group()))
+    items.extend(_question_field(text[text.rfind("}") + 1 :]))
+    return items
+
+
+def parse_batch_questions(text: str, techniques: List[str]) -> List[Tuple[str, str]]:
+    """
+    Parses the JSON array returned for a batch evolution prompt.
+
+    If the array is malformed, its complete items are still recovered. An item without a recognised technique is attributed to the
+    technique requested at its position.
+
+    Args:
+        text (str): The model output.
+        techniques (List[str]): The technique of each requested question.
+
+    Returns:
+        List[Tuple[str, str]]: (technique, question) pairs, at most one per request.
+    """
+    # Parse strictly: lenient partial parsing would close a cut-off string
+    # and keep a truncated question.
+    try:
+        items = parse_json_output(text)
+        if isinstance(items, dict):
+            items = items.get("questions", [items])
+        if not isinstance(items, list):
+            raise ValueError(f"Expected a JSON array, got {type(items).__name__}")
+    except ValueError as e:
+        logger.debug("Salvaging malformed batch output: %s", e)
+        items = _salvage_batch_items(text)
+
+    wanted: Dict[str, int] = {}
+    for name in techniques:
+        wanted[name] = wanted.get(name, 0) + 1
+    questions = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        question = item.get("question")
+        if not isinstance(question, str) or not question.strip():
+            continue
+        name = item.get("technique")
+        if name not in wanted and position < len(techniques):
+            name = techniques[position]
+        if wanted.get(name, 0) > 0:
+            wanted[name] -= 1
+            questions.append((name, question.strip()))
+    return questions
+
+
+def apply_batch_evolution(
+    context: str,
+    techniques: List[str],
+    prompt_template: "PromptTemplate",
+    model,
+) -> List[Tuple[str, str]]:
+    """
+    Generates several evolved questions about one context in a single model call.
+
+    If ``model`` is a ModelRouter, the call escalates while fewer than half of
+    the requested questions come back parseable and passing the prefilter's
+    rule checks.
+
+    Args:
+        context (str): The context for the questions.
+        techniques (List[str]): The technique of each requested question, repeats allowed.
+        prompt_template (PromptTemplate): The batch evolution prompt.
+        model: The language model or ModelRouter to use.
+
+    Returns:
+        List[Tuple[str, str]]: (technique, question) pairs for the valid items returned.
+    """
+    prompt = prompt_template.format(
+        context=context, requests=format_batch_requests(techniques)
+    )
+
+    def parse(result) -> List[Tuple[str, str]]:
+        text = result.content if hasattr(result, "content") else str(result)
+        return parse_batch_questions(text, techniques)
+
+    if isinstance(model, ModelRouter):
+        result, _ = model.run(
+            prompt,
+            "evolution",
+            lambda r: 2
+            * sum(rule_check(question, name) is None for name, question in parse(r))
+            >= len(techniques),
+        )
+    else:
+        result = invoke_model(model, prompt, "evolution")
+    questions = parse(result)
+
+    dropped = len(techniques) - len(questions)
+    metrics = current_metrics()
+    if dropped and metrics is not None:
+        metrics.increment("batch_items_dropped", "evolution", dropped)
+    return questions
+
+
+def generate_evolved_questions_batched(
+    documents: List[Dict],
+    evolution_techniques: List[Tuple[str, "PromptTemplate", float]],
+    model,
+    max_evolved_questions: int = 10,
+    max_evolutions_per_technique: int = 5,
+    questions_per_call: int = 5,
+    max_failed_calls: int = 3,
+) -> RecordStore[EvolvedQuestion]:
+    """
+    Generates the same questions as generate_evolved_questions, several per model call.
+
+    Each call covers up to ``questions_per_call`` of the outstanding questions,
+    possibly of several techniques, over one randomly chosen page. Questions
+    missing from a call's output, or failing the prefilter's rule checks, are
+    requested again in later calls.
+
+    Args:
+        documents (List[Dict]): Pages to generate questions from.
+        evolution_techniques (List[Tuple[str, PromptTemplate, float]]): List of evolution techniques.
+        model: The language model to use.
+        max_evolved_questions (int): Maximum number of total evolved questions to generate.
+        max_evolutions_per_technique (int): Maximum number of evolutions per technique.
+        questions_per_call (int): Maximum questions requested per model call.
+        max_failed_calls (int): Consecutive calls returning no valid item before giving up.
+
+    Returns:
+        RecordStore[EvolvedQuestion]: The evolved questions.
+    """
+    pending = [
+        name
+        for name, _, _ in evolution_techniques
+        for _ in range(max_evolutions_per_technique)
+    ][:max_evolved_questions]
+    prompt_template = create_batch_evolution_prompt()
+    evolved_questions = RecordStore(EvolvedQuestion)
+    failed_calls = 0
+    while pending and failed_calls < max_failed_calls:
+        requested = pending[:questions_per_call]
+        document = random.choice(documents)
+        questions = apply_batch_evolution(
+            document.page_content, requested, prompt_template, model
+        )
+        valid = [
+            (name, question)
+            for name, question in questions
+            if rule_check(question, name) is None
+        ]
+        metrics = current_metrics()
+        if len(valid) < len(questions) and metrics is not None:
+            metrics.increment(
+                "batch_items_rejected", "evolution", len(questions) - len(valid)
+            )
+        failed_calls = 0 if valid else failed_calls + 1
+        source_id = page_hash(document.page_content)
+        for name, question in valid:
+            pending.remove(name)
+            evolved_questions.add(
+                create_evolved_question(str(uuid.uuid4()), name, question, source_id)
+            )
+    if pending:
+        logger.warning(
+            "Gave up on %d questions after %d calls without a valid item",
+            len(pending),
+            max_failed_calls,
+        )
+    return evolved_questions
 
 
 def generate_evolved_questions(
     documents: List[Dict],
-    evolution_techniques: List[Tuple[str, PromptTemplate, float]],
+    evolution_techniques: List[Tuple[str, "PromptTemplate", float]],
     model,
     max_evolved_questions: int = 10,
     max_evolutions_per_technique: int = 5,
-) -> List[Dict]:
-    evolved_questions = []
+) -> RecordStore[EvolvedQuestion]:
+    evolved_questions = RecordStore(EvolvedQuestion)
 
     for technique in evolution_techniques:
         name, prompt_template, _ = technique
@@ -84,12 +365,13 @@ def generate_evolved_questions(
                 prompt_template.input_variables,
                 prompt_template,
                 model,
+                technique=name,
             )
 
             if evolved_question:
-                evolved_questions.append(
-                    create_evolved_question_dict(
-                        str(uuid.uuid4()), name, evolved_question
+                evolved_questions.add(
+                    create_evolved_question(
+                        str(uuid.uuid4()), name, evolved_question, page_hash(context)
                     )
                 )
                 evolutions += 1
@@ -100,12 +382,14 @@ def generate_evolved_questions(
     return evolved_questions
 
 
+@instrument_node("evolution_agent")
 def evolution_agent(
     state: QAState,
     model,
-    evolution_techniques: List[Tuple[str, PromptTemplate, float]],
+    evolution_techniques: List[Tuple[str, "PromptTemplate", float]],
     max_evolved_questions: int = 10,
     max_evolutions_per_question: int = 5,
+    questions_per_call: int = 1,
 ) -> QAState:
     """
     Generates evolved questions using various techniques without initial questions.
@@ -116,6 +400,8 @@ def evolution_agent(
         evolution_techniques (List[Tuple[str, PromptTemplate, float]]): List of evolution techniques.
         max_evolved_questions (int): Maximum number of total evolved questions to generate.
         max_evolutions_per_question (int): Maximum number of evolutions to generate per technique.
+        questions_per_call (int): Questions requested per model call; above 1, each call
+            returns a JSON array of questions about one page.
 
     Returns:
         QAState: The updated state with evolved questions.
@@ -124,13 +410,23 @@ def evolution_agent(
     if not documents:
         raise ValueError("No documents found in the state to generate questions from.")
 
-    evolved_questions = generate_evolved_questions(
-        documents,
-        evolution_techniques,
-        model,
-        max_evolved_questions,
-        max_evolutions_per_question,
-    )
+    if questions_per_call > 1:
+        evolved_questions = generate_evolved_questions_batched(
+            documents,
+            evolution_techniques,
+            model,
+            max_evolved_questions,
+            max_evolutions_per_question,
+            questions_per_call,
+        )
+    else:
+        evolved_questions = generate_evolved_questions(
+            documents,
+            evolution_techniques,
+            model,
+            max_evolved_questions,
+            max_evolutions_per_question,
+        )
 
     state["evolved_questions"] = evolved_questions
     return state
@@ -1,10 +1,16 @@
-from langchain_core.prompts import PromptTemplate
-from typing import List, Dict
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Callable, List, Dict, Tuple
+import logging
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
 
 
 def create_evolution_prompt(
     name: str, instruction: str, examples: List[Dict], is_initial: bool = False
-) -> PromptTemplate:
+) -> "PromptTemplate":
     """
     Creates a PromptTemplate for evolving questions.
 
@@ -17,6 +23,8 @@ def create_evolution_prompt(
     Returns:
         PromptTemplate: The created prompt template.
     """
+    from langchain_core.prompts import PromptTemplate
+
     if is_initial:
         template = PromptTemplate(
             input_variables=["context", "instruction", "examples"],
@@ -32,8 +40,8 @@ def create_evolution_prompt(
             Generated Question:
             """,
         )
-        print(f"Created PromptTemplate for {name}: {template}")
-        print(f"Input variables: {template.input_variables}")
+        logger.debug("Created PromptTemplate for %s: %s", name, template)
+        logger.debug("Input variables: %s", template.input_variables)
         return template
     else:
         return PromptTemplate(
@@ -53,10 +61,13 @@ def create_evolution_prompt(
         )
 
 
-evolution_techniques = [
+# Techniques are stored as prompt factories so that importing this module does
+# not build every PromptTemplate; see get_evolution_techniques().
+_technique_factories: List[Tuple[str, Callable[[], "PromptTemplate"]]] = [
     (
         "simple_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "simple_question",
             "Generate a simple, straightforward question based on the given context. The question should be easy to answer and focus on a single piece of information.",
             [
@@ -78,7 +89,8 @@ evolution_techniques = [
     ),
     (
         "reasoning_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "reasoning_question",
             "Complicate the given question by rewriting it into a multi-hop reasoning question based on the provided context.",
             [
@@ -107,7 +119,8 @@ evolution_techniques = [
     ),
     (
         "multi_context_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "multi_context_question",
             "Rewrite and complicate the given question in a way that answering it requires information derived from multiple contexts.",
             [
@@ -136,7 +149,8 @@ evolution_techniques = [
     ),
     (
         "conversational_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "conversational_question",
             "Reformat the provided question into a series of follow-up questions for a conversational flow.",
             [
@@ -161,7 +175,8 @@ evolution_techniques = [
     ),
     (
         "contextual_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "contextual_question",
             "Modify the question to explore different contexts, incorporating information from related documents.",
             [
@@ -190,7 +205,8 @@ evolution_techniques = [
     ),
     (
         "counterfactual_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "counterfactual_question",
             "Create a counterfactual version of the question that challenges the original assumptions.",
             [
@@ -219,7 +235,8 @@ evolution_techniques = [
     ),
     (
         "temporal_reasoning_question",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "temporal_reasoning_question",
             "Reframe the question to involve temporal reasoning or historical context.",
             [
@@ -248,7 +265,8 @@ evolution_techniques = [
     ),
     (
         "multi_step_logical_deduction",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "multi_step_logical_deduction",
             "Create a question that requires multiple logical steps to arrive at the answer, building upon the given context.",
             [
@@ -267,7 +285,8 @@ evolution_techniques = [
     ),
     (
         "hypothetical_scenario_generation",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "hypothetical_scenario_generation",
             "Create a speculative scenario based on the original question to encourage out-of-the-box reasoning.",
             [
@@ -286,7 +305,8 @@ evolution_techniques = [
     ),
     (
         "mathematical_quantitative_reasoning",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "mathematical_quantitative_reasoning",
             "Formulate a question that requires mathematical computations and reasoning steps based on the given context.",
             [
@@ -305,7 +325,8 @@ evolution_techniques = [
     ),
     (
         "causal_chain_expansion",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "causal_chain_expansion",
             "Develop a question that explores multiple layers of cause-and-effect relationships based on the original question and context.",
             [
@@ -324,7 +345,8 @@ evolution_techniques = [
     ),
     (
         "analogical_reasoning",
-        create_evolution_prompt(
+        partial(
+            create_evolution_prompt,
             "analogical_reasoning",
             "Create a question that requires drawing analogies between different concepts related to the original question.",
             [
@@ -342,3 +364,65 @@ evolution_techniques = [
         ),
     ),
 ]
+
+
+def evolution_technique_names() -> List[str]:
+    """
+    Returns the names of all evolution techniques without building their prompts.
+    """
+    return [name for name, _ in _technique_factories]
+
+
+@lru_cache(maxsize=None)
+def get_evolution_technique(name: str) -> Tuple[str, "PromptTemplate"]:
+    """
+    Builds, on first use, the prompt template of a single evolution technique.
+
+    Args:
+        name (str): The name of the evolution technique.
+
+    Returns:
+        Tuple[str, PromptTemplate]: The technique name and its prompt template.
+
+    Raises:
+        KeyError: If no technique has that name.
+    """
+    for technique_name, factory in _technique_factories:
+        if technique_name == name:
+            return technique_name, factory()
+    raise KeyError(f"Unknown evolution technique: {name}")
+
+
+def get_evolution_instruction(name: str) -> Tuple[str, List[Dict]]:
+    """
+    Returns the instruction and examples of an evolution technique.
+
+    Args:
+        name (str): The name of the evolution technique.
+
+    Returns:
+        Tuple[str, List[Dict]]: The technique's instruction and example evolutions.
+
+    Raises:
+        KeyError: If no technique has that name.
+    """
+    for technique_name, factory in _technique_factories:
+        if technique_name == name:
+            _, instruction, examples = factory.args
+            return instruction, examples
+    raise KeyError(f"Unknown evolution technique: {name}")
+
+
+def get_evolution_techniques() -> List[Tuple[str, "PromptTemplate"]]:
+    """
+    Returns every evolution technique with its prompt template, building them on first use.
+    """
+    return [get_evolution_technique(name) for name in evolution_technique_names()]
+
+
+def __getattr__(name: str):
+    # Keeps `from .evolution_techniques import evolution_techniques` working
+    # while deferring prompt construction until the attribute is requested.
+    if name == "evolution_techniques":
+        return get_evolution_techniques()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,13 @@
 from typing import List, Dict, Optional, Any
 from .state_config import QAState
+from .instrumentation import instrument_node
+from .records import Answer, ExportRecord, QuestionContext, RecordStore, as_record_store
+import logging
 
+logger = logging.getLogger(__name__)
 
+
+@instrument_node("export")
 def export_agent(state: QAState) -> QAState:
     """
     Exports the final output including questions, evolutions, answers, and contexts.
@@ -14,16 +20,19 @@ def export_agent(state: QAState) -> QAState:
                          answers, and contexts.
 
     Returns:
-        QAState: The updated state with the final_output field added, containing the consolidated data.
+        QAState: The updated state with the final_output field added, a list of dicts
+                 with the ExportRecord fields.
 
     Raises:
         KeyError: If required fields are missing from the state.
     """
     evolved_questions: List[Dict[str, Any]] = state.get("evolved_questions", [])
-    answers: List[Dict[str, Any]] = state.get("answers", [])
-    contexts: List[Dict[str, Any]] = state.get("contexts", [])
+    answers: RecordStore[Answer] = as_record_store(state.get("answers"), Answer)
+    contexts: RecordStore[QuestionContext] = as_record_store(
+        state.get("contexts"), QuestionContext
+    )
 
-    final_output: List[Dict[str, Any]] = []
+    final_output: RecordStore[ExportRecord] = RecordStore(ExportRecord)
 
     def find_answer_and_context(question_id: str) -> Dict[str, Optional[Any]]:
         """
@@ -35,33 +44,38 @@ def export_agent(state: QAState) -> QAState:
         Returns:
             Dict[str, Optional[Any]]: A dictionary containing the answer and context, if found.
         """
-        answer = next((a for a in answers if a["id"] == question_id), None)
-        context = next((c for c in contexts if c["id"] == question_id), None)
+        answer = answers.get(question_id)
+        context = contexts.get(question_id)
         return {
-            "answer": answer["answer"] if answer else None,
-            "context": context["contexts"] if context else None,
+            "answer": answer.answer if answer else None,
+            "context": context.contexts if context else None,
+            "context_ids": context.context_ids if context else None,
         }
 
     for eq in evolved_questions:
         answer_context = find_answer_and_context(eq["id"])
-        final_output.append(
-            {
-                "id": eq["id"],
-                "evolution_type": eq["evolution_type"],
-                "answer": answer_context["answer"],
-                "contexts": answer_context["context"],
-                "evolved_question": eq["evolved_question"],
-            }
+        final_output.add(
+            ExportRecord(
+                id=eq["id"],
+                evolution_type=eq["evolution_type"],
+                answer=answer_context["answer"],
+                contexts=answer_context["context"],
+                evolved_question=eq["evolved_question"],
+                source_id=eq.get("source_id"),
+                context_ids=answer_context["context_ids"],
+            )
         )
 
-    # Debug: Print final output summary
-    print(f"Final Output Generated: {len(final_output)} entries")
-    for entry in final_output:
-        print(
-            f"ID: {entry['id']}, Type: {entry['evolution_type']}, "
-            f"Answer: {'Present' if entry['answer'] else 'Missing'}, "
-            f"Contexts: {'Present' if entry['contexts'] else 'Missing'}"
-        )
+    logger.info("Final Output Generated: %d entries", len(final_output))
+    if logger.isEnabledFor(logging.DEBUG):
+        for entry in final_output:
+            logger.debug(
+                "ID: %s, Type: %s, Answer: %s, Contexts: %s",
+                entry.id,
+                entry.evolution_type,
+                "Present" if entry.answer else "Missing",
+                "Present" if entry.contexts else "Missing",
+            )
 
-    state["final_output"] = final_output
+    state["final_output"] = final_output.to_dicts()
     return state
@@ -0,0 +1,101 @@
+from typing import Any, Optional
+from .state_config import QAState
+from .document_loader import load_documents_and_generate_embeddings
+from .question_generator import question_generation_pipeline
+from .context_gathering import context_gathering
+from .answer_generator import answer_generator
+from .export_agent import export_agent
+from .incremental import incremental_update
+
+
+def build_qa_graph():
+    """
+    Builds and compiles the question generation and answering graph.
+
+    The graph runs load_documents -> question_generation -> context_gathering
+    -> answer_generation -> export over a QAState.
+
+    Returns:
+        CompiledStateGraph: The compiled LangGraph.
+    """
+    from langgraph.graph import StateGraph, END
+
+    graph = StateGraph(state_schema=QAState)
+    graph.add_node("load_documents", load_documents_and_generate_embeddings)
+    graph.add_node("question_generation", question_generation_pipeline)
+    graph.add_node("context_gathering", context_gathering)
+    graph.add_node("answer_generation", answer_generator)
+    graph.add_node("export", export_agent)
+
+    graph.set_entry_point("load_documents")
+    graph.add_edge("load_documents", "question_generation")
+    graph.add_edge("question_generation", "context_gathering")
+    graph.add_edge("context_gathering", "answer_generation")
+    graph.add_edge("answer_generation", "export")
+    graph.add_edge("export", END)
+    return graph.compile()
+
+
+def build_incremental_qa_graph():
+    """
+    Builds and compiles the graph for incremental runs over ``state["corpus_dir"]``.
+
+    The graph runs load_documents -> incremental_update, re-embedding only
+    changed pages and regenerating only the outputs they affect.
+
+    Returns:
+        CompiledStateGraph: The compiled LangGraph.
+    """
+    from langgraph.graph import StateGraph, END
+
+    graph = StateGraph(state_schema=QAState)
+    graph.add_node("load_documents", load_documents_and_generate_embeddings)
+    graph.add_node("incremental_update", incremental_update)
+
+    graph.set_entry_point("load_documents")
+    graph.add_edge("load_documents", "incremental_update")
+    graph.add_edge("incremental_update", END)
+    return graph.compile()
+
+
+def initialize_state(
+    pdf_path: str,
+    embedding_model: Any,
+    model: Any,
+    critic_model: Any,
+    max_evolved_questions: Optional[int] = None,
+    max_evolutions_per_technique: Optional[int] = None,
+    **options: Any,
+) -> QAState:
+    """
+    Creates the initial state for one run of the graph.
+
+    Args:
+        pdf_path (str): Path or URL of the PDF to process.
+        embedding_model: The embedding model.
+        model: The generator language model.
+        critic_model: The critic language model.
+        max_evolved_questions (Optional[int]): Maximum number of evolved questions.
+        max_evolutions_per_technique (Optional[int]): Maximum evolutions per technique.
+        **options: Any other QAState fields, such as metrics or embedding_dtype.
+
+    Returns:
+        QAState: The initial state.
+    """
+    state: QAState = {
+        "pdf_path": pdf_path,
+        "embedding_model": embedding_model,
+        "model": model,
+        "critic_model": critic_model,
+        "documents": None,
+        "document_embeddings": None,
+        "questions": None,
+        "evolved_questions": None,
+        "answers": None,
+        "contexts": None,
+        "final_output": None,
+        "max_evolved_questions": max_evolved_questions,
+        "max_evolutions_per_technique": max_evolutions_per_technique,
+    }
+    state.update(options)
+    return state
@@ -0,0 +1,300 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .answer_generator import answer_generator
+from .context_gathering import DEFAULT_K, context_gathering
+from .corpus_index import CorpusDiff, page_faiss_id, page_hash
+from .export_agent import export_agent
+from .instrumentation import current_metrics, instrument_node
+from .question_generator import question_generation_pipeline
+from .records import EvolvedQuestion, ExportRecord, RecordStore, as_record_store
+from .state_config import QAState
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS = "outputs.json"
+QUERY_VECTORS = "query_vectors.npz"
+
+
+def load_outputs(corpus_dir: str) -> Optional[RecordStore[ExportRecord]]:
+    """
+    Loads the export records saved by the previous run, or None if there are none.
+    """
+    path = os.path.join(corpus_dir, OUTPUTS)
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return RecordStore(
+            ExportRecord, (ExportRecord.from_dict(item) for item in json.load(handle))
+        )
+
+
+def save_outputs(corpus_dir: str, records: RecordStore[ExportRecord]) -> None:
+    os.makedirs(corpus_dir, exist_ok=True)
+    path = os.path.join(corpus_dir, OUTPUTS)
+    with open(f"{path}.tmp", "w") as handle:
+        json.dump(records.to_dicts(), handle)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_query_vectors(corpus_dir: str) -> Dict[str, np.ndarray]:
+    """
+    Loads the question embeddings saved with the outputs, by record id.
+    """
+    path = os.path.join(corpus_dir, QUERY_VECTORS)
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return dict(zip(data["ids"].tolist(), data["vectors"]))
+
+
+def save_query_vectors(corpus_dir: str, vectors: Dict[str, Any]) -> None:
+    os.makedirs(corpus_dir, exist_ok=True)
+    path = os.path.join(corpus_dir, QUERY_VECTORS)
+    ids = list(vectors)
+    matrix = np.asarray([vectors[i] for i in ids], dtype=np.float32)
+    with open(f"{path}.tmp", "wb") as handle:
+        np.savez(handle, ids=np.array(ids, dtype=str), vectors=matrix)
+    os.replace(f"{path}.tmp", path)
+
+
+def classify_records(
+    records: RecordStore[ExportRecord], diff: CorpusDiff
+) -> Tuple[List[ExportRecord], List[ExportRecord], List[ExportRecord]]:
+    """
+    Splits previous outputs by what a corpus change did to them.
+
+    Args:
+        records (RecordStore[ExportRecord]): The previous outputs.
+        diff (CorpusDiff): The corpus change.
+
+    Returns:
+        Tuple[List[ExportRecord], List[ExportRecord], List[ExportRecord]]: Records whose
+        source page is gone (the question must go), records that used a page that is
+        gone (the answer must be regenerated), and the rest.
+    """
+    removed = set(diff.removed)
+    dropped, stale, kept = [], [], []
+    for record in records:
+        if record.source_id in removed:
+            dropped.append(record)
+        elif any(context_id in removed for context_id in record.context_ids or ()):
+            stale.append(record)
+        else:
+            kept.append(record)
+    return dropped, stale, kept
+
+
+def _as_evolved_question(record: ExportRecord) -> EvolvedQuestion:
+    return EvolvedQuestion(
+        id=record.id,
+        original_question_id="",
+        evolved_question=record.evolved_question,
+        evolution_type=record.evolution_type,
+        source_id=record.source_id,
+    )
+
+
+def find_outranked(
+    records: List[ExportRecord],
+    query_vectors: Dict[str, Any],
+    index: Any,
+    added: List[str],
+    k: int = DEFAULT_K,
+) -> List[ExportRecord]:
+    """
+    Finds the records whose retrieved contexts an added page would now enter.
+
+    A page enters a question's top ``k`` if it is closer to the question than
+    the farthest of its current contexts, so only the added pages are
+    searched, against the saved question embeddings.
+
+    Args:
+        records (List[ExportRecord]): Records with context_ids and a saved query vector.
+        query_vectors (Dict[str, Any]): Question embeddings by record id.
+        index (faiss.Index): The corpus index, with page_faiss_id ids.
+        added (List[str]): Hashes of the added pages.
+        k (int): The number of contexts retrieved per question.
+
+    Returns:
+        List[ExportRecord]: The records whose contexts would change.
+    """
+    import faiss
+
+    if not records or not added:
+        return []
+    added_vectors = index.reconstruct_batch(
+        np.array([page_faiss_id(h) for h in added], dtype=np.int64)
+    )
+    added_index = faiss.IndexFlatL2(added_vectors.shape[1])
+    added_index.add(added_vectors)
+    queries = np.asarray([query_vectors[r.id] for r in records], dtype=np.float32)
+    nearest, _ = added_index.search(queries, 1)
+
+    outranked = []
+    for record, query, distance in zip(records, queries, nearest[:, 0]):
+        if len(record.context_ids) < k:
+            outranked.append(record)
+            continue
+        contexts = index.reconstruct_batch(
+            np.array([page_faiss_id(h) for h in record.context_ids], dtype=np.int64)
+        )
+        if distance <= ((contexts - query) ** 2).sum(axis=1).max():
+            outranked.append(record)
+    return outranked
+
+
+def _commit(
+    state: QAState,
+    final_output: RecordStore[ExportRecord],
+    query_vectors: Dict[str, Any],
+) -> None:
+    """
+    Saves the outputs and their question embeddings, then the corpus they were derived from.
+
+    Until the corpus is saved, the next run diffs against the previous one and
+    redoes the work of a run that failed before its outputs were saved.
+    """
+    save_outputs(state["corpus_dir"], final_output)
+    save_query_vectors(
+        state["corpus_dir"],
+        {r.id: query_vectors[r.id] for r in final_output if r.id in query_vectors},
+    )
+    corpus = state.get("incremental_corpus")
+    if corpus is not None and state["corpus_diff"].changed:
+        corpus.save()
+
+
+@instrument_node("incremental_update")
+def incremental_update(state: QAState) -> QAState:
+    """
+    Brings the outputs saved in ``corpus_dir`` up to date with a changed corpus.
+
+    Questions generated from a page that is gone are dropped. Answers that used
+    a page that is gone are regenerated. When pages were added, the remaining
+    questions' saved embeddings are compared against the added pages only,
+    and answers whose contexts would change are regenerated; new questions are generated from the added pages only, in
+    proportion to their share of the corpus and at least replacing the dropped
+    ones. Without saved outputs, the full pipeline runs.
+
+    Args:
+        state (QAState): The state after load_documents_and_generate_embeddings with corpus_dir set.
+
+    Returns:
+        QAState: The updated state with the merged final_output.
+    """
+    corpus_dir = state.get("corpus_dir")
+    diff = state.get("corpus_diff")
+    if not corpus_dir or diff is None:
+        raise ValueError("incremental_update requires corpus_dir and corpus_diff.")
+    previous = load_outputs(corpus_dir)
+
+    if previous is None:
+        state["query_vectors"] = {}
+        for node in (
+            question_generation_pipeline,
+            context_gathering,
+            answer_generator,
+            export_agent,
+        ):
+            state = node(state)
+        _commit(
+            state,
+            as_record_store(state["final_output"], ExportRecord),
+            state["query_vectors"],
+        )
+        return state
+
+    query_vectors = load_query_vectors(corpus_dir)
+    dropped, stale, kept = classify_records(previous, diff)
+    if diff.added and kept:
+        # New pages may outrank the contexts of unaffected questions.
+        saved = [r for r in kept if r.context_ids and r.id in query_vectors]
+        outranked = {
+            r.id
+            for r in find_outranked(
+                saved, query_vectors, state["document_index"], diff.added
+            )
+        }
+        unsaved = [r for r in kept if not (r.context_ids and r.id in query_vectors)]
+        if unsaved:
+            # Outputs saved without embeddings: rerun retrieval for them.
+            check = context_gathering(
+                {
+                    **state,
+                    "evolved_questions": [_as_evolved_question(r) for r in unsaved],
+                    "query_vectors": query_vectors,
+                }
+            )
+            for record in unsaved:
+                context = check["contexts"].get(record.id)
+                if context is None or context.context_ids != record.context_ids:
+                    outranked.add(record.id)
+        stale.extend(r for r in kept if r.id in outranked)
+        kept = [r for r in kept if r.id not in outranked]
+
+    new_questions = RecordStore(EvolvedQuestion)
+    if diff.added:
+        added = set(diff.added)
+        added_documents = [
+            document
+            for document in state["documents"]
+            if page_hash(document.page_content) in added
+        ]
+        pages = len(diff.added) + len(diff.unchanged)
+        count = max(len(dropped), math.ceil(len(previous) * len(diff.added) / pages))
+        generated = question_generation_pipeline(
+            {
+                **state,
+                "documents": added_documents,
+                "max_evolved_questions": count,
+                "target_validated_questions": None,
+            }
+        )
+        new_questions = as_record_store(generated["evolved_questions"], EvolvedQuestion)
+
+    to_answer = RecordStore(EvolvedQuestion, [_as_evolved_question(r) for r in stale])
+    to_answer.extend(new_questions)
+    updated = RecordStore(ExportRecord)
+    if to_answer:
+        partial = {
+            **state,
+            "evolved_questions": to_answer,
+            "query_vectors": query_vectors,
+        }
+        partial = context_gathering(partial)
+        partial = answer_generator(partial, max_answers=len(to_answer))
+        partial = export_agent(partial)
+        updated = as_record_store(partial["final_output"], ExportRecord)
+
+    dropped_ids = {record.id for record in dropped}
+    final_output = RecordStore(ExportRecord)
+    for record in previous:
+        if record.id in updated:
+            final_output.add(updated[record.id])
+        elif record.id not in dropped_ids:
+            final_output.add(record)
+    final_output.extend(r for r in updated if r.id not in final_output)
+
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.increment("questions_kept", "incremental_update", len(kept))
+        metrics.increment("questions_dropped", "incremental_update", len(dropped))
+        metrics.increment("answers_regenerated", "incremental_update", len(stale))
+        metrics.increment("questions_added", "incremental_update", len(new_questions))
+    logger.info(
+        "Incremental update: %d kept, %d dropped, %d re-answered, %d new",
+        len(kept),
+        len(dropped),
+        len(stale),
+        len(new_questions),
+    )
+
+    _commit(state, final_output, query_vectors)
+    state["final_output"] = final_output.to_dicts()
+    return state
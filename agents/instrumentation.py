@@ -0,0 +1,395 @@
+import contextvars
+import functools
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_active_metrics: contextvars.ContextVar[Optional["RunMetrics"]] = (
+    contextvars.ContextVar("active_metrics", default=None)
+)
+
+# Retry policy for invoke_model: (max_retries, backoff seconds).
+_retry_policy: contextvars.ContextVar[Tuple[int, float]] = contextvars.ContextVar(
+    "retry_policy", default=(0, 1.0)
+)
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Computes a nearest-rank percentile.
+
+    Args:
+        samples (List[float]): The observed values.
+        q (float): The percentile to compute, between 0 and 1.
+
+    Returns:
+        float: The percentile value, or 0.0 when there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    summary = {"count": len(samples), "total_seconds": sum(samples)}
+    for q in PERCENTILES:
+        summary[f"p{int(q * 100)}"] = percentile(samples, q)
+    return summary
+
+
+def model_name(model: Any) -> str:
+    """
+    Returns a label identifying a language or embedding model.
+
+    Args:
+        model: The model instance.
+
+    Returns:
+        str: The model name if the model exposes one, otherwise its class name.
+    """
+    for attribute in ("model_name", "model"):
+        name = getattr(model, attribute, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(model).__name__
+
+
+def token_usage(result: Any) -> Tuple[int, int]:
+    """
+    Extracts prompt and completion token counts from a model response.
+
+    Args:
+        result: The object returned by ``model.invoke``.
+
+    Returns:
+        Tuple[int, int]: The prompt and completion token counts, zero when unknown.
+    """
+    usage = getattr(result, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    response_metadata = getattr(result, "response_metadata", None) or {}
+    usage = response_metadata.get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class RunMetrics:
+    """
+    Collects timings, token counts and counters for a single pipeline run.
+
+    Put an instance in ``QAState["metrics"]`` to enable instrumentation. Nodes
+    decorated with :func:`instrument_node` then time themselves and route every
+    LLM call made through :func:`invoke_model` to this collector.
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.node_seconds: Dict[str, List[float]] = defaultdict(list)
+        self.llm_seconds: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self.prompt_tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.completion_tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record_node(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self.node_seconds[node].append(seconds)
+
+    def record_llm_call(
+        self,
+        stage: str,
+        model: str,
+        seconds: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        key = (stage, model)
+        with self._lock:
+            self.llm_seconds[key].append(seconds)
+            self.prompt_tokens[key] += prompt_tokens
+            self.completion_tokens[key] += completion_tokens
+
+    def increment(self, name: str, stage: str = "", value: int = 1) -> None:
+        with self._lock:
+            self.counters[(name, stage)] += value
+
+    def counter(self, name: str, stage: Optional[str] = None) -> int:
+        """
+        Returns a counter value, summed over all stages unless one is given.
+        """
+        return sum(
+            value
+            for (counter_name, counter_stage), value in self.counters.items()
+            if counter_name == name and (stage is None or counter_stage == stage)
+        )
+
+    def record_critic_result(self, accepted: bool) -> None:
+        self.increment("critic_accepted" if accepted else "critic_rejected")
+
+    @property
+    def critic_acceptance_rate(self) -> Optional[float]:
+        accepted = self.counter("critic_accepted")
+        total = accepted + self.counter("critic_rejected")
+        return accepted / total if total else None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Builds the run report as a JSON-serialisable dictionary.
+
+        Returns:
+            Dict[str, Any]: Node and LLM latency percentiles, token totals,
+            counters and the critic acceptance rate.
+        """
+        with self._lock:
+            llm_calls = []
+            for (stage, model), samples in sorted(self.llm_seconds.items()):
+                entry = {"stage": stage, "model": model}
+                entry.update(_latency_summary(samples))
+                entry["prompt_tokens"] = self.prompt_tokens[(stage, model)]
+                entry["completion_tokens"] = self.completion_tokens[(stage, model)]
+                llm_calls.append(entry)
+            return {
+                "run_id": self.run_id,
+                "nodes": {
+                    node: _latency_summary(samples)
+                    for node, samples in sorted(self.node_seconds.items())
+                },
+                "llm_calls": llm_calls,
+                "prompt_tokens": sum(self.prompt_tokens.values()),
+                "completion_tokens": sum(self.completion_tokens.values()),
+                "counters": [
+                    {"name": name, "stage": stage, "value": value}
+                    for (name, stage), value in sorted(self.counters.items())
+                ],
+                "critic_acceptance_rate": self.critic_acceptance_rate,
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.summary(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "evol") -> str:
+        """
+        Renders the run report in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix for every metric name.
+
+        Returns:
+            str: The report as Prometheus text.
+        """
+        report = self.summary()
+        run = f'run_id="{report["run_id"]}"'
+        lines = [f"# TYPE {prefix}_node_seconds summary"]
+        for node, stats in report["nodes"].items():
+            labels = f'{run},node="{node}"'
+            for q in PERCENTILES:
+                value = stats[f"p{int(q * 100)}"]
+                lines.append(
+                    f'{prefix}_node_seconds{{{labels},quantile="{q}"}} {value}'
+                )
+            lines.append(
+                f"{prefix}_node_seconds_sum{{{labels}}} {stats['total_seconds']}"
+            )
+            lines.append(f"{prefix}_node_seconds_count{{{labels}}} {stats['count']}")
+
+        lines.append(f"# TYPE {prefix}_llm_call_seconds summary")
+        for entry in report["llm_calls"]:
+            labels = f'{run},stage="{entry["stage"]}",model="{entry["model"]}"'
+            for q in PERCENTILES:
+                value = entry[f"p{int(q * 100)}"]
+                lines.append(
+                    f'{prefix}_llm_call_seconds{{{labels},quantile="{q}"}} {value}'
+                )
+            lines.append(
+                f"{prefix}_llm_call_seconds_sum{{{labels}}} {entry['total_seconds']}"
+            )
+            lines.append(
+                f"{prefix}_llm_call_seconds_count{{{labels}}} {entry['count']}"
+            )
+
+        lines.append(f"# TYPE {prefix}_tokens_total counter")
+        for entry in report["llm_calls"]:
+            labels = f'{run},stage="{entry["stage"]}",model="{entry["model"]}"'
+            lines.append(
+                f'{prefix}_tokens_total{{{labels},kind="prompt"}} {entry["prompt_tokens"]}'
+            )
+            lines.append(
+                f'{prefix}_tokens_total{{{labels},kind="completion"}} {entry["completion_tokens"]}'
+            )
+
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for entry in report["counters"]:
+            labels = f'{run},name="{entry["name"]}",stage="{entry["stage"]}"'
+            lines.append(f"{prefix}_events_total{{{labels}}} {entry['value']}")
+
+        if report["critic_acceptance_rate"] is not None:
+            lines.append(f"# TYPE {prefix}_critic_acceptance_rate gauge")
+            lines.append(
+                f"{prefix}_critic_acceptance_rate{{{run}}} {report['critic_acceptance_rate']}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Writes the report to ``path``; ``.prom`` and ``.txt`` files get Prometheus text, anything else JSON.
+        """
+        text = (
+            self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        )
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+
+
+def current_metrics() -> Optional[RunMetrics]:
+    """
+    Returns the collector of the node currently running, if instrumentation is enabled.
+    """
+    return _active_metrics.get()
+
+
+@contextmanager
+def activate(metrics: Optional[RunMetrics]) -> Iterator[Optional[RunMetrics]]:
+    """
+    Makes ``metrics`` the active collector for the duration of the block.
+    """
+    token = _active_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+
+
+@contextmanager
+def retry_policy(max_retries: int, backoff: float = 1.0) -> Iterator[None]:
+    """
+    Retries failed ``invoke_model`` calls in the block with exponential backoff.
+
+    Args:
+        max_retries (int): Additional attempts after a failed call.
+        backoff (float): Seconds before the first retry, doubled for each further one.
+    """
+    token = _retry_policy.set((max_retries, backoff))
+    try:
+        yield
+    finally:
+        _retry_policy.reset(token)
+
+
+def instrument_node(name: str) -> Callable:
+    """
+    Decorator that times a graph node when ``state["metrics"]`` holds a RunMetrics.
+
+    ``state["max_retries"]`` and ``state["retry_backoff"]``, when set, become the
+    retry policy of the model calls the node makes.
+
+    Args:
+        name (str): The node name used in the report.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(state, *args, **kwargs):
+            if state.get("max_retries") is not None:
+                backoff = state.get("retry_backoff")
+                with retry_policy(
+                    state["max_retries"], 1.0 if backoff is None else backoff
+                ):
+                    return timed(state, *args, **kwargs)
+            return timed(state, *args, **kwargs)
+
+        def timed(state, *args, **kwargs):
+            metrics = state.get("metrics") or _active_metrics.get()
+            if metrics is None:
+                return func(state, *args, **kwargs)
+            token = _active_metrics.set(metrics)
+            start = time.perf_counter()
+            try:
+                return func(state, *args, **kwargs)
+            finally:
+                metrics.record_node(name, time.perf_counter() - start)
+                _active_metrics.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def call_with_retries(stage: str, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Calls ``func(*args)``, retrying failures according to the active :func:`retry_policy`.
+
+    Args:
+        stage (str): The pipeline stage making the call, used as a report label.
+        func (Callable): The model call, such as ``embedding_model.embed_query``.
+        *args: Arguments passed to ``func``.
+
+    Returns:
+        The result of ``func``.
+    """
+    max_retries, backoff = _retry_policy.get()
+    attempt = 0
+    while True:
+        try:
+            return func(*args)
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            attempt += 1
+            logger.warning(
+                "Model call in stage %s failed, retrying (%d/%d)",
+                stage,
+                attempt,
+                max_retries,
+            )
+            metrics = _active_metrics.get()
+            if metrics is not None:
+                metrics.increment("retries", stage)
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def invoke_model(model: Any, prompt: Any, stage: str) -> Any:
+    """
+    Invokes a language model, recording latency, token usage and retries.
+
+    Failed calls are retried according to the active :func:`retry_policy`,
+    none by default.
+
+    Args:
+        model: The language model to invoke.
+        prompt: The prompt passed to ``model.invoke``.
+        stage (str): The pipeline stage making the call, used as a report label.
+
+    Returns:
+        The model response.
+    """
+    metrics = _active_metrics.get()
+    # A ModelRouter reaching here has no check to escalate on; use its top tier.
+    model = getattr(model, "default_model", model)
+
+    def attempt():
+        start = time.perf_counter()
+        result = model.invoke(prompt)
+        if metrics is not None:
+            metrics.record_llm_call(
+                stage,
+                model_name(model),
+                time.perf_counter() - start,
+                *token_usage(result),
+            )
+        return result
+
+    return call_with_retries(stage, attempt)
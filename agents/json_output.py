@@ -0,0 +1,22 @@
+import json
+from typing import Any
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Parses JSON produced by a model, accepting the raw newlines and tabs
+    models put inside strings.
+    """
+    return json.loads(text, strict=False)
+
+
+def parse_json_output(text: str) -> Any:
+    """
+    Parses a model's JSON output, with or without a markdown code fence.
+
+    Raises:
+        ValueError: If the output is not valid JSON.
+    """
+    from langchain_core.utils.json import parse_json_markdown
+
+    return parse_json_markdown(text, parser=loads_lenient)
@@ -0,0 +1,284 @@
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .instrumentation import RunMetrics, current_metrics, invoke_model, model_name
+
+logger = logging.getLogger(__name__)
+
+_REFUSAL = re.compile(
+    r"\b(?:i (?:don't|do not|cannot|can't) (?:know|answer|determine)|"
+    r"(?:not|isn't|is not) (?:provided|mentioned|specified|available) in the context|"
+    r"the context does not (?:provide|contain|mention|specify)|insufficient (?:context|information))\b",
+    re.IGNORECASE,
+)
+
+
+def answer_is_confident(answer: str, min_words: int = 8) -> bool:
+    """
+    Cheap confidence check for a generated answer: long enough and not a refusal.
+    """
+    return len(answer.split()) >= min_words and not _REFUSAL.search(answer)
+
+
+class ModelRouter:
+    """
+    Tiered model cascade for the evolution, critic and answer stages.
+
+    Each call starts on the tier configured for its stage or technique and
+    moves to the next larger tier only when the caller's check of the
+    response fails. Every attempt goes through ``invoke_model``, so metrics
+    and cost estimates see the model that actually ran. Anywhere the agents
+    accept a model, a router can be passed instead; calls without a check run
+    on the top tier.
+
+    Args:
+        tiers (Sequence[Any]): Models ordered from cheapest to largest.
+        stage_tiers (Optional[Dict[str, int]]): Starting tier per stage; defaults to 0.
+        technique_tiers (Optional[Dict[str, int]]): Starting tier per evolution technique,
+            overriding the evolution stage's.
+        long_context_chars (Optional[int]): Answers over longer contexts start on the top tier.
+        prices (Optional[Dict[str, Dict[str, float]]]): USD per million prompt and
+            completion tokens by model name, used by ``report``.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[Any],
+        stage_tiers: Optional[Dict[str, int]] = None,
+        technique_tiers: Optional[Dict[str, int]] = None,
+        long_context_chars: Optional[int] = None,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        if not tiers:
+            raise ValueError("A ModelRouter needs at least one model tier.")
+        self.tiers = list(tiers)
+        self.stage_tiers = stage_tiers or {}
+        self.technique_tiers = technique_tiers or {}
+        self.long_context_chars = long_context_chars
+        self.prices = prices or {}
+        self.routed_stages = set()
+
+    @property
+    def model_name(self) -> str:
+        return " > ".join(model_name(model) for model in self.tiers)
+
+    @property
+    def top(self) -> int:
+        return len(self.tiers) - 1
+
+    def start_tier(
+        self, stage: str, technique: Optional[str] = None, context: str = ""
+    ) -> int:
+        if stage == "answer" and self.long_context_chars is not None:
+            if len(context) > self.long_context_chars:
+                return self.top
+        if technique is not None and technique in self.technique_tiers:
+            tier = self.technique_tiers[technique]
+        else:
+            tier = self.stage_tiers.get(stage, 0)
+        return min(max(tier, 0), self.top)
+
+    def run(
+        self,
+        prompt: Any,
+        stage: str,
+        check: Callable[[Any], bool],
+        technique: Optional[str] = None,
+        context: str = "",
+        start: Optional[int] = None,
+    ) -> Tuple[Any, int]:
+        """
+        Invokes the starting tier and escalates until ``check`` accepts a response.
+
+        Args:
+            prompt: The prompt passed to each model.
+            stage (str): The pipeline stage making the call.
+            check (Callable[[Any], bool]): Returns True if a response is good enough.
+            technique (Optional[str]): The evolution technique, for per-technique tiers.
+            context (str): The context of an answer, for the long-context rule.
+            start (Optional[int]): Overrides the starting tier.
+
+        Returns:
+            Tuple[Any, int]: The last response and the tier that produced it.
+        """
+        tier = self.start_tier(stage, technique, context) if start is None else start
+        self.routed_stages.add(stage)
+        metrics = current_metrics()
+        while True:
+            result = invoke_model(self.tiers[tier], prompt, stage)
+            if tier >= self.top or check(result):
+                return result, tier
+            logger.debug(
+                "Escalating %s call from %s", stage, model_name(self.tiers[tier])
+            )
+            if metrics is not None:
+                metrics.increment("escalations", stage)
+            tier += 1
+
+    @property
+    def default_model(self) -> Any:
+        """
+        The top tier, used by ``invoke_model`` for calls made without a check.
+        """
+        return self.tiers[-1]
+
+    def report(self, metrics: Optional[RunMetrics] = None) -> Dict[str, Any]:
+        """
+        Compares the calls of routed stages against sending all of them to the top tier.
+
+        The baseline prices each call's tokens at the top tier's rates. Its
+        latency uses the top tier's mean latency in the same stage, and is
+        None for stages the top tier never served.
+
+        Args:
+            metrics (Optional[RunMetrics]): The run's metrics; defaults to the active collector.
+
+        Returns:
+            Dict[str, Any]: Per-stage calls by model, escalations, regenerations of
+            rejected questions, and actual versus baseline cost and seconds.
+        """
+        metrics = metrics or current_metrics()
+        if metrics is None:
+            raise ValueError("No metrics to report on.")
+        summary = metrics.summary()
+        names = {model_name(model) for model in self.tiers}
+        top_name = model_name(self.tiers[-1])
+        top_price = self.prices.get(top_name, {})
+
+        def cost(name: str, prompt_tokens: int, completion_tokens: int) -> float:
+            price = self.prices.get(name, {})
+            return (
+                prompt_tokens * price.get("prompt", 0.0)
+                + completion_tokens * price.get("completion", 0.0)
+            ) / 1e6
+
+        stages: Dict[str, Dict[str, Any]] = {}
+        for entry in summary["llm_calls"]:
+            if entry["model"] not in names or entry["stage"] not in self.routed_stages:
+                continue
+            stage = stages.setdefault(
+                entry["stage"],
+                {
+                    "calls": {},
+                    "escalations": metrics.counter("escalations", entry["stage"]),
+                    "regenerations": metrics.counter("regenerations", entry["stage"]),
+                    "cost": 0.0,
+                    "baseline_cost": 0.0,
+                    "seconds": 0.0,
+                    "top_tier_mean_seconds": None,
+                    "_tokens": [0, 0],
+                },
+            )
+            stage["calls"][entry["model"]] = entry["count"]
+            stage["cost"] += cost(
+                entry["model"], entry["prompt_tokens"], entry["completion_tokens"]
+            )
+            stage["seconds"] += entry["total_seconds"]
+            stage["_tokens"][0] += entry["prompt_tokens"]
+            stage["_tokens"][1] += entry["completion_tokens"]
+            if entry["model"] == top_name:
+                stage["top_tier_mean_seconds"] = entry["total_seconds"] / entry["count"]
+
+        for stage in stages.values():
+            prompt_tokens, completion_tokens = stage.pop("_tokens")
+            # Escalated attempts and regenerations of rejected questions are
+            # extra calls; the baseline makes one per request.
+            requests = (
+                sum(stage["calls"].values())
+                - stage["escalations"]
+                - stage["regenerations"]
+            )
+            calls_share = requests / max(sum(stage["calls"].values()), 1)
+            stage["baseline_cost"] = (
+                (
+                    prompt_tokens * top_price.get("prompt", 0.0)
+                    + completion_tokens * top_price.get("completion", 0.0)
+                )
+                * calls_share
+                / 1e6
+            )
+            mean = stage.pop("top_tier_mean_seconds")
+            stage["baseline_seconds"] = mean * requests if mean is not None else None
+            stage["cost_saved"] = stage["baseline_cost"] - stage["cost"]
+            stage["seconds_saved"] = (
+                stage["baseline_seconds"] - stage["seconds"]
+                if stage["baseline_seconds"] is not None
+                else None
+            )
+
+        return {
+            "stages": stages,
+            "cost": sum(s["cost"] for s in stages.values()),
+            "baseline_cost": sum(s["baseline_cost"] for s in stages.values()),
+            "cost_saved": sum(s["cost_saved"] for s in stages.values()),
+        }
+
+
+def escalate_rejected_questions(
+    evolved_questions: Any,
+    validated_questions: Any,
+    documents: List[Any],
+    router: ModelRouter,
+    critic_model: Any,
+    threshold: int = 3,
+) -> int:
+    """
+    Regenerates questions the critic rejected on larger generator tiers.
+
+    Each rejected question is regenerated from its source page, one tier above
+    its technique's starting tier and upwards, until the critic accepts it or
+    the top tier has been tried. Accepted replacements are added to
+    ``validated_questions``.
+
+    Args:
+        evolved_questions (RecordStore[EvolvedQuestion]): All critiqued questions, updated in place.
+        validated_questions (RecordStore[EvolvedQuestion]): Accepted questions, updated in place.
+        documents (List[Any]): The pages the questions were generated from.
+        router (ModelRouter): The generator router.
+        critic_model: The critic model or router.
+        threshold (int): Minimum critic score for a valid question.
+
+    Returns:
+        int: The number of questions that were accepted after escalation.
+    """
+    from .corpus_index import page_hash
+    from .evolution_agent import apply_evolution
+    from .evolution_techniques import get_evolution_technique
+    from .question_critic_agent import create_critic_prompt, validate_question
+
+    pages = {page_hash(document.page_content): document for document in documents}
+    critic_prompt = create_critic_prompt()
+    metrics = current_metrics()
+    recovered = 0
+    for question in list(evolved_questions):
+        if question.id in validated_questions or question.source_id not in pages:
+            continue
+        name, prompt_template = get_evolution_technique(question.evolution_type)
+        for tier in range(router.start_tier("evolution", name) + 1, len(router.tiers)):
+            text = apply_evolution(
+                "",
+                pages[question.source_id].page_content,
+                prompt_template.template,
+                prompt_template.input_variables,
+                prompt_template,
+                router.tiers[tier],
+            )
+            if metrics is not None:
+                metrics.increment("regenerations", "evolution")
+            if not text:
+                continue
+            feedback = validate_question(
+                {"id": question.id, "evolved_question": text},
+                critic_prompt,
+                critic_model,
+            )
+            if metrics is not None:
+                metrics.increment("regenerations", "critic")
+            if feedback["Independence"] + feedback["Clear Intent"] >= threshold:
+                question.evolved_question = text
+                question.critic_feedback = feedback
+                validated_questions.add(question)
+                recovered += 1
+                break
+    return recovered
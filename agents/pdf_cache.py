@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .instrumentation import current_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _is_url(pdf_path: str) -> bool:
+    return urlparse(pdf_path).scheme in ("http", "https")
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Holds an exclusive lock on ``path`` where the platform supports it."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class PDFCache:
+    """
+    Local cache of fetched PDFs and their parsed page text.
+
+    PDFs are stored by content hash under ``blobs/``. URLs are revalidated
+    with conditional requests (``If-None-Match``/``If-Modified-Since``), so an
+    unchanged PDF is not downloaded again. If the server cannot be reached or
+    answers with an error status, the last cached copy is used. Parsed pages
+    are stored as Parquet under ``text/``, keyed by the PDF hash, so a PDF
+    already seen is not parsed again; this part requires pyarrow, a project
+    dependency, and is skipped with a warning if it is missing.
+
+    Args:
+        cache_dir (str): Directory holding the cache.
+        session: A ``requests.Session`` to fetch with; one is created if omitted.
+        timeout (float): Request timeout in seconds.
+    """
+
+    SOURCES = "sources.json"
+
+    def __init__(self, cache_dir: str, session: Any = None, timeout: float = 60.0):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self._session = session
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "text"), exist_ok=True)
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", f"{digest}.pdf")
+
+    def text_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "text", f"{digest}.parquet")
+
+    def _sources(self) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(self.cache_dir, self.SOURCES)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as handle:
+            return json.load(handle)
+
+    def _save_source(self, url: str, entry: Dict[str, Any]) -> None:
+        # Other processes sharing the cache update the same index; read,
+        # update and replace it under a lock so no entry is lost.
+        path = os.path.join(self.cache_dir, self.SOURCES)
+        with _file_lock(f"{path}.lock"):
+            sources = self._sources()
+            sources[url] = entry
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as handle:
+                json.dump(sources, handle, indent=2)
+            os.replace(handle.name, path)
+
+    def _count(self, name: str) -> None:
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.increment(name, "load_documents")
+
+    def fetch(self, pdf_path: str) -> Tuple[str, str]:
+        """
+        Returns a local path to the PDF and its SHA-256, downloading only if it changed.
+
+        Args:
+            pdf_path (str): A local path or an http(s) URL.
+
+        Returns:
+            Tuple[str, str]: The local file path and the content hash.
+        """
+        if not _is_url(pdf_path):
+            return pdf_path, file_sha256(pdf_path)
+
+        entry = self._sources().get(pdf_path)
+        cached = entry is not None and os.path.exists(self.blob_path(entry["sha256"]))
+        headers = {}
+        if cached:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = self.session.get(
+                pdf_path, headers=headers, stream=True, timeout=self.timeout
+            )
+            try:
+                response.raise_for_status()
+            except OSError:
+                response.close()
+                raise
+        except OSError as e:
+            # requests' exceptions, HTTPError included, derive from IOError.
+            if not cached:
+                raise
+            logger.warning(
+                "Could not revalidate %s, using cached copy: %s", pdf_path, e
+            )
+            self._count("pdf_offline_hits")
+            return self.blob_path(entry["sha256"]), entry["sha256"]
+
+        with response:
+            if response.status_code == 304 and cached:
+                self._count("pdf_not_modified")
+                return self.blob_path(entry["sha256"]), entry["sha256"]
+            digest = hashlib.sha256()
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.join(self.cache_dir, "blobs"), suffix=".part", delete=False
+            ) as handle:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    digest.update(chunk)
+                    handle.write(chunk)
+            sha256 = digest.hexdigest()
+            os.replace(handle.name, self.blob_path(sha256))
+            self._save_source(
+                pdf_path,
+                {
+                    "sha256": sha256,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                },
+            )
+        self._count("pdf_downloads")
+        return self.blob_path(sha256), sha256
+
+    def _read_pages(self, digest: str, pdf_path: str) -> Optional[List[Any]]:
+        path = self.text_path(digest)
+        if not os.path.exists(path):
+            return None
+        import pyarrow.parquet as pq
+        from langchain_core.documents import Document
+
+        table = pq.read_table(path)
+        return [
+            Document(
+                page_content=text,
+                metadata={
+                    **json.loads(metadata),
+                    "source": pdf_path,
+                    "file_path": pdf_path,
+                },
+            )
+            for text, metadata in zip(
+                table.column("text").to_pylist(), table.column("metadata").to_pylist()
+            )
+        ]
+
+    def _write_pages(self, digest: str, documents: List[Any]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            {
+                "page": pa.array(range(len(documents)), type=pa.int32()),
+                "text": [document.page_content for document in documents],
+                "metadata": [
+                    json.dumps(document.metadata, default=str) for document in documents
+                ],
+            }
+        )
+        path = self.text_path(digest)
+        pq.write_table(table, f"{path}.{os.getpid()}.tmp", compression="zstd")
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    def load_pages(self, pdf_path: str) -> List[Any]:
+        """
+        Returns the pages of a PDF as Documents, parsing it only if it is not cached.
+
+        Args:
+            pdf_path (str): A local path or an http(s) URL.
+
+        Returns:
+            List[Document]: One Document per page, with ``source`` set to ``pdf_path``.
+        """
+        local_path, digest = self.fetch(pdf_path)
+        try:
+            import pyarrow  # noqa: F401
+
+            text_cache = True
+        except ImportError:
+            logger.warning(
+                "pyarrow is not installed; parsed PDF text will not be cached."
+            )
+            text_cache = False
+
+        if text_cache:
+            documents = self._read_pages(digest, pdf_path)
+            if documents is not None:
+                self._count("pdf_text_cache_hits")
+                return documents
+
+        from langchain_community.document_loaders import PyMuPDFLoader
+
+        documents = PyMuPDFLoader(file_path=local_path).load()
+        for document in documents:
+            document.metadata["source"] = pdf_path
+            document.metadata["file_path"] = pdf_path
+        if text_cache and documents:
+            self._write_pages(digest, documents)
+        return documents
@@ -0,0 +1,269 @@
+import logging
+import pickle
+import random
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .evolution_techniques import evolution_technique_names
+from .instrumentation import current_metrics
+
+logger = logging.getLogger(__name__)
+
+REJECT = "reject"
+ACCEPT = "accept"
+CRITIC = "critic"
+
+# Techniques whose instructions ask for several questions in one output.
+MULTI_QUESTION_TECHNIQUES = frozenset({"conversational_question"})
+
+# Fewer words than this cannot be a question; short ones like "What is
+# EBITDA?" are left to the critic.
+MIN_QUESTION_WORDS = 2
+
+_LEFTOVER_LABEL = re.compile(
+    r"^\s*(?:[*#>\-]+\s*)?(?:(?:evolved|generated|rewritten|new|final|original)\s+)?"
+    r"(?:question|output|answer|context)\s*\d*\s*:|^\s*(?:here is|here's|sure[,!])",
+    re.IGNORECASE | re.MULTILINE,
+)
+_QUESTION_START = re.compile(
+    r"^(?:what|why|how|when|where|which|who|whom|whose|is|are|was|were|do|does|did|"
+    r"can|could|should|would|will|has|have|if|in|given|considering|assuming|suppose|"
+    r"explain|describe|compare|trace|analy[sz]e|imagine|draw|calculate|discuss|"
+    r"evaluate|identify)\b",
+    re.IGNORECASE,
+)
+
+
+def rule_check(question: str, evolution_type: str = "") -> Optional[str]:
+    """
+    Checks an evolved question for obviously broken output.
+
+    Args:
+        question (str): The evolved question text.
+        evolution_type (str): The technique that produced it.
+
+    Returns:
+        Optional[str]: The reason for rejecting the question, or None if it passes.
+    """
+    text = (question or "").strip()
+    if not text:
+        return "empty"
+    if len(text.split()) < MIN_QUESTION_WORDS:
+        return "too_short"
+    if _LEFTOVER_LABEL.search(text):
+        return "leftover_label"
+    if "?" not in text and not _QUESTION_START.match(text):
+        return "not_a_question"
+    if text.count("?") > 1 and evolution_type not in MULTI_QUESTION_TECHNIQUES:
+        return "multiple_questions"
+    return None
+
+
+def question_features(question: str, evolution_type: str = "") -> List[float]:
+    """
+    Computes the numeric features used by the prefilter classifier.
+    """
+    text = (question or "").strip()
+    words = text.split()
+    features = [
+        len(text) / 100.0,
+        len(words) / 10.0,
+        float(text.count("?")),
+        float(text.endswith("?")),
+        float(bool(_QUESTION_START.match(text))),
+        float(bool(_LEFTOVER_LABEL.search(text))),
+        sum(len(word) for word in words) / len(words) if words else 0.0,
+        float(text.count(",")),
+        float(text.count("\n")),
+    ]
+    features.extend(
+        float(evolution_type == name) for name in evolution_technique_names()
+    )
+    return features
+
+
+class PrefilterClassifier:
+    """
+    Predicts the probability that the LLM critic accepts a question.
+
+    Wraps any scikit-learn style estimator with ``fit`` and ``predict_proba``
+    over :func:`question_features`.
+
+    Args:
+        estimator: A fitted estimator.
+    """
+
+    def __init__(self, estimator: Any):
+        self.estimator = estimator
+
+    def accept_probability(self, question: str, evolution_type: str = "") -> float:
+        probabilities = self.estimator.predict_proba(
+            [question_features(question, evolution_type)]
+        )[0]
+        classes = list(self.estimator.classes_)
+        return float(probabilities[classes.index(1)]) if 1 in classes else 0.0
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as handle:
+            pickle.dump(self.estimator, handle)
+
+    @classmethod
+    def load(cls, path: str) -> "PrefilterClassifier":
+        with open(path, "rb") as handle:
+            return cls(pickle.load(handle))
+
+
+def critic_history(questions: Iterable[Any]) -> List[Tuple[str, str, int]]:
+    """
+    Extracts (question, evolution_type, total critic score) from critiqued questions.
+
+    Questions the prefilter decided on alone are skipped.
+    """
+    history = []
+    for q in questions:
+        feedback = q.get("critic_feedback")
+        if feedback and "Independence" in feedback and "Clear Intent" in feedback:
+            history.append(
+                (
+                    q["evolved_question"],
+                    q["evolution_type"],
+                    feedback["Independence"] + feedback["Clear Intent"],
+                )
+            )
+    return history
+
+
+def train_prefilter_classifier(
+    history: Iterable[Tuple[str, str, int]],
+    threshold: int = 3,
+    estimator: Any = None,
+) -> PrefilterClassifier:
+    """
+    Trains a classifier on past critic scores.
+
+    Args:
+        history (Iterable[Tuple[str, str, int]]): (question, evolution_type, total score) triples,
+            for example from :func:`critic_history`.
+        threshold (int): The critic threshold that defines acceptance.
+        estimator: An unfitted scikit-learn style estimator; defaults to logistic regression.
+
+    Returns:
+        PrefilterClassifier: The fitted classifier.
+    """
+    history = list(history)
+    if not history:
+        raise ValueError("No critic history to train the prefilter on.")
+    if estimator is None:
+        try:
+            from sklearn.linear_model import LogisticRegression
+        except ImportError:
+            raise ImportError(
+                "The default prefilter classifier needs scikit-learn: install the "
+                "'classifier' extra (pip install 'evol-aie4[classifier]') or pass an estimator."
+            ) from None
+
+        estimator = LogisticRegression(max_iter=1000, class_weight="balanced")
+    features = [question_features(text, technique) for text, technique, _ in history]
+    labels = [int(score >= threshold) for _, _, score in history]
+    estimator.fit(features, labels)
+    return PrefilterClassifier(estimator)
+
+
+class Prefilter:
+    """
+    Decides cheaply whether an evolved question needs the LLM critic.
+
+    Rule checks reject obviously broken output. An optional classifier
+    accepts or rejects confident cases and leaves the rest to the critic. A
+    fraction ``audit_rate`` of prefilter decisions is still sent to the critic
+    to measure agreement; the critic's verdict wins for those.
+
+    Args:
+        classifier (Optional[PrefilterClassifier]): Classifier trained on past critic scores.
+        accept_above (float): Accept without the critic above this probability.
+        reject_below (float): Reject without the critic below this probability.
+        audit_rate (float): Fraction of prefilter decisions double-checked by the critic.
+        rules (bool): Whether to apply the rule checks.
+        seed (int): Seed for audit sampling.
+    """
+
+    def __init__(
+        self,
+        classifier: Optional[PrefilterClassifier] = None,
+        accept_above: float = 0.95,
+        reject_below: float = 0.05,
+        audit_rate: float = 0.0,
+        rules: bool = True,
+        seed: int = 0,
+    ):
+        self.classifier = classifier
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.audit_rate = audit_rate
+        self.rules = rules
+        self._random = random.Random(seed)
+        self.stats: Dict[str, int] = {
+            "seen": 0,
+            "rule_rejected": 0,
+            "classifier_accepted": 0,
+            "classifier_rejected": 0,
+            "sent_to_critic": 0,
+            "audited": 0,
+            "agreed": 0,
+        }
+
+    def decide(self, question: str, evolution_type: str = "") -> Tuple[str, str]:
+        """
+        Returns the decision (REJECT, ACCEPT or CRITIC) and its reason.
+        """
+        self.stats["seen"] += 1
+        if self.rules:
+            reason = rule_check(question, evolution_type)
+            if reason:
+                self.stats["rule_rejected"] += 1
+                return REJECT, reason
+        if self.classifier is not None:
+            probability = self.classifier.accept_probability(question, evolution_type)
+            if probability >= self.accept_above:
+                self.stats["classifier_accepted"] += 1
+                return ACCEPT, f"p={probability:.3f}"
+            if probability <= self.reject_below:
+                self.stats["classifier_rejected"] += 1
+                return REJECT, f"p={probability:.3f}"
+        self.stats["sent_to_critic"] += 1
+        return CRITIC, "uncertain"
+
+    def should_audit(self) -> bool:
+        if self.audit_rate and self._random.random() < self.audit_rate:
+            self.stats["audited"] += 1
+            return True
+        return False
+
+    def record_audit(self, decision: str, critic_accepted: bool) -> None:
+        agreed = (decision == ACCEPT) == critic_accepted
+        self.stats["agreed"] += int(agreed)
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.increment("prefilter_audits")
+            metrics.increment("prefilter_agreements", value=int(agreed))
+
+    @property
+    def saved_critic_calls(self) -> int:
+        decided = (
+            self.stats["rule_rejected"]
+            + self.stats["classifier_accepted"]
+            + self.stats["classifier_rejected"]
+        )
+        return decided - self.stats["audited"]
+
+    @property
+    def agreement_rate(self) -> Optional[float]:
+        audited = self.stats["audited"]
+        return self.stats["agreed"] / audited if audited else None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "saved_critic_calls": self.saved_critic_calls,
+            "agreement_rate": self.agreement_rate,
+        }
@@ -1,11 +1,21 @@
 from .state_config import QAState
-from typing import List, Dict
-from langchain_core.prompts import PromptTemplate
-from langchain.output_parsers.json import SimpleJsonOutputParser
+from typing import TYPE_CHECKING, List, Dict
+from .instrumentation import current_metrics, instrument_node, invoke_model
+from .records import EvolvedQuestion, RecordStore, as_record_store
+from .model_router import ModelRouter
+from .prefilter import ACCEPT, REJECT
 import json
+import logging
 
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+
+def create_critic_prompt() -> "PromptTemplate":
+    from langchain_core.prompts import PromptTemplate
 
-def create_critic_prompt() -> PromptTemplate:
     return PromptTemplate(
         input_variables=["question"],
         template="""
@@ -29,51 +39,105 @@ def create_critic_prompt() -> PromptTemplate:
     )
 
 
-def validate_question(question: Dict, prompt_template: PromptTemplate, model) -> Dict:
-    print("Validating question: ", question)
+def _parses_as_feedback(response) -> bool:
+    from langchain.output_parsers.json import SimpleJsonOutputParser
+
+    try:
+        feedback = SimpleJsonOutputParser().invoke(response)
+    except (json.JSONDecodeError, ValueError):
+        return False
+    return (
+        isinstance(feedback, dict)
+        and "Independence" in feedback
+        and "Clear Intent" in feedback
+    )
+
+
+def validate_question(question: Dict, prompt_template: "PromptTemplate", model) -> Dict:
+    logger.debug("Validating question: %s", question)
+    from langchain.output_parsers.json import SimpleJsonOutputParser
+
     prompt = prompt_template.format(question=question["evolved_question"])
-    chain = model | SimpleJsonOutputParser()
-    result = chain.invoke(prompt)
-    print(f"Result: {result}")
+    if isinstance(model, ModelRouter):
+        # Escalate the critic only when its output cannot be used.
+        response, _ = model.run(prompt, "critic", _parses_as_feedback)
+    else:
+        response = invoke_model(model, prompt, "critic")
 
     try:
-        feedback = result
+        feedback = SimpleJsonOutputParser().invoke(response)
+        logger.debug("Result: %s", feedback)
         if "Independence" not in feedback or "Clear Intent" not in feedback:
             raise ValueError("Feedback does not contain required keys")
         return feedback
     except (json.JSONDecodeError, ValueError) as e:
-        print(
-            f"Error parsing feedback for question ID {question.get('id', 'unknown')}: {e}"
+        logger.warning(
+            "Error parsing feedback for question ID %s: %s",
+            question.get("id", "unknown"),
+            e,
         )
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.increment("parse_failures", "critic")
         return {"Independence": 0, "Clear Intent": 0}
 
 
+@instrument_node("critic_agent")
 def critic_agent(
-    state: QAState, model, threshold: int = 3, max_validated_questions: int = 10
+    state: QAState,
+    model,
+    threshold: int = 3,
+    max_validated_questions: int = 10,
+    prefilter=None,
 ) -> QAState:
     """
     Uses a critic model to validate the evolved questions.
 
+    Every question gets its ``critic_feedback`` set; only accepted ones are
+    kept in ``validated_questions``.
+
     Args:
         state (QAState): The current state of the QA system.
         model: The language model to use for criticism.
         threshold (int): Minimum total score required for a question to be considered valid.
         max_validated_questions (int): Maximum number of validated questions to keep.
+        prefilter (Optional[Prefilter]): Rejects or accepts questions without calling the critic.
 
     Returns:
         QAState: The updated state with validated questions.
     """
-    evolved_questions = state.get("evolved_questions", [])
+    evolved_questions = as_record_store(state.get("evolved_questions"), EvolvedQuestion)
     critic_prompt = create_critic_prompt()
-    validated_questions = []
+    validated_questions = RecordStore(EvolvedQuestion)
+    metrics = current_metrics()
 
     for q in evolved_questions:
+        decision = None
+        if prefilter is not None:
+            decision, reason = prefilter.decide(
+                q["evolved_question"], q["evolution_type"]
+            )
+            if decision in (ACCEPT, REJECT) and not prefilter.should_audit():
+                q["critic_feedback"] = {"prefilter": decision, "reason": reason}
+                if metrics is not None:
+                    metrics.increment(f"prefilter_{decision}ed")
+                    metrics.increment("critic_calls_saved")
+                if decision == ACCEPT:
+                    validated_questions.add(q)
+                if len(validated_questions) >= max_validated_questions:
+                    break
+                continue
+
         feedback = validate_question(q, critic_prompt, model)
         total_score = feedback["Independence"] + feedback["Clear Intent"]
+        if metrics is not None:
+            metrics.record_critic_result(total_score >= threshold)
+        if decision in (ACCEPT, REJECT):
+            prefilter.record_audit(decision, total_score >= threshold)
 
+        q["critic_feedback"] = feedback
         if total_score >= threshold:
-            q["critic_feedback"] = feedback
-            validated_questions.append(q)
+            validated_questions.add(q)
 
         if len(validated_questions) >= max_validated_questions:
             break
@@ -1,13 +1,21 @@
 from typing import Dict
 from .state_config import QAState
 from .evolution_agent import evolution_agent
+from .adaptive_generation import generate_validated_questions
 from .question_critic_agent import critic_agent
-from .evolution_techniques import evolution_techniques
+from .evolution_techniques import get_evolution_technique, get_evolution_techniques
+import logging
 import random
 import uuid
 from .evolution_agent import apply_evolution
+from .instrumentation import instrument_node
+from .records import Question, RecordStore
+from .model_router import ModelRouter, escalate_rejected_questions
 
+logger = logging.getLogger(__name__)
 
+
+@instrument_node("question_generation")
 def question_generation_pipeline(
     state: QAState,
     evolution_distribution: Dict[str, float] = None,
@@ -19,6 +27,19 @@ def question_generation_pipeline(
     Generates and validates evolved questions based on the input state.
 
     This pipeline applies evolution techniques to generate new questions and critiques them.
+    Set ``state["prefilter"]`` to a Prefilter to reject broken questions before
+    the critic, optionally with a trained classifier and audits; by default
+    every question goes to the critic.
+
+    If ``state["target_validated_questions"]`` is set, questions are instead generated
+    and critiqued in adaptive concurrent waves until that many pass the critic, and
+    only the validated questions move on to context gathering.
+
+    If ``state["model"]`` is a ModelRouter, questions the critic rejects are
+    regenerated on larger tiers until accepted.
+
+    Without a target, ``state["questions_per_call"]`` above 1 generates that many questions per model
+    call, returned as a JSON array.
 
     Args:
         state (QAState): The current state of the QA system.
@@ -35,6 +56,7 @@ def question_generation_pipeline(
         state.get("max_evolutions_per_technique") or max_evolutions_per_technique
     )
 
+    evolution_techniques = get_evolution_techniques()
     if evolution_distribution is None:
         evolution_distribution = {
             technique[0]: 1 / len(evolution_techniques)
@@ -54,6 +76,31 @@ def question_generation_pipeline(
         for name, prompt_template in evolution_techniques
     ]
 
+    prefilter = state.get("prefilter")
+
+    target = state.get("target_validated_questions")
+    if target:
+        evolved_questions, validated_questions = generate_validated_questions(
+            state.get("documents", []),
+            evolution_techniques_with_distribution,
+            model,
+            critic_model,
+            target,
+            threshold=quality_threshold,
+            prefilter=prefilter,
+            max_concurrency=state.get("generation_concurrency") or 8,
+        )
+        state["evolved_questions"] = validated_questions
+        state["validated_questions"] = validated_questions
+        logger.info(
+            "Critiqued %d questions to validate %d",
+            len(evolved_questions),
+            len(validated_questions),
+        )
+        if prefilter is not None:
+            logger.info("Prefilter: %s", prefilter.report())
+        return state
+
     # Run evolution agent
     state = evolution_agent(
         state,
@@ -61,6 +108,7 @@ def question_generation_pipeline(
         evolution_techniques_with_distribution,
         max_evolved_questions,
         max_evolutions_per_technique,
+        questions_per_call=state.get("questions_per_call") or 1,
     )
 
     # Run critic agent
@@ -69,7 +117,21 @@ def question_generation_pipeline(
         critic_model,
         threshold=quality_threshold,
         max_validated_questions=max_evolved_questions,
+        prefilter=prefilter,
     )
+    if prefilter is not None:
+        logger.info("Prefilter: %s", prefilter.report())
+
+    if isinstance(model, ModelRouter):
+        recovered = escalate_rejected_questions(
+            state["evolved_questions"],
+            state["validated_questions"],
+            state["documents"],
+            model,
+            critic_model,
+            threshold=quality_threshold,
+        )
+        logger.info("Recovered %d rejected questions on larger models", recovered)
 
     return state
 
@@ -82,18 +144,12 @@ def generate_initial_questions(state: QAState, model, num_questions: int) -> QAS
     if not documents:
         raise ValueError("No documents found in the state to generate questions from.")
 
-    simple_question_technique = next(
-        (
-            technique
-            for technique in evolution_techniques
-            if technique[0] == "simple_question"
-        ),
-        None,
-    )
-    if not simple_question_technique:
-        raise ValueError("Simple question evolution technique not found.")
+    try:
+        simple_question_technique = get_evolution_technique("simple_question")
+    except KeyError:
+        raise ValueError("Simple question evolution technique not found.") from None
 
-    initial_questions = []
+    initial_questions = RecordStore(Question)
     for _ in range(num_questions):
         document = random.choice(documents)
         context = document.page_content
@@ -108,12 +164,8 @@ def generate_initial_questions(state: QAState, model, num_questions: int) -> QAS
                 model,
             )
             if question:
-                initial_questions.append(
-                    {
-                        "id": str(uuid.uuid4()),
-                        "question": question,
-                        "context": context,
-                    }
+                initial_questions.add(
+                    Question(id=str(uuid.uuid4()), question=question, context=context)
                 )
 
     if not initial_questions:
@@ -0,0 +1,230 @@
+import logging
+from dataclasses import dataclass, fields
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    """
+    Mapping-style access for slotted record types.
+
+    Agents and notebooks written against the earlier dict records keep working:
+    ``record["id"]``, ``record.get("answer")`` and ``record["critic_feedback"] = ...``
+    map onto the record's fields. Unlike a dict, a record has a fixed set of
+    fields: reading or assigning any other key raises KeyError.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.field_names()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    @classmethod
+    def field_names(cls) -> List[str]:
+        return [f.name for f in fields(cls)]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        return cls(**{name: data[name] for name in cls.field_names() if name in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.field_names()}
+
+
+@dataclass(slots=True)
+class Question(_Record):
+    id: str
+    question: str
+    context: str
+
+
+@dataclass(slots=True)
+class EvolvedQuestion(_Record):
+    id: str
+    original_question_id: str
+    evolved_question: str
+    evolution_type: str
+    critic_feedback: Optional[Dict[str, Any]] = None
+    source_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class QuestionContext(_Record):
+    id: str
+    question: str
+    contexts: List[str]
+    context_ids: Optional[List[str]] = None
+
+
+@dataclass(slots=True)
+class Answer(_Record):
+    id: str
+    question: str
+    answer: str
+    context: str
+
+
+@dataclass(slots=True)
+class ExportRecord(_Record):
+    id: str
+    evolution_type: str
+    answer: Optional[str]
+    contexts: Optional[List[str]]
+    evolved_question: str
+    source_id: Optional[str] = None
+    context_ids: Optional[List[str]] = None
+
+
+R = TypeVar("R", bound=_Record)
+
+
+class RecordStore(Generic[R]):
+    """
+    Insertion-ordered collection of records indexed by id.
+
+    Iterates, indexes and slices like the list of dicts the agents used to
+    pass around (``store[0]``, ``store[:10]``), while ``store["<id>"]`` looks
+    a record up by id in constant time. Ids are unique: adding a record whose
+    id is already present logs a warning and keeps the first record.
+
+    Args:
+        record_type (Type[R]): The record class stored.
+        records (Iterable[R]): Initial records.
+    """
+
+    def __init__(self, record_type: Type[R], records: Iterable[R] = ()):
+        self.record_type = record_type
+        self._records: Dict[str, R] = {}
+        # Positional view for integer indexing, rebuilt after changes.
+        self._positions: Optional[List[R]] = None
+        self.extend(records)
+
+    def add(self, record: R) -> None:
+        if record.id in self._records:
+            logger.warning(
+                "Duplicate %s id %s; keeping the first record.",
+                self.record_type.__name__,
+                record.id,
+            )
+            return
+        self._records[record.id] = record
+        self._positions = None
+
+    append = add
+
+    def extend(self, records: Iterable[R]) -> None:
+        for record in records:
+            self.add(record)
+
+    def get(self, record_id: str, default: Optional[R] = None) -> Optional[R]:
+        return self._records.get(record_id, default)
+
+    def remove(self, record_id: str) -> None:
+        if self._records.pop(record_id, None) is not None:
+            self._positions = None
+
+    def ids(self) -> List[str]:
+        return list(self._records)
+
+    def __getitem__(self, key: Union[str, int, slice]):
+        if isinstance(key, str):
+            return self._records[key]
+        if self._positions is None:
+            self._positions = list(self._records.values())
+        if isinstance(key, slice):
+            return RecordStore(self.record_type, self._positions[key])
+        return self._positions[key]
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._records
+
+    def __iter__(self) -> Iterator[R]:
+        return iter(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def __repr__(self) -> str:
+        return f"RecordStore({self.record_type.__name__}, {len(self)} records)"
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """
+        Returns the records as one list per field.
+        """
+        return {
+            name: [getattr(record, name) for record in self._records.values()]
+            for name in self.record_type.field_names()
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self._records.values()]
+
+    def to_pandas(self):
+        """
+        Converts the records to a pandas DataFrame with one column per field.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.columns())
+
+    def to_arrow(self):
+        """
+        Converts the records to a pyarrow Table with one column per field.
+        """
+        import pyarrow as pa
+
+        return pa.table(self.columns())
+
+
+def as_record_store(
+    items: Optional[Iterable[Any]], record_type: Type[R]
+) -> RecordStore[R]:
+    """
+    Returns ``items`` as a RecordStore, converting a list of dicts if needed.
+
+    Args:
+        items (Optional[Iterable[Any]]): A RecordStore, or records or dicts.
+        record_type (Type[R]): The record class to build from dicts.
+
+    Returns:
+        RecordStore[R]: The indexed records.
+    """
+    if isinstance(items, RecordStore):
+        return items
+    return RecordStore(
+        record_type,
+        (
+            record_type.from_dict(item) if isinstance(item, dict) else item
+            for item in items or ()
+        ),
+    )
@@ -0,0 +1,288 @@
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .evolution_agent import generate_evolved_questions
+from .evolution_techniques import get_evolution_technique
+from .instrumentation import RunMetrics, activate
+from .question_critic_agent import critic_agent
+from .work_queue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+
+def count_pages(pdf_path: str) -> Optional[int]:
+    """
+    Returns the page count of a local PDF, or None for URLs and unreadable files.
+    """
+    if not os.path.exists(pdf_path):
+        return None
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+
+    try:
+        with pymupdf.open(pdf_path) as document:
+            return document.page_count
+    except Exception as e:
+        logger.warning("Could not count pages of %s: %s", pdf_path, e)
+        return None
+
+
+def plan_work_units(
+    pdf_paths: Sequence[str],
+    technique_quotas: Dict[str, int],
+    pages_per_shard: int = 50,
+    questions_per_unit: int = 5,
+    page_counter: Callable[[str], Optional[int]] = count_pages,
+) -> List[Dict[str, Any]]:
+    """
+    Splits documents and technique quotas into independent work units.
+
+    Each document is cut into page shards, and each technique's quota for the
+    document is spread over its shards in proportion to their page counts.
+    Documents whose page count is unknown form a single shard.
+
+    Args:
+        pdf_paths (Sequence[str]): The documents to generate questions from.
+        technique_quotas (Dict[str, int]): Evolved questions wanted per technique and document.
+        pages_per_shard (int): Maximum pages per shard.
+        questions_per_unit (int): Maximum questions a single unit generates.
+        page_counter (Callable[[str], Optional[int]]): Returns a document's page count.
+
+    Returns:
+        List[Dict[str, Any]]: Unit payloads with pdf_path, page range, technique and count.
+    """
+    units = []
+    for pdf_path in pdf_paths:
+        pages = page_counter(pdf_path)
+        if pages:
+            shards = [
+                (start, min(start + pages_per_shard, pages))
+                for start in range(0, pages, pages_per_shard)
+            ]
+        else:
+            shards = [(0, None)]
+            pages = 1
+        for technique, quota in technique_quotas.items():
+            remaining = quota
+            for position, (start, end) in enumerate(shards):
+                shard_pages = (end - start) if end is not None else pages
+                share = (
+                    remaining
+                    if position == len(shards) - 1
+                    else min(remaining, math.ceil(quota * shard_pages / pages))
+                )
+                remaining -= share
+                while share > 0:
+                    count = min(share, questions_per_unit)
+                    units.append(
+                        {
+                            "pdf_path": pdf_path,
+                            "page_start": start,
+                            "page_end": end,
+                            "technique": technique,
+                            "count": count,
+                        }
+                    )
+                    share -= count
+    return units
+
+
+class _DocumentCache:
+    """Keeps the most recently parsed PDFs of a worker in memory."""
+
+    def __init__(self, loader: Callable[[str], List[Any]], size: int = 2):
+        self.loader = loader
+        self.size = size
+        self._documents: Dict[str, List[Any]] = {}
+
+    def get(self, pdf_path: str) -> List[Any]:
+        if pdf_path in self._documents:
+            self._documents[pdf_path] = self._documents.pop(pdf_path)
+        else:
+            self._documents[pdf_path] = self.loader(pdf_path)
+            while len(self._documents) > self.size:
+                self._documents.pop(next(iter(self._documents)))
+        return self._documents[pdf_path]
+
+
+def load_pdf_pages(pdf_path: str) -> List[Any]:
+    from langchain_community.document_loaders import PyMuPDFLoader
+
+    return PyMuPDFLoader(file_path=pdf_path).load()
+
+
+def process_unit(
+    payload: Dict[str, Any],
+    documents: List[Any],
+    model: Any,
+    critic_model: Any,
+    quality_threshold: int = 3,
+    prefilter: Any = None,
+) -> Dict[str, Any]:
+    """
+    Generates and critiques the evolved questions of one work unit.
+
+    Args:
+        payload (Dict[str, Any]): The unit payload from plan_work_units.
+        documents (List[Any]): All pages of the unit's document.
+        model: The generator language model.
+        critic_model: The critic language model.
+        quality_threshold (int): Minimum critic score for a valid question.
+        prefilter (Optional[Prefilter]): Prefilter applied before the critic.
+
+    Returns:
+        Dict[str, Any]: The evolved questions, the ids of validated ones and the unit's metrics.
+    """
+    pages = documents[payload["page_start"] : payload["page_end"]]
+    if not pages:
+        raise ValueError(
+            f"No pages {payload['page_start']}-{payload['page_end']} in {payload['pdf_path']}"
+        )
+    name, prompt_template = get_evolution_technique(payload["technique"])
+    metrics = RunMetrics()
+    with activate(metrics):
+        evolved_questions = generate_evolved_questions(
+            pages,
+            [(name, prompt_template, 0)],
+            model,
+            payload["count"],
+            payload["count"],
+        )
+        state = critic_agent(
+            {"evolved_questions": evolved_questions},
+            critic_model,
+            threshold=quality_threshold,
+            max_validated_questions=payload["count"],
+            prefilter=prefilter,
+        )
+    return {
+        "evolved_questions": [q.to_dict() for q in evolved_questions],
+        "validated_ids": state["validated_questions"].ids(),
+        "metrics": metrics.summary(),
+    }
+
+
+class _LeaseKeeper(threading.Thread):
+    """Extends a unit's lease periodically until stopped."""
+
+    def __init__(
+        self, queue: WorkQueue, unit_id: str, worker_id: str, lease_seconds: float
+    ):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.unit_id = unit_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(
+                self.unit_id, self.worker_id, self.lease_seconds
+            ):
+                logger.warning("Lost lease on unit %s", self.unit_id)
+                return
+
+
+def run_worker(
+    queue: WorkQueue,
+    model: Any,
+    critic_model: Any,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 300.0,
+    quality_threshold: int = 3,
+    poll_seconds: float = 2.0,
+    exit_when_idle: bool = True,
+    document_loader: Callable[[str], List[Any]] = load_pdf_pages,
+    prefilter: Any = None,
+) -> int:
+    """
+    Claims and processes units until the queue is drained.
+
+    Args:
+        queue (WorkQueue): The queue to work from.
+        model: The generator language model.
+        critic_model: The critic language model.
+        worker_id (Optional[str]): Identifier recorded on leases; defaults to host, pid and a random suffix.
+        lease_seconds (float): Lease length, renewed in the background while a unit runs.
+        quality_threshold (int): Minimum critic score for a valid question.
+        poll_seconds (float): Wait between claims when all remaining units are leased elsewhere.
+        exit_when_idle (bool): Return once no unit is pending or leased.
+        document_loader (Callable[[str], List[Any]]): Parses a PDF into page documents.
+        prefilter (Optional[Prefilter]): Prefilter applied before the critic.
+
+    Returns:
+        int: The number of units this worker completed.
+    """
+    worker_id = (
+        worker_id or f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    )
+    documents = _DocumentCache(document_loader)
+    completed = 0
+    while True:
+        unit = queue.claim(worker_id, lease_seconds)
+        if unit is None:
+            if exit_when_idle and queue.is_drained():
+                return completed
+            time.sleep(poll_seconds)
+            continue
+        keeper = _LeaseKeeper(queue, unit.id, worker_id, lease_seconds)
+        keeper.start()
+        try:
+            result = process_unit(
+                unit.payload,
+                documents.get(unit.payload["pdf_path"]),
+                model,
+                critic_model,
+                quality_threshold,
+                prefilter,
+            )
+        except Exception as e:
+            logger.exception("Unit %s failed (attempt %d)", unit.id, unit.attempts)
+            queue.fail(unit.id, worker_id, f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            keeper.stopped.set()
+        if queue.complete(unit.id, worker_id, result):
+            completed += 1
+        else:
+            logger.warning("Discarding result of unit %s: lease was lost", unit.id)
+
+
+def merge_results(
+    queue: WorkQueue, validated_only: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Merges the results of completed units into one stream of export rows.
+
+    Args:
+        queue (WorkQueue): The queue holding completed units.
+        validated_only (bool): Skip questions the critic rejected.
+
+    Yields:
+        Dict[str, Any]: One row per evolved question, tagged with its source document and pages.
+    """
+    seen = set()
+    for unit, result in queue.results():
+        validated = set(result["validated_ids"])
+        for question in result["evolved_questions"]:
+            if question["id"] in seen or (
+                validated_only and question["id"] not in validated
+            ):
+                continue
+            seen.add(question["id"])
+            yield {
+                **question,
+                "validated": question["id"] in validated,
+                "pdf_path": unit.payload["pdf_path"],
+                "page_start": unit.payload["page_start"],
+                "page_end": unit.payload["page_end"],
+                "unit_id": unit.id,
+            }
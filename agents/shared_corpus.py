@@ -0,0 +1,254 @@
+import json
+import logging
+import mmap
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .embedding_store import EmbeddingStore
+
+if TYPE_CHECKING:
+    import faiss
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache of attached corpora, keyed by directory.
+_ATTACHED: Dict[str, "SharedCorpus"] = {}
+
+
+class _Blob(Sequence):
+    """
+    Byte strings stored back to back in one memory-mapped file, found by offset.
+
+    Args:
+        data (mmap.mmap): The concatenated byte strings.
+        offsets (np.ndarray): The n + 1 byte offsets of the strings in ``data``.
+    """
+
+    def __init__(self, data: mmap.mmap, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def write(path: str, items: Sequence[bytes]) -> None:
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        with open(f"{path}.bin", "wb") as handle:
+            for position, item in enumerate(items):
+                offsets[position + 1] = offsets[position] + handle.write(item)
+        np.save(f"{path}.offsets.npy", offsets)
+
+    @classmethod
+    def open(cls, path: str) -> "_Blob":
+        with open(f"{path}.bin", "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            # mmap rejects empty files.
+            data = (
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+        return cls(data, np.load(f"{path}.offsets.npy", mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.data[int(self.offsets[index]) : int(self.offsets[index + 1])]
+
+
+class PageSequence(Sequence):
+    """
+    Read-only sequence of page Documents decoded on access from memory-mapped blobs.
+
+    Args:
+        texts (_Blob): The UTF-8 page texts.
+        metadata (_Blob): The JSON-encoded Document metadata of each page.
+    """
+
+    def __init__(self, texts: _Blob, metadata: _Blob):
+        self.texts = texts
+        self.metadata = metadata
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def text(self, index: int) -> str:
+        return self.texts[index].decode("utf-8")
+
+    def __getitem__(self, index):
+        from langchain_core.documents import Document
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+        return Document(
+            page_content=self.text(index), metadata=json.loads(self.metadata[index])
+        )
+
+
+class _IndexVectors:
+    """Exposes the vectors of a flat index as an array, keeping the index alive."""
+
+    def __init__(self, index: "faiss.Index"):
+        import faiss
+
+        # The downcast wrapper does not own the index; hold the one that does.
+        self.index = index
+        self.__array_interface__ = {
+            "shape": (index.ntotal, index.d),
+            "typestr": "<f4",
+            "data": (int(faiss.downcast_index(index).get_xb()), True),
+            "version": 3,
+        }
+
+
+def _index_matrix(index: "faiss.Index") -> np.ndarray:
+    """
+    Returns the vectors stored in a flat index as a read-only float32 array, without copying.
+    """
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return np.asarray(_IndexVectors(index))
+
+
+class SharedCorpus:
+    """
+    Pages, their float32 embeddings and a FAISS index in files that processes map read-only.
+
+    ``create`` writes the corpus once; ``attach`` maps it without copying, so
+    any number of worker processes share one copy of the data through the OS
+    page cache. The directory holds ``index.faiss`` (an exact flat index whose
+    codes are memory-mapped on load and double as the embedding matrix),
+    ``text.bin`` and ``metadata.bin`` (the page texts and JSON metadata, with
+    their byte offsets in ``text.offsets.npy`` and ``metadata.offsets.npy``)
+    and ``corpus.json``.
+
+    Args:
+        directory (str): The corpus directory.
+        documents (PageSequence): The pages.
+        embeddings (EmbeddingStore): The embedding matrix, a view of the index's codes.
+        index (faiss.Index): The memory-mapped index, with page positions as ids.
+        source (Optional[str]): The PDF the corpus was built from.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        documents: PageSequence,
+        embeddings: EmbeddingStore,
+        index: "faiss.Index",
+        source: Optional[str] = None,
+    ):
+        self.directory = directory
+        self.documents = documents
+        self.embeddings = embeddings
+        self.index = index
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def create(
+        cls,
+        directory: str,
+        documents: Sequence[Any],
+        embeddings: Any,
+        source: Optional[str] = None,
+    ) -> "SharedCorpus":
+        """
+        Writes a corpus directory and attaches to it.
+
+        Args:
+            directory (str): Where to write the corpus.
+            documents (Sequence[Document]): The pages.
+            embeddings: One float32 embedding per page, as an array or EmbeddingStore.
+            source (Optional[str]): The PDF the pages came from.
+
+        Returns:
+            SharedCorpus: The attached corpus.
+        """
+        import faiss
+
+        os.makedirs(directory, exist_ok=True)
+        store = (
+            embeddings
+            if isinstance(embeddings, EmbeddingStore)
+            else EmbeddingStore.from_vectors(embeddings)
+        )
+        if len(store) != len(documents):
+            raise ValueError(f"{len(store)} embeddings for {len(documents)} pages.")
+
+        index = faiss.IndexFlatL2(store.dim)
+        chunk_size = 65536
+        for start in range(0, len(store), chunk_size):
+            index.add(np.ascontiguousarray(store.rows(start, start + chunk_size)))
+        faiss.write_index(index, os.path.join(directory, "index.faiss"))
+        del index
+
+        _Blob.write(
+            os.path.join(directory, "text"),
+            [document.page_content.encode("utf-8") for document in documents],
+        )
+        _Blob.write(
+            os.path.join(directory, "metadata"),
+            [
+                json.dumps(dict(document.metadata), default=str).encode("utf-8")
+                for document in documents
+            ],
+        )
+        with open(os.path.join(directory, "corpus.json"), "w") as handle:
+            json.dump({"source": source}, handle)
+        _ATTACHED.pop(os.path.abspath(directory), None)
+        return cls.attach(directory)
+
+    @classmethod
+    def attach(cls, directory: str) -> "SharedCorpus":
+        """
+        Maps a corpus directory read-only, reusing this process's mapping if there is one.
+        """
+        import faiss
+
+        key = os.path.abspath(directory)
+        if key in _ATTACHED:
+            return _ATTACHED[key]
+
+        with open(os.path.join(directory, "corpus.json")) as handle:
+            info = json.load(handle)
+        documents = PageSequence(
+            _Blob.open(os.path.join(directory, "text")),
+            _Blob.open(os.path.join(directory, "metadata")),
+        )
+
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if mmap_flag is None:
+            logger.warning(
+                "This FAISS version cannot memory-map flat indexes; each process loads its own copy."
+            )
+            mmap_flag = 0
+        index = faiss.read_index(
+            os.path.join(directory, "index.faiss"), mmap_flag | faiss.IO_FLAG_READ_ONLY
+        )
+
+        corpus = cls(
+            directory,
+            documents,
+            EmbeddingStore(_index_matrix(index)),
+            index,
+            info.get("source"),
+        )
+        _ATTACHED[key] = corpus
+        return corpus
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Returns the QAState fields that point the pipeline at this corpus.
+        """
+        return {
+            "documents": self.documents,
+            "document_embeddings": self.embeddings,
+            "document_index": self.index,
+            "document_ids": None,
+        }
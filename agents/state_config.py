@@ -1,4 +1,4 @@
-from typing import TypedDict, Optional, List, Any
+from typing import TypedDict, Optional, List, Any, Dict, Iterable
 
 
 class QAState(TypedDict):
@@ -7,11 +7,29 @@ class QAState(TypedDict):
     model: Optional[Any]
     critic_model: Optional[Any]
     documents: Optional[List]
-    document_embeddings: Optional[List]
-    questions: Optional[List[dict]]
-    evolved_questions: Optional[List[dict]]
-    answers: Optional[List[dict]]
-    contexts: Optional[List[dict]]
-    final_output: Optional[List[dict]]
+    document_embeddings: Optional[Any]
+    questions: Optional[Iterable]
+    evolved_questions: Optional[Iterable]
+    answers: Optional[Iterable]
+    contexts: Optional[Iterable]
+    final_output: Optional[Iterable]
     max_evolved_questions: Optional[int]
     max_evolutions_per_technique: Optional[int]
+    metrics: Optional[Any]
+    max_retries: Optional[int]
+    retry_backoff: Optional[float]
+    embedding_dtype: Optional[str]
+    embedding_mmap_path: Optional[str]
+    prefilter: Optional[Any]
+    target_validated_questions: Optional[int]
+    generation_concurrency: Optional[int]
+    questions_per_call: Optional[int]
+    answer_group_size: Optional[int]
+    corpus_dir: Optional[str]
+    corpus_diff: Optional[Any]
+    incremental_corpus: Optional[Any]
+    document_index: Optional[Any]
+    document_ids: Optional[List[int]]
+    query_vectors: Optional[Dict[str, Any]]
+    cache_dir: Optional[str]
+    shared_corpus: Optional[str]
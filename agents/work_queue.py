@@ -0,0 +1,189 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class WorkUnit:
+    id: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+
+
+class WorkQueue(ABC):
+    """
+    Durable queue of work units claimed under time-limited leases.
+
+    A worker claims a unit, keeps its lease alive with ``heartbeat`` while it
+    works, and then calls ``complete`` or ``fail``. If the worker dies, the
+    lease expires and another worker can claim the unit again, up to
+    ``max_attempts`` times.
+    """
+
+    @abstractmethod
+    def put(self, payloads: Iterable[Dict[str, Any]]) -> List[str]:
+        """Adds units and returns their ids."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[WorkUnit]:
+        """Leases the next pending or expired unit, or returns None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, unit_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extends a lease; returns False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, unit_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Stores a unit's result; returns False if the worker no longer holds the lease."""
+
+    @abstractmethod
+    def fail(self, unit_id: str, worker_id: str, error: str) -> None:
+        """Releases a unit after an error so it can be retried."""
+
+    @abstractmethod
+    def results(self) -> Iterator[Tuple[WorkUnit, Dict[str, Any]]]:
+        """Yields completed units and their results in insertion order."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Returns the number of units per status."""
+
+    def is_drained(self) -> bool:
+        counts = self.counts()
+        return counts.get("pending", 0) == 0 and counts.get("leased", 0) == 0
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue stored in a local SQLite database.
+
+    Any number of processes on the same machine can open the same file; claims
+    are serialised with ``BEGIN IMMEDIATE`` transactions.
+
+    Args:
+        path (str): The database file.
+        max_attempts (int): Claims allowed per unit before it is marked failed.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS units (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT UNIQUE NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, and the
+        # heartbeat runs on its own thread.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def put(self, payloads: Iterable[Dict[str, Any]]) -> List[str]:
+        rows = [(uuid.uuid4().hex, json.dumps(payload)) for payload in payloads]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO units (id, payload) VALUES (?, ?)", rows
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return [unit_id for unit_id, _ in rows]
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[WorkUnit]:
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Units whose attempts are used up and whose lease expired are failed.
+            connection.execute(
+                "UPDATE units SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, payload, attempts FROM units "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY seq LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            unit_id, payload, attempts = row
+            connection.execute(
+                "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + lease_seconds, unit_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return WorkUnit(unit_id, json.loads(payload), attempts + 1)
+
+    def heartbeat(self, unit_id: str, worker_id: str, lease_seconds: float) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE units SET lease_expires = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, unit_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, unit_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE units SET status = 'done', result = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(result), unit_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, unit_id: str, worker_id: str, error: str) -> None:
+        self._connection().execute(
+            "UPDATE units SET "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (self.max_attempts, error, unit_id, worker_id),
+        )
+
+    def results(self) -> Iterator[Tuple[WorkUnit, Dict[str, Any]]]:
+        cursor = self._connection().execute(
+            "SELECT id, payload, attempts, result FROM units "
+            "WHERE status = 'done' ORDER BY seq"
+        )
+        for unit_id, payload, attempts, result in cursor:
+            yield WorkUnit(unit_id, json.loads(payload), attempts), json.loads(result)
+
+    def counts(self) -> Dict[str, int]:
+        rows = (
+            self._connection()
+            .execute("SELECT status, COUNT(*) FROM units GROUP BY status")
+            .fetchall()
+        )
+        return dict(rows)
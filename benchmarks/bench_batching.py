@@ -0,0 +1,62 @@
+"""
+Model calls, prompt tokens and wall time of batched question generation.
+
+Generates the same number of evolved questions with one question per call
+and with several questions per call, against a FakeChatModel with a fixed
+per-call latency:
+
+    python -m benchmarks.bench_batching --questions 120 --per-call 1 4 8 12
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from agents.evolution_agent import evolution_agent
+from agents.evolution_techniques import get_evolution_techniques
+from agents.instrumentation import RunMetrics, activate
+
+from .corpus import synthetic_documents
+from .fakes import FakeChatModel
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=120)
+    parser.add_argument("--per-call", type=int, nargs="+", default=[1, 4, 8, 12])
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--broken-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    techniques = [(name, template, 0) for name, template in get_evolution_techniques()]
+    documents = synthetic_documents(50)
+    per_technique = -(-args.questions // len(techniques))
+    for questions_per_call in args.per_call:
+        model = FakeChatModel(latency=args.latency, broken_rate=args.broken_rate)
+        metrics = RunMetrics()
+        start = time.perf_counter()
+        with activate(metrics):
+            state = evolution_agent(
+                {"documents": documents},
+                model,
+                techniques,
+                args.questions,
+                per_technique,
+                questions_per_call=questions_per_call,
+            )
+        elapsed = time.perf_counter() - start
+        summary = metrics.summary()
+        dropped = sum(
+            c["value"]
+            for c in summary["counters"]
+            if c["name"] == "batch_items_dropped"
+        )
+        print(
+            f"per call {questions_per_call:3d}  questions {len(state['evolved_questions']):5d}"
+            f"  calls {model.calls:5d}  prompt tokens {summary['prompt_tokens']:8d}"
+            f"  dropped items {dropped:4d}  seconds {elapsed:7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Memory and accuracy of embedding storage options.
+
+Compares the list-of-lists representation the loader used to keep in the
+state with EmbeddingStore at float32, float16 and int8, and reports recall@k
+of each store's FAISS index against exact float32 search:
+
+    python -m benchmarks.bench_embeddings --rows 20000 --dim 1536
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import List, Optional
+
+import numpy as np
+
+from agents.embedding_store import SUPPORTED_DTYPES, EmbeddingStore, quantization_recall
+
+from .fakes import FakeEmbeddings
+
+
+def _peak(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    embeddings = FakeEmbeddings(dim=args.dim)
+    texts = [f"page {i}" for i in range(args.rows)]
+    reference = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    queries = np.asarray(
+        [embeddings.embed_query(f"query {i}") for i in range(args.queries)],
+        dtype=np.float32,
+    )
+
+    peak = _peak(lambda: embeddings.embed_documents(texts))
+    print(f"{'list of lists':14s} peak {peak / 2**20:10.1f} MiB")
+    for dtype in SUPPORTED_DTYPES:
+        peak = _peak(lambda: EmbeddingStore.from_model(embeddings, texts, dtype=dtype))
+        store = EmbeddingStore.from_vectors(reference, dtype)
+        recall = quantization_recall(reference, store, queries, args.k)
+        print(
+            f"{dtype:14s} peak {peak / 2**20:10.1f} MiB  stored {store.nbytes / 2**20:10.1f} MiB"
+            f"  recall@{args.k} {recall:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Repeated PDF loads over HTTP with and without the PDF cache.
+
+Serves a synthetic PDF from a local HTTP server that supports ETag and
+If-Modified-Since, then loads it repeatedly with PyMuPDFLoader directly and
+through PDFCache:
+
+    python -m benchmarks.bench_pdf_cache --pages 200 --runs 5
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from agents.instrumentation import RunMetrics, activate
+from agents.pdf_cache import PDFCache
+
+from .corpus import write_synthetic_pdf
+
+
+class _ETagHandler(SimpleHTTPRequestHandler):
+    """Static file handler that also answers If-None-Match with 304."""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            with open(path, "rb") as handle:
+                etag = f'"{hashlib.sha256(handle.read()).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _timed(load) -> float:
+    start = time.perf_counter()
+    load()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from langchain_community.document_loaders import PyMuPDFLoader
+
+    with tempfile.TemporaryDirectory() as root:
+        serve_dir = os.path.join(root, "serve")
+        os.makedirs(serve_dir)
+        write_synthetic_pdf(os.path.join(serve_dir, "doc.pdf"), args.pages)
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), partial(_ETagHandler, directory=serve_dir)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/doc.pdf"
+        try:
+            direct = [
+                _timed(lambda: PyMuPDFLoader(file_path=url).load())
+                for _ in range(args.runs)
+            ]
+            cache = PDFCache(os.path.join(root, "cache"))
+            metrics = RunMetrics()
+            with activate(metrics):
+                cached = [
+                    _timed(lambda: cache.load_pages(url)) for _ in range(args.runs)
+                ]
+        finally:
+            server.shutdown()
+
+    print(f"{'direct':8s} " + " ".join(f"{s:7.3f}" for s in direct))
+    print(f"{'cached':8s} " + " ".join(f"{s:7.3f}" for s in cached))
+    print(
+        {c["name"]: c["value"] for c in metrics.summary()["counters"]},
+    )
+
+
+if __name__ == "__main__":
+    main()
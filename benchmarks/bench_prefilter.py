@@ -0,0 +1,86 @@
+"""
+Critic calls saved by the prefilter, and its agreement with the LLM critic.
+
+Generates questions with FakeChatModel (a share of them malformed), then
+critiques them without a prefilter, with the rule checks, and with rules plus
+a classifier trained on the first run's critic scores:
+
+    python -m benchmarks.bench_prefilter --questions 2000 --broken-rate 0.2
+"""
+
+import argparse
+from typing import List, Optional
+
+from agents.evolution_agent import generate_evolved_questions
+from agents.evolution_techniques import get_evolution_techniques
+from agents.prefilter import Prefilter, critic_history, train_prefilter_classifier
+from agents.question_critic_agent import critic_agent
+from agents.records import EvolvedQuestion, RecordStore
+
+from .corpus import synthetic_documents
+from .fakes import FakeChatModel
+
+
+def _fresh(questions):
+    return RecordStore(
+        EvolvedQuestion,
+        (
+            EvolvedQuestion(
+                q.id, q.original_question_id, q.evolved_question, q.evolution_type
+            )
+            for q in questions
+        ),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--broken-rate", type=float, default=0.2)
+    parser.add_argument("--audit-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    techniques = [(name, template, 0) for name, template in get_evolution_techniques()]
+    questions = generate_evolved_questions(
+        synthetic_documents(200),
+        techniques,
+        FakeChatModel(broken_rate=args.broken_rate),
+        args.questions,
+        args.questions,
+    )
+
+    baseline_critic = FakeChatModel()
+    baseline = critic_agent(
+        {"evolved_questions": questions},
+        baseline_critic,
+        max_validated_questions=len(questions),
+    )
+    print(
+        f"{'no prefilter':22s} critic calls {baseline_critic.calls:6d}"
+        f"  validated {len(baseline['validated_questions']):6d}"
+    )
+
+    classifier = train_prefilter_classifier(critic_history(questions))
+    for label, prefilter in (
+        ("rules", Prefilter(audit_rate=args.audit_rate)),
+        ("rules + classifier", Prefilter(classifier, audit_rate=args.audit_rate)),
+    ):
+        critic = FakeChatModel()
+        state = critic_agent(
+            {"evolved_questions": _fresh(questions)},
+            critic,
+            max_validated_questions=len(questions),
+            prefilter=prefilter,
+        )
+        report = prefilter.report()
+        agreement = report["agreement_rate"]
+        print(
+            f"{label:22s} critic calls {critic.calls:6d}"
+            f"  validated {len(state['validated_questions']):6d}"
+            f"  saved {report['saved_critic_calls']:6d}"
+            f"  agreement {agreement if agreement is not None else float('nan'):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Memory of question, context and answer records: dicts versus slotted records.
+
+    python -m benchmarks.bench_records --items 100000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import List, Optional
+
+from agents.records import Answer, EvolvedQuestion, RecordStore
+
+
+def _peak(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def _dicts(n: int):
+    questions = [
+        {
+            "id": f"q{i}",
+            "original_question_id": f"o{i}",
+            "evolved_question": "What changed?",
+            "evolution_type": "simple_question",
+        }
+        for i in range(n)
+    ]
+    answers = [
+        {
+            "id": f"q{i}",
+            "question": "What changed?",
+            "answer": "Revenue.",
+            "context": "",
+        }
+        for i in range(n)
+    ]
+    return questions, answers
+
+
+def _records(n: int):
+    questions = RecordStore(
+        EvolvedQuestion,
+        (
+            EvolvedQuestion(f"q{i}", f"o{i}", "What changed?", "simple_question")
+            for i in range(n)
+        ),
+    )
+    answers = RecordStore(
+        Answer, (Answer(f"q{i}", "What changed?", "Revenue.", "") for i in range(n))
+    )
+    return questions, answers
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    for label, build in (("dicts", _dicts), ("records", _records)):
+        peak = _peak(lambda: build(args.items))
+        print(f"{label:8s} {args.items:>8d} items  peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Per-worker memory of a corpus passed to worker processes versus a SharedCorpus.
+
+Starts N spawned worker processes that each search the whole index and read
+every page. In ``pickle`` mode the documents, embedding matrix and serialized
+index are sent to each worker as process arguments, as a process pool's
+initargs are; in ``shared`` mode each worker attaches to a SharedCorpus
+directory. Reports startup time and the mean RSS and PSS (resident memory
+with shared pages divided among the processes mapping them) per worker:
+
+    python -m benchmarks.bench_shared_corpus --pages 50000 --dim 768 --workers 1 2 4 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from agents.shared_corpus import SharedCorpus
+
+from .corpus import synthetic_documents
+
+
+def _memory_mb() -> Dict[str, float]:
+    """Reads RSS and PSS of this process from /proc (Linux only)."""
+    values = {}
+    for path, field in (
+        ("/proc/self/status", "VmRSS:"),
+        ("/proc/self/smaps_rollup", "Pss:"),
+    ):
+        with open(path) as handle:
+            for line in handle:
+                if line.startswith(field):
+                    values[field.rstrip(":").replace("Vm", "").lower()] = (
+                        int(line.split()[1]) / 1024
+                    )
+                    break
+    return values
+
+
+def _use(documents: Any, index: Any, queries: np.ndarray) -> int:
+    index.search(queries, 5)
+    return sum(len(documents[i].page_content) for i in range(len(documents)))
+
+
+def _pickled_worker(documents, matrix, index_bytes, queries, results, done) -> None:
+    import faiss
+
+    index = faiss.deserialize_index(index_bytes)
+    del index_bytes
+    _use(documents, index, queries)
+    results.put({"pid": os.getpid(), "ready": time.time(), **_memory_mb()})
+    done.wait()
+
+
+def _shared_worker(directory, queries, results, done) -> None:
+    corpus = SharedCorpus.attach(directory)
+    _use(corpus.documents, corpus.index, queries)
+    corpus.embeddings.rows(0, len(corpus))
+    results.put({"pid": os.getpid(), "ready": time.time(), **_memory_mb()})
+    done.wait()
+
+
+def _run(mode: str, workers: int, args: tuple) -> Dict[str, float]:
+    context = multiprocessing.get_context("spawn")
+    results, done = context.Queue(), context.Event()
+    target = _pickled_worker if mode == "pickle" else _shared_worker
+    start = time.time()
+    processes = [
+        context.Process(target=target, args=(*args, results, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return {
+        "startup_s": max(r["ready"] for r in reports) - start,
+        "rss_mb": sum(r["rss"] for r in reports) / workers,
+        "pss_mb": sum(r["pss"] for r in reports) / workers,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args(argv)
+
+    import faiss
+
+    rng = np.random.default_rng(0)
+    documents = synthetic_documents(args.pages, args.words)
+    matrix = rng.standard_normal((args.pages, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((4, args.dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as root:
+        corpus = SharedCorpus.create(root, documents, matrix)
+        index_bytes = faiss.serialize_index(
+            faiss.read_index(os.path.join(root, "index.faiss"))
+        )
+        print(
+            f"{args.pages} pages, {matrix.nbytes / 2**20:.0f} MB embeddings,"
+            f" {os.path.getsize(os.path.join(root, 'text.bin')) / 2**20:.0f} MB text"
+        )
+        print(
+            f"{'mode':8s} {'workers':>7s} {'startup s':>10s} {'RSS MB':>8s} {'PSS MB':>8s}"
+        )
+        for workers in args.workers:
+            for mode, mode_args in (
+                ("pickle", (documents, matrix, index_bytes, queries)),
+                ("shared", (corpus.directory, queries)),
+            ):
+                row = _run(mode, workers, mode_args)
+                print(
+                    f"{mode:8s} {workers:7d} {row['startup_s']:10.2f}"
+                    f" {row['rss_mb']:8.0f} {row['pss_mb']:8.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Offline throughput and memory benchmarks for each pipeline stage.
+
+Every stage runs against FakeChatModel/FakeEmbeddings and synthetic corpora,
+so no network access or API key is needed. Example:
+
+    python -m benchmarks.bench_stages --sizes 10 100 1000 --output bench.json
+
+For each stage and size the report contains wall time, items per second,
+peak traced memory and the scaling exponent against the previous size
+(about 1.0 for linear stages, 2.0 for quadratic ones).
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agents.answer_generator import answer_generator, group_by_context
+from agents.context_gathering import context_gathering
+from agents.document_loader import load_documents_and_generate_embeddings
+from agents.evolution_agent import generate_evolved_questions
+from agents.evolution_techniques import (
+    evolution_technique_names,
+    get_evolution_techniques,
+)
+from agents.export_agent import export_agent
+from agents.question_critic_agent import critic_agent
+
+from .corpus import synthetic_documents, write_synthetic_pdf
+from .fakes import FakeChatModel, FakeEmbeddings
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+# A stage builds its inputs for a given size outside the measured region and
+# returns a zero-argument callable that runs the stage once.
+StageSetup = Callable[[int, argparse.Namespace], Callable[[], object]]
+
+
+def _documents(n: int, args: argparse.Namespace):
+    return synthetic_documents(n, words=args.words_per_page, seed=args.seed)
+
+
+def _evolved_questions(n: int) -> List[Dict]:
+    techniques = evolution_technique_names()
+    return [
+        {
+            "id": f"q{i}",
+            "original_question_id": f"o{i}",
+            "evolved_question": f"What drove the change in segment {i} revenue?",
+            "evolution_type": techniques[i % len(techniques)],
+        }
+        for i in range(n)
+    ]
+
+
+def _contexts(questions: List[Dict], documents) -> List[Dict]:
+    return [
+        {
+            "id": q["id"],
+            "question": q["evolved_question"],
+            "contexts": [
+                documents[(i + j) % len(documents)].page_content for j in range(3)
+            ],
+        }
+        for i, q in enumerate(questions)
+    ]
+
+
+def setup_load_documents(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    path = os.path.join(args.workdir, f"corpus_{n}.pdf")
+    if not os.path.exists(path):
+        write_synthetic_pdf(path, n, words=args.words_per_page, seed=args.seed)
+    embeddings = FakeEmbeddings(dim=args.dim, seed=args.seed)
+    return lambda: load_documents_and_generate_embeddings(
+        {"pdf_path": path, "embedding_model": embeddings}
+    )
+
+
+def setup_generate_evolved_questions(
+    n: int, args: argparse.Namespace
+) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    model = FakeChatModel(seed=args.seed)
+    techniques = [(name, template, 0) for name, template in get_evolution_techniques()]
+    per_technique = math.ceil(n / len(techniques))
+    return lambda: generate_evolved_questions(
+        documents, techniques, model, n, per_technique
+    )
+
+
+def setup_critic_agent(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    questions = _evolved_questions(n)
+    model = FakeChatModel(seed=args.seed)
+    return lambda: critic_agent(
+        {"evolved_questions": questions}, model, max_validated_questions=n
+    )
+
+
+def setup_context_gathering(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    embeddings = FakeEmbeddings(dim=args.dim, seed=args.seed)
+    document_embeddings = embeddings.embed_documents(
+        [doc.page_content for doc in documents]
+    )
+    questions = _evolved_questions(n)
+    return lambda: context_gathering(
+        {
+            "embedding_model": embeddings,
+            "documents": documents,
+            "document_embeddings": document_embeddings,
+            "evolved_questions": questions,
+        }
+    )
+
+
+def setup_answer_generator(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    questions = _evolved_questions(n)
+    contexts = _contexts(questions, documents)
+    model = FakeChatModel(seed=args.seed)
+    return lambda: answer_generator(
+        {"model": model, "evolved_questions": questions, "contexts": contexts},
+        max_answers=n,
+    )
+
+
+def setup_group_by_context(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    questions = _evolved_questions(n)
+    items = [(c["id"], c["contexts"]) for c in _contexts(questions, documents)]
+    return lambda: group_by_context(items, max_group_size=8)
+
+
+def setup_grouped_answer_generator(
+    n: int, args: argparse.Namespace
+) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    questions = _evolved_questions(n)
+    contexts = _contexts(questions, documents)
+    model = FakeChatModel(seed=args.seed)
+    return lambda: answer_generator(
+        {"model": model, "evolved_questions": questions, "contexts": contexts},
+        max_answers=n,
+        answer_group_size=8,
+    )
+
+
+def setup_export_agent(n: int, args: argparse.Namespace) -> Callable[[], object]:
+    documents = _documents(min(n, args.max_pages), args)
+    questions = _evolved_questions(n)
+    contexts = _contexts(questions, documents)
+    answers = [
+        {
+            "id": q["id"],
+            "question": q["evolved_question"],
+            "answer": "Yes.",
+            "context": "",
+        }
+        for q in questions
+    ]
+    return lambda: export_agent(
+        {"evolved_questions": questions, "contexts": contexts, "answers": answers}
+    )
+
+
+STAGES: Dict[str, StageSetup] = {
+    "load_documents_and_generate_embeddings": setup_load_documents,
+    "generate_evolved_questions": setup_generate_evolved_questions,
+    "critic_agent": setup_critic_agent,
+    "context_gathering": setup_context_gathering,
+    "answer_generator": setup_answer_generator,
+    "group_by_context": setup_group_by_context,
+    "grouped_answer_generator": setup_grouped_answer_generator,
+    "export_agent": setup_export_agent,
+}
+
+
+def measure(
+    run: Callable[[], object], trace_memory: bool
+) -> Tuple[float, Optional[int]]:
+    """
+    Runs a stage once and returns its wall time and, optionally, peak traced memory.
+
+    Timing and memory come from separate runs because tracemalloc slows
+    allocation-heavy code down considerably.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    if not trace_memory:
+        return seconds, None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmarks(args: argparse.Namespace) -> List[Dict]:
+    results = []
+    for stage in args.stages:
+        setup = STAGES[stage]
+        previous = None
+        for n in sorted(args.sizes):
+            if (
+                stage == "load_documents_and_generate_embeddings"
+                and n > args.max_pdf_pages
+            ):
+                print(f"{stage:40s} {n:>8d}  skipped (--max-pdf-pages)")
+                continue
+            seconds, peak = measure(setup(n, args), args.memory)
+            exponent = (
+                math.log(seconds / previous[1]) / math.log(n / previous[0])
+                if previous and previous[1] > 0 and seconds > 0
+                else None
+            )
+            result = {
+                "stage": stage,
+                "items": n,
+                "seconds": seconds,
+                "items_per_second": n / seconds if seconds else None,
+                "peak_memory_bytes": peak,
+                "scaling_exponent": exponent,
+            }
+            results.append(result)
+            print(
+                f"{stage:40s} {n:>8d} {seconds:10.4f}s {result['items_per_second'] or 0:12.1f}/s"
+                + (f" {peak / 2**20:10.2f} MiB" if peak is not None else "")
+                + (f"  exp={exponent:.2f}" if exponent is not None else "")
+            )
+            previous = (n, seconds)
+            if seconds > args.stage_budget:
+                print(f"{stage:40s} stopping: exceeded --stage-budget")
+                break
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=list(STAGES)
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--dim", type=int, default=64, help="Embedding dimensionality.")
+    parser.add_argument("--words-per-page", type=int, default=250)
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=10_000,
+        help="Corpus size cap for stages whose item count is questions, not pages.",
+    )
+    parser.add_argument("--max-pdf-pages", type=int, default=10_000)
+    parser.add_argument(
+        "--stage-budget",
+        type=float,
+        default=60.0,
+        help="Stop growing a stage once a single run takes longer than this many seconds.",
+    )
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="Directory for synthetic PDFs.")
+    parser.add_argument(
+        "--output", default=None, help="Write results as JSON to this file."
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        args.workdir = args.workdir or tmp
+        results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
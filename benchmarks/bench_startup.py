@@ -0,0 +1,67 @@
+"""
+Cold-start import time of the agents package and each pipeline module.
+
+Every measurement runs in a fresh interpreter so module caches from earlier
+imports do not hide the cost:
+
+    python -m benchmarks.bench_startup --repeat 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Optional
+
+MODULES = [
+    "agents",
+    "agents.state_config",
+    "agents.instrumentation",
+    "agents.records",
+    "agents.embedding_store",
+    "agents.evolution_techniques",
+    "agents.evolution_agent",
+    "agents.question_critic_agent",
+    "agents.question_generator",
+    "agents.document_loader",
+    "agents.context_gathering",
+    "agents.answer_generator",
+    "agents.export_agent",
+]
+
+_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def import_seconds(module: str, repeat: int) -> List[float]:
+    return [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", _SNIPPET.format(module=module)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        for _ in range(repeat)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        samples = import_seconds(module, args.repeat)
+        print(
+            f"{module:32s} median {statistics.median(samples) * 1000:8.1f} ms"
+            f"  max {max(samples) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import random
+from typing import List
+
+from langchain_core.documents import Document
+
+_VOCABULARY = (
+    "revenue income margin quarter fiscal operating expenses segment growth cash "
+    "liquidity guidance customers products services inventory supply demand "
+    "research development acquisition goodwill impairment tax rate dividend share "
+    "repurchase debt interest currency exchange risk litigation regulation market "
+    "cloud devices software subscription advertising hardware retail wholesale "
+    "europe americas asia pacific increase decrease compared prior period primarily"
+).split()
+
+
+def synthetic_page(page: int, words: int = 250, seed: int = 0) -> str:
+    """
+    Generates the text of one synthetic filing page.
+
+    Args:
+        page (int): The page number, mixed into the seed.
+        words (int): Number of words on the page.
+        seed (int): Corpus seed.
+
+    Returns:
+        str: The page text.
+    """
+    rng = random.Random(seed * 1_000_003 + page)
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < words:
+        length = rng.randint(8, 20)
+        sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(length))
+        figure = rng.randint(1, 999)
+        sentences.append(f"{sentence.capitalize()} by {figure} million.")
+    return " ".join(sentences)
+
+
+def synthetic_documents(
+    pages: int, words: int = 250, seed: int = 0, source: str = "synthetic.pdf"
+) -> List[Document]:
+    """
+    Generates a corpus shaped like the output of PyMuPDFLoader.
+
+    Args:
+        pages (int): Number of pages.
+        words (int): Words per page.
+        seed (int): Corpus seed.
+        source (str): Value of the ``source`` metadata field.
+
+    Returns:
+        List[Document]: One document per page.
+    """
+    return [
+        Document(
+            page_content=synthetic_page(page, words, seed),
+            metadata={"source": source, "page": page, "total_pages": pages},
+        )
+        for page in range(pages)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text: str, width: int = 90) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_synthetic_pdf(path: str, pages: int, words: int = 250, seed: int = 0) -> str:
+    """
+    Writes a text-only PDF with the same pages as :func:`synthetic_documents`.
+
+    The file is assembled by hand so no PDF library is needed to create it.
+
+    Args:
+        path (str): Destination file.
+        pages (int): Number of pages.
+        words (int): Words per page.
+        seed (int): Corpus seed.
+
+    Returns:
+        str: ``path``.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once the page object numbers are known.
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        commands = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for line in _wrap(synthetic_page(page, words, seed)):
+            commands.append(f"({_escape(line)}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as handle:
+        handle.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(handle.tell())
+            handle.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = handle.tell()
+        handle.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            handle.write(b"%010d 00000 n \n" % offset)
+        handle.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref)
+        )
+    return path
@@ -0,0 +1,238 @@
+import json
+import random
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.messages import AIMessage
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+# Word placed in malformed outputs so the fake critic can score them low.
+_BROKEN_MARKER = "mentions"
+_BATCH_REQUEST = re.compile(r"^\s*\d+\. ([a-z_]+): ", re.MULTILINE)
+_NUMBERED = re.compile(r"^\s*(\d+)\. ", re.MULTILINE)
+
+
+class FakeModelError(RuntimeError):
+    """Raised by the fake models to simulate a failed API call."""
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("\x1f".join(parts).encode("utf-8"))
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _FakeLatency:
+    def __init__(self, latency: float, jitter: float, error_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.calls = 0
+
+    def simulate(self, key: str) -> None:
+        self.calls += 1
+        rng = random.Random(_seed(str(self.seed), str(self.calls), key))
+        delay = (
+            self.latency + rng.uniform(0, self.jitter) if self.jitter else self.latency
+        )
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and rng.random() < self.error_rate:
+            raise FakeModelError(f"Simulated failure on call {self.calls}")
+
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for a chat model.
+
+    Responses depend only on the prompt and ``seed``. The model recognises the
+    critic, answer, group answer and batch evolution prompts used by the
+    agents and otherwise returns a question built from words of the prompt's context.
+
+    Args:
+        model_name (str): Name reported to the instrumentation layer.
+        latency (float): Seconds to sleep per call.
+        jitter (float): Extra random latency of up to this many seconds.
+        error_rate (float): Probability that a call raises FakeModelError.
+        accept_rate (float): Probability that a critic call scores a question as valid.
+        broken_rate (float): Probability that a generated question is malformed
+            (empty, labelled, not a question or several questions run together).
+        seed (int): Seed for every random decision.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake-chat",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        accept_rate: float = 0.7,
+        broken_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.model_name = model_name
+        self.accept_rate = accept_rate
+        self.broken_rate = broken_rate
+        self.seed = seed
+        self._latency = _FakeLatency(latency, jitter, error_rate, seed)
+
+    @property
+    def calls(self) -> int:
+        return self._latency.calls
+
+    def invoke(self, prompt) -> AIMessage:
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        self._latency.simulate(prompt)
+        rng = random.Random(_seed(str(self.seed), prompt))
+        content = self._respond(prompt, rng)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": _count_tokens(prompt),
+                "output_tokens": _count_tokens(content),
+                "total_tokens": _count_tokens(prompt) + _count_tokens(content),
+            },
+        )
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        if "Critique the synthetically generated question" in prompt:
+            question = prompt.rsplit("Question:", 1)[-1].split("Feedback:", 1)[0]
+            if _BROKEN_MARKER in question:
+                return '{"Independence": 0, "Clear Intent": 0}'
+            score = 2 if rng.random() < self.accept_rate else rng.choice([0, 1])
+            return f'{{"Independence": {score}, "Clear Intent": {score}}}'
+        if "Answer each numbered question" in prompt:
+            return self._respond_group_answer(prompt, rng)
+        words = _WORD.findall(prompt.rsplit("Context:", 1)[-1])
+        if "Provide a detailed answer" in prompt:
+            return "The context states that " + " ".join(words[:40]) + "."
+        if "Return a JSON array" in prompt:
+            return self._respond_batch(prompt, words, rng)
+        return self._question(words, rng)
+
+    def _question(self, words: List[str], rng: random.Random) -> str:
+        subject = " ".join(rng.sample(words, min(3, len(words)))) or "this document"
+        question = f"What does the document say about {subject}?"
+        if self.broken_rate and rng.random() < self.broken_rate:
+            return rng.choice(
+                [
+                    "",
+                    f"Evolved Question: {question}",
+                    f"The document {_BROKEN_MARKER} {subject}.",
+                    f"{question} {question} Why {_BROKEN_MARKER}?",
+                ]
+            )
+        return question
+
+    def _respond_group_answer(self, prompt: str, rng: random.Random) -> str:
+        questions, contexts = prompt.split("Questions:", 1)[-1].split("Contexts:", 1)
+        words = _WORD.findall(contexts)
+        items = [
+            json.dumps(
+                {
+                    "number": int(number),
+                    "answer": "The context states that "
+                    + " ".join(rng.sample(words, min(40, len(words))))
+                    + ".",
+                }
+            )
+            for number in _NUMBERED.findall(questions)
+        ]
+        if self.broken_rate and items and rng.random() < self.broken_rate:
+            return "[" + ", ".join(items)[:-12]
+        return "[" + ", ".join(items) + "]"
+
+    def _respond_batch(self, prompt: str, words: List[str], rng: random.Random) -> str:
+        requests = _BATCH_REQUEST.findall(prompt.split("Context:", 1)[0])
+        items = [
+            json.dumps({"technique": name, "question": self._question(words, rng)})
+            for name in requests
+        ]
+        if self.broken_rate and items and rng.random() < self.broken_rate:
+            # Cut the array off inside its last item.
+            return "[" + ", ".join(items)[:-12]
+        return "[" + ", ".join(items) + "]"
+
+
+class FakeEmbeddings:
+    """
+    Deterministic stand-in for an embedding model.
+
+    Each text maps to a fixed unit vector derived from its CRC32, so equal
+    texts always embed identically.
+
+    Args:
+        dim (int): Embedding dimensionality.
+        latency (float): Seconds to sleep per ``embed_documents``/``embed_query`` call.
+        error_rate (float): Probability that a call raises FakeModelError.
+        seed (int): Seed mixed into every vector.
+    """
+
+    def __init__(
+        self,
+        dim: int = 64,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        model_name: Optional[str] = "fake-embeddings",
+    ):
+        self.dim = dim
+        self.seed = seed
+        self.model_name = model_name
+        self._latency = _FakeLatency(latency, 0.0, error_rate, seed)
+
+    @property
+    def calls(self) -> int:
+        return self._latency.calls
+
+    def _vector(self, text: str) -> np.ndarray:
+        rng = np.random.default_rng(_seed(str(self.seed), text))
+        vector = rng.standard_normal(self.dim, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._latency.simulate(str(len(texts)))
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._latency.simulate(text)
+        return self._vector(text).tolist()
+
+
+def fake_model_factory(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Model factory for ``evol-aie4 run --model-factory benchmarks.fakes:fake_model_factory``.
+
+    Reads optional ``fake_latency``, ``fake_error_rate`` and ``fake_accept_rate``
+    keys from the CLI config. ``fake_latencies`` and ``fake_broken_rates`` set
+    per-model latency and broken-output rates, for example to make the cheap
+    tier of a ``model_tiers`` cascade faster and less reliable.
+    """
+    from agents.cli import tiered_model
+
+    latencies = config.get("fake_latencies", {})
+    broken_rates = config.get("fake_broken_rates", {})
+
+    def build(name: str) -> FakeChatModel:
+        return FakeChatModel(
+            name,
+            latency=latencies.get(name, config.get("fake_latency", 0.0)),
+            error_rate=config.get("fake_error_rate", 0.0),
+            accept_rate=config.get("fake_accept_rate", 0.7),
+            broken_rate=broken_rates.get(name, 0.0),
+        )
+
+    return {
+        "model": tiered_model(config, "model", build),
+        "critic_model": tiered_model(config, "critic_model", build),
+        "embedding_model": FakeEmbeddings(
+            latency=config.get("fake_latency", 0.0),
+            error_rate=config.get("fake_error_rate", 0.0),
+        ),
+    }
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from agents.adaptive_generation import (
+    AcceptanceTracker,
+    generate_validated_questions,
+    plan_wave,
+)
+from agents.evolution_techniques import get_evolution_technique
+from agents.instrumentation import RunMetrics, activate
+from benchmarks.corpus import synthetic_documents
+from benchmarks.fakes import FakeChatModel
+
+TECHNIQUES = {f"technique_{i}": 1.0 for i in range(12)}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_plan_wave_expected_calls_for_last_question(seed):
+    # Each technique starts at a 0.5 acceptance rate: two calls are expected.
+    plan = plan_wave(1, TECHNIQUES, AcceptanceTracker(), 100, random.Random(seed))
+    assert sum(plan.values()) == 2
+
+
+@pytest.mark.parametrize("max_wave_size", [1, 2, 3])
+def test_plan_wave_respects_cap(max_wave_size):
+    plan = plan_wave(
+        10, TECHNIQUES, AcceptanceTracker(), max_wave_size, random.Random(0)
+    )
+    assert sum(plan.values()) == max_wave_size
+
+
+def test_plan_wave_follows_weights_and_rates():
+    tracker = AcceptanceTracker()
+    for _ in range(8):
+        tracker.record("hard", False)
+    plan = plan_wave(10, {"easy": 1.0, "hard": 1.0}, tracker, 1000, random.Random(0))
+    # easy: 5 / 0.5 = 10 calls; hard: 5 / 0.1 = 50 calls.
+    assert plan == {"easy": 10, "hard": 50}
+
+
+def test_plan_wave_leftover_calls_are_spread():
+    counts = dict.fromkeys(TECHNIQUES, 0)
+    for seed in range(1200):
+        plan = plan_wave(1, TECHNIQUES, AcceptanceTracker(), 100, random.Random(seed))
+        for technique, calls in plan.items():
+            counts[technique] += calls
+    assert min(counts.values()) > 150
+
+
+def _techniques():
+    return [get_evolution_technique("simple_question") + (1.0,)]
+
+
+def test_failed_tasks_are_counted_against_the_budget():
+    metrics = RunMetrics()
+    with activate(metrics):
+        evolved, validated = generate_validated_questions(
+            synthetic_documents(1, 60),
+            _techniques(),
+            FakeChatModel("generator", error_rate=0.5),
+            FakeChatModel("critic", accept_rate=1.0),
+            target=5,
+            max_concurrency=1,
+        )
+    assert len(validated) == 5
+    assert metrics.counter("generation_failures") > 0
+
+
+def test_generation_stops_at_the_budget_when_every_task_fails():
+    generator = FakeChatModel("generator", error_rate=1.0)
+    metrics = RunMetrics()
+    with activate(metrics):
+        evolved, validated = generate_validated_questions(
+            synthetic_documents(4, 60),
+            _techniques(),
+            generator,
+            FakeChatModel("critic"),
+            target=2,
+            max_generation_calls=12,
+        )
+    assert len(evolved) == len(validated) == 0
+    assert generator.calls == metrics.counter("generation_failures") == 12
@@ -0,0 +1,69 @@
+from langchain_core.messages import AIMessage
+
+from agents.answer_generator import (
+    create_group_answer_prompt,
+    generate_group_answers,
+    group_by_context,
+)
+
+
+class _Reply:
+    model_name = "reply"
+
+    def __init__(self, text):
+        self.text = text
+
+    def invoke(self, prompt):
+        return AIMessage(content=self.text)
+
+
+def test_group_answers_with_raw_newlines():
+    model = _Reply(
+        '[{"number": 1, "answer": "Revenue grew.\nMostly in Europe."},'
+        ' {"number": 2, "answer": "By 4%."}]'
+    )
+    answers = generate_group_answers(
+        ["What grew?", "By how much?"],
+        ["Revenue grew 4%, mostly in Europe."],
+        create_group_answer_prompt(),
+        model,
+    )
+    assert answers == ["Revenue grew.\nMostly in Europe.", "By 4%."]
+
+
+def _ids(groups):
+    return [[item[0] for item in group] for group in groups]
+
+
+def test_group_by_context_joins_overlapping_questions():
+    items = [
+        ("a", ["p1", "p2"]),
+        ("b", ["p3", "p4"]),
+        ("c", ["p2", "p5"]),
+        ("d", ["p6", "p7"]),
+        ("e", ["p3", "p4"]),
+    ]
+    assert _ids(group_by_context(items, max_group_size=4)) == [
+        ["a", "c"],
+        ["b", "e"],
+        ["d"],
+    ]
+
+
+def test_group_by_context_requires_half_overlap():
+    items = [("a", ["p1", "p2", "p3"]), ("b", ["p1", "p4", "p5"])]
+    assert _ids(group_by_context(items, max_group_size=4)) == [["a"], ["b"]]
+
+
+def test_group_by_context_limits():
+    items = [(str(i), ["p1"]) for i in range(5)]
+    assert _ids(group_by_context(items, max_group_size=2)) == [
+        ["0", "1"],
+        ["2", "3"],
+        ["4"],
+    ]
+    items = [("a", ["p1", "p2"]), ("b", ["p2", "p3"]), ("c", ["p3", "p4"])]
+    assert _ids(group_by_context(items, 8, max_group_contexts=3)) == [
+        ["a", "b"],
+        ["c"],
+    ]
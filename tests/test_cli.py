@@ -0,0 +1,96 @@
+import json
+import os
+import random
+
+import pytest
+
+from agents import shared_corpus
+from agents.cli import main
+from benchmarks.corpus import write_synthetic_pdf
+
+FAKES = ["--model-factory", "benchmarks.fakes:fake_model_factory"]
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    random.seed(0)
+    paths = []
+    for name, pages in (("alpha", 4), ("beta", 6)):
+        path = str(tmp_path / f"{name}.pdf")
+        write_synthetic_pdf(path, pages, words=60)
+        paths.append(path)
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("\n".join(paths) + "\n")
+    yield paths, str(manifest)
+    shared_corpus._ATTACHED.clear()
+
+
+def _jsonl(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_run(tmp_path, pdfs):
+    _, manifest = pdfs
+    output_dir = str(tmp_path / "out")
+    code = main(
+        ["run", manifest, "--output-dir", output_dir, "--max-evolved-questions", "4"]
+        + FAKES
+    )
+    assert code == 0
+
+    with open(os.path.join(output_dir, "batch_summary.json")) as handle:
+        summary = json.load(handle)
+    assert (summary["jobs"], summary["succeeded"]) == (2, 2)
+    assert [r["id"] for r in summary["results"]] == ["00000_alpha", "00001_beta"]
+    for result in summary["results"]:
+        records = _jsonl(os.path.join(output_dir, f"{result['id']}.jsonl"))
+        assert 0 < len(records) == result["questions"] <= 4
+        assert all(record["evolved_question"] for record in records)
+        assert os.path.exists(os.path.join(output_dir, f"{result['id']}.metrics.json"))
+
+
+def test_shard_plan_work_merge(tmp_path, pdfs, capsys):
+    _, manifest = pdfs
+    queue = str(tmp_path / "queue.db")
+    output = str(tmp_path / "questions.jsonl")
+
+    assert (
+        main(
+            ["shard", "plan", queue, manifest, "--questions-per-technique", "2"]
+            + ["--techniques", "simple_question", "--pages-per-shard", "3"]
+        )
+        == 0
+    )
+    assert "Queued 3 units for 2 documents." in capsys.readouterr().out
+    assert main(["shard", "work", queue] + FAKES) == 0
+    assert "done: 3" in capsys.readouterr().out
+    assert main(["shard", "merge", queue, output, "--include-rejected"]) == 0
+
+    rows = _jsonl(output)
+    assert 0 < len(rows) <= 4
+    assert {row["evolution_type"] for row in rows} == {"simple_question"}
+
+
+def test_corpus_build_feeds_run(tmp_path, pdfs):
+    paths, _ = pdfs
+    corpus_dir = str(tmp_path / "corpus")
+    assert main(["corpus", "build", paths[1], corpus_dir] + FAKES) == 0
+    corpus = shared_corpus.SharedCorpus.attach(corpus_dir)
+    assert (len(corpus), corpus.source) == (6, paths[1])
+
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"state": {"shared_corpus": corpus_dir}}))
+    manifest = tmp_path / "beta.txt"
+    manifest.write_text(paths[1] + "\n")
+    output_dir = str(tmp_path / "out")
+    code = main(
+        ["run", str(manifest), "--config", str(config), "--output-dir", output_dir]
+        + ["--max-evolved-questions", "3"]
+        + FAKES
+    )
+    assert code == 0
+    with open(os.path.join(output_dir, "batch_summary.json")) as handle:
+        (result,) = json.load(handle)["results"]
+    assert (result["status"], result["pages"]) == ("ok", 6)
+    assert result["questions"] > 0
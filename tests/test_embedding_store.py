@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from agents.embedding_store import EmbeddingStore, quantization_recall
+
+
+def _vectors(rows=200, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((rows, dim), dtype=np.float32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_mmap_round_trip(tmp_path, dtype):
+    vectors = _vectors()
+    path = str(tmp_path / "embeddings.npy")
+    store = EmbeddingStore.allocate(len(vectors), vectors.shape[1], dtype, path)
+    for start in range(0, len(vectors), 64):
+        store.set_rows(start, vectors[start : start + 64])
+    store.flush(path)
+
+    opened = EmbeddingStore.open(path)
+    assert (len(opened), opened.dim, opened.dtype) == (200, 32, dtype)
+    assert isinstance(opened.data, np.memmap)
+    np.testing.assert_array_equal(opened.rows(), store.rows())
+    np.testing.assert_array_equal(opened[7], store.rows(7, 8)[0])
+
+
+@pytest.mark.parametrize(
+    "dtype, bytes_per_value, tolerance",
+    [("float32", 4, 0.0), ("float16", 2, 1e-3), ("int8", 1, 1e-2)],
+)
+def test_from_vectors_quantization_error(dtype, bytes_per_value, tolerance):
+    vectors = _vectors()
+    store = EmbeddingStore.from_vectors(vectors, dtype)
+    assert store.data.nbytes == vectors.size * bytes_per_value
+    scale = np.abs(vectors).max(axis=1, keepdims=True)
+    assert np.abs(store.rows() - vectors).max() <= (tolerance * scale).max()
+    np.testing.assert_array_equal(
+        store.take(np.array([3, 150])), store.rows()[[3, 150]]
+    )
+
+
+def test_quantization_recall():
+    vectors = _vectors(400)
+    database, queries = vectors[::2], vectors[1::2]
+    exact = EmbeddingStore.from_vectors(database)
+    assert quantization_recall(database, exact, queries) == 1.0
+    assert (
+        quantization_recall(
+            database, EmbeddingStore.from_vectors(database, "int8"), queries
+        )
+        >= 0.9
+    )
+
+
+def test_quantizer_is_trained_on_rows_across_the_matrix():
+    vectors = _vectors(512)
+    # Rows added late lie outside the value range of the first chunk.
+    vectors[256:] += 50.0
+    store = EmbeddingStore.from_vectors(vectors, "int8")
+    index = store.build_index(chunk_size=64)
+    late = vectors[256:]
+    _, found = index.search(late, 1)
+    assert (found[:, 0] == np.arange(256, 512)).mean() >= 0.95
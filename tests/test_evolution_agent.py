@@ -0,0 +1,71 @@
+import random
+
+from agents.evolution_agent import (
+    generate_evolved_questions_batched,
+    parse_batch_questions,
+)
+from agents.evolution_techniques import get_evolution_technique
+from agents.instrumentation import RunMetrics, activate
+from agents.prefilter import rule_check
+from benchmarks.corpus import synthetic_documents
+from benchmarks.fakes import FakeChatModel
+
+TECHNIQUES = ["simple_question", "reasoning_question"]
+
+
+def test_parses_array():
+    text = (
+        '```json\n[{"technique": "reasoning_question", "question": "Why did it grow?"},'
+        ' {"technique": "simple_question", "question": "What grew?"}]\n```'
+    )
+    assert sorted(parse_batch_questions(text, TECHNIQUES)) == [
+        ("reasoning_question", "Why did it grow?"),
+        ("simple_question", "What grew?"),
+    ]
+
+
+def test_raw_newline_inside_question():
+    text = '[{"technique":"simple_question","question":"What is the\nrevenue growth?"}]'
+    assert parse_batch_questions(text, TECHNIQUES) == [
+        ("simple_question", "What is the\nrevenue growth?")
+    ]
+
+
+def test_salvages_truncated_array():
+    text = (
+        '[{"technique": "simple_question", "question": "What grew?"},'
+        ' {"technique": "reasoning_question", "question": "Why did it'
+    )
+    assert parse_batch_questions(text, TECHNIQUES) == [
+        ("simple_question", "What grew?")
+    ]
+
+
+def test_salvages_question_from_broken_item():
+    text = (
+        '[{"technique": simple_question, "question": "What grew?"},'
+        ' {"technique": "reasoning_question", "question": "Bad \\escape?"}'
+    )
+    assert parse_batch_questions(text, TECHNIQUES) == [
+        ("simple_question", "What grew?")
+    ]
+
+
+def test_batched_generation_applies_rule_checks():
+    random.seed(0)
+    techniques = [get_evolution_technique(name) + (1.0,) for name in TECHNIQUES]
+    metrics = RunMetrics()
+    with activate(metrics):
+        questions = generate_evolved_questions_batched(
+            synthetic_documents(50, 60),
+            techniques,
+            FakeChatModel(broken_rate=0.5),
+            max_evolved_questions=8,
+            max_evolutions_per_technique=4,
+            questions_per_call=4,
+        )
+    assert len(questions) == 8
+    assert all(
+        rule_check(q.evolved_question, q.evolution_type) is None for q in questions
+    )
+    assert metrics.counter("batch_items_rejected") > 0
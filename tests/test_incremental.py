@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from agents import incremental
+from agents.corpus_index import CorpusDiff, IncrementalCorpus, page_hash
+from agents.context_gathering import context_gathering
+from agents.document_loader import load_documents_and_generate_embeddings
+from agents.graph import initialize_state
+from agents.incremental import (
+    classify_records,
+    incremental_update,
+    load_outputs,
+    load_query_vectors,
+)
+from agents.instrumentation import RunMetrics
+from agents.records import ExportRecord, RecordStore
+from benchmarks.corpus import synthetic_page, write_synthetic_pdf
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+
+
+def _record(id_, source_id, context_ids):
+    return ExportRecord(
+        id=id_,
+        evolved_question=f"Question {id_}?",
+        evolution_type="simple_question",
+        answer="An answer.",
+        contexts=[],
+        source_id=source_id,
+        context_ids=context_ids,
+    )
+
+
+def test_classify_records():
+    records = RecordStore(
+        ExportRecord,
+        [
+            _record("gone", "a", ["a", "b"]),
+            _record("stale", "b", ["b", "c"]),
+            _record("kept", "b", ["b"]),
+            _record("legacy", None, None),
+        ],
+    )
+    dropped, stale, kept = classify_records(
+        records, CorpusDiff(added=["d"], removed=["a", "c"], unchanged=["b"])
+    )
+    assert [r.id for r in dropped] == ["gone"]
+    assert [r.id for r in stale] == ["stale"]
+    assert [r.id for r in kept] == ["kept", "legacy"]
+
+
+def _run(pdf_path, corpus_dir, embeddings=None, metrics=None):
+    state = initialize_state(
+        pdf_path,
+        embeddings or FakeEmbeddings(),
+        FakeChatModel("fake-generator"),
+        FakeChatModel("fake-critic", accept_rate=1.0),
+        max_evolved_questions=8,
+        max_evolutions_per_technique=2,
+        corpus_dir=corpus_dir,
+        metrics=metrics,
+    )
+    return incremental_update(load_documents_and_generate_embeddings(state))
+
+
+def test_failed_update_is_retried(tmp_path, monkeypatch):
+    corpus_dir = str(tmp_path / "corpus")
+    pdf_path = write_synthetic_pdf(str(tmp_path / "doc.pdf"), 12, words=80)
+    first = _run(pdf_path, corpus_dir)
+    assert len(load_outputs(corpus_dir)) == len(first["final_output"]) > 0
+
+    write_synthetic_pdf(pdf_path, 5, words=80)
+    removed = {page_hash(synthetic_page(page, 80)) for page in range(5, 12)}
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(incremental, "save_outputs", fail)
+    with pytest.raises(RuntimeError):
+        _run(pdf_path, corpus_dir)
+    assert len(IncrementalCorpus(corpus_dir)) == 12
+    monkeypatch.undo()
+
+    state = _run(pdf_path, corpus_dir)
+    assert state["corpus_diff"].changed
+    assert not any(r.source_id in removed for r in load_outputs(corpus_dir))
+    assert len(IncrementalCorpus(corpus_dir)) == 5
+
+
+def test_added_pages_recheck_only_affected_questions(tmp_path):
+    random.seed(0)
+    corpus_dir = str(tmp_path / "corpus")
+    pdf_path = write_synthetic_pdf(str(tmp_path / "doc.pdf"), 12, words=80)
+    first = _run(pdf_path, corpus_dir)
+    assert set(load_query_vectors(corpus_dir)) == {
+        r["id"] for r in first["final_output"]
+    }
+
+    write_synthetic_pdf(pdf_path, 13, words=80)
+    embeddings, metrics = FakeEmbeddings(), RunMetrics()
+    state = _run(pdf_path, corpus_dir, embeddings, metrics)
+    assert len(state["corpus_diff"].added) == 1
+
+    # One call embeds the added page. Saved question embeddings are reused, so
+    # only new questions are embedded, however many answers are regenerated.
+    assert embeddings.calls == 1 + metrics.counter("questions_added")
+    assert metrics.counter("questions_kept") > 0
+
+    # Every saved record has the contexts a full retrieval would give now.
+    outputs = load_outputs(corpus_dir)
+    check = context_gathering(
+        {
+            **state,
+            "embedding_model": FakeEmbeddings(),
+            "evolved_questions": [
+                {"id": r.id, "evolved_question": r.evolved_question} for r in outputs
+            ],
+            "query_vectors": None,
+        }
+    )
+    for record in outputs:
+        assert check["contexts"][record.id].context_ids == record.context_ids
+    assert set(load_query_vectors(corpus_dir)) == set(outputs.ids())
@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents.instrumentation import (
+    RunMetrics,
+    activate,
+    instrument_node,
+    invoke_model,
+    retry_policy,
+)
+
+
+class _Flaky:
+    model_name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+
+    def invoke(self, prompt):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("transient")
+        return AIMessage(content="ok")
+
+
+def test_no_retries_by_default():
+    with pytest.raises(ConnectionError):
+        invoke_model(_Flaky(1), "prompt", "answer")
+
+
+def test_retry_policy_retries_and_counts():
+    metrics = RunMetrics()
+    with activate(metrics), retry_policy(2, backoff=0):
+        assert invoke_model(_Flaky(2), "prompt", "answer").content == "ok"
+    assert metrics.counter("retries", "answer") == 2
+
+    with retry_policy(1, backoff=0), pytest.raises(ConnectionError):
+        invoke_model(_Flaky(2), "prompt", "answer")
+
+
+def test_nodes_take_the_policy_from_the_state():
+    @instrument_node("node")
+    def node(state):
+        state["result"] = invoke_model(state["model"], "prompt", "node").content
+        return state
+
+    metrics = RunMetrics()
+    state = node(
+        {"model": _Flaky(1), "metrics": metrics, "max_retries": 1, "retry_backoff": 0}
+    )
+    assert state["result"] == "ok"
+    assert metrics.counter("retries", "node") == 1
@@ -0,0 +1,136 @@
+import pytest
+
+from agents.answer_generator import create_group_answer_prompt, generate_group_answers
+from agents.corpus_index import page_hash
+from agents.evolution_agent import (
+    apply_batch_evolution,
+    apply_evolution,
+    create_batch_evolution_prompt,
+    create_evolved_question,
+)
+from agents.evolution_techniques import get_evolution_technique
+from agents.instrumentation import RunMetrics, activate
+from agents.model_router import ModelRouter, escalate_rejected_questions
+from agents.records import EvolvedQuestion, RecordStore
+from benchmarks.corpus import synthetic_documents
+from benchmarks.fakes import FakeChatModel
+
+PAGE = synthetic_documents(1, 80)[0].page_content
+TECHNIQUES = ["simple_question"] * 4
+
+
+def _router(small_broken_rate):
+    small = FakeChatModel("small", broken_rate=small_broken_rate)
+    large = FakeChatModel("large")
+    prices = {
+        "small": {"prompt": 0.0, "completion": 0.0},
+        "large": {"prompt": 1.0, "completion": 2.0},
+    }
+    return ModelRouter([small, large], prices=prices), small, large
+
+
+def test_batch_evolution_stays_on_a_tier_that_passes():
+    router, small, large = _router(0.0)
+    metrics = RunMetrics()
+    with activate(metrics):
+        questions = apply_batch_evolution(
+            PAGE, TECHNIQUES, create_batch_evolution_prompt(), router
+        )
+    assert len(questions) == 4
+    assert (small.calls, large.calls) == (1, 0)
+    assert metrics.counter("escalations", "evolution") == 0
+
+
+def test_batch_evolution_escalates_broken_output():
+    router, small, large = _router(1.0)
+    metrics = RunMetrics()
+    with activate(metrics):
+        questions = apply_batch_evolution(
+            PAGE, TECHNIQUES, create_batch_evolution_prompt(), router
+        )
+    assert len(questions) == 4
+    assert (small.calls, large.calls) == (1, 1)
+    assert metrics.counter("escalations", "evolution") == 1
+
+
+def test_group_answers_escalate_unparseable_output():
+    router, small, large = _router(1.0)
+    metrics = RunMetrics()
+    with activate(metrics):
+        answers = generate_group_answers(
+            ["What is revenue?", "What is margin?"],
+            [PAGE],
+            create_group_answer_prompt(),
+            router,
+        )
+    assert all(answers)
+    assert (small.calls, large.calls) == (1, 1)
+    assert metrics.counter("escalations", "answer") == 1
+
+
+def test_report_compares_against_the_top_tier():
+    router, _, _ = _router(1.0)
+    metrics = RunMetrics()
+    with activate(metrics):
+        apply_batch_evolution(PAGE, TECHNIQUES, create_batch_evolution_prompt(), router)
+    report = router.report(metrics)
+    stage = report["stages"]["evolution"]
+    assert stage["calls"] == {"small": 1, "large": 1}
+    assert stage["escalations"] == 1
+
+    calls = {
+        entry["model"]: entry
+        for entry in metrics.summary()["llm_calls"]
+        if entry["stage"] == "evolution"
+    }
+    large = calls["large"]
+    assert stage["cost"] == pytest.approx(
+        (large["prompt_tokens"] + 2 * large["completion_tokens"]) / 1e6
+    )
+    # One request was made; the baseline sends it to the top tier once.
+    prompt_tokens = sum(entry["prompt_tokens"] for entry in calls.values())
+    completion_tokens = sum(entry["completion_tokens"] for entry in calls.values())
+    assert stage["baseline_cost"] == pytest.approx(
+        (prompt_tokens + 2 * completion_tokens) / 2 / 1e6
+    )
+    assert report["cost_saved"] == pytest.approx(stage["baseline_cost"] - stage["cost"])
+
+
+def test_regenerations_are_counted_apart_from_escalations():
+    router, small, large = _router(0.0)
+    name, prompt_template = get_evolution_technique("simple_question")
+    question = create_evolved_question("q", name, "Rejected?", page_hash(PAGE))
+    evolved = RecordStore(EvolvedQuestion, [question])
+    validated = RecordStore(EvolvedQuestion)
+    metrics = RunMetrics()
+    with activate(metrics):
+        apply_evolution(
+            "",
+            PAGE,
+            prompt_template.template,
+            prompt_template.input_variables,
+            prompt_template,
+            router,
+            technique=name,
+        )
+        recovered = escalate_rejected_questions(
+            evolved,
+            validated,
+            synthetic_documents(1, 80),
+            router,
+            FakeChatModel("critic", accept_rate=1.0),
+        )
+    assert recovered == 1 and question.id in validated
+    assert (small.calls, large.calls) == (1, 1)
+    assert metrics.counter("escalations", "evolution") == 0
+    assert metrics.counter("regenerations", "evolution") == 1
+
+    stage = router.report(metrics)["stages"]["evolution"]
+    assert stage["regenerations"] == 1
+    # The regeneration is extra work: the baseline covers one request.
+    (large_calls,) = [
+        entry
+        for entry in metrics.summary()["llm_calls"]
+        if entry["model"] == "large" and entry["stage"] == "evolution"
+    ]
+    assert stage["baseline_seconds"] == pytest.approx(large_calls["total_seconds"])
@@ -0,0 +1,105 @@
+import os
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from agents.instrumentation import RunMetrics, activate
+from agents.pdf_cache import PDFCache
+from benchmarks.bench_pdf_cache import _ETagHandler
+from benchmarks.corpus import write_synthetic_pdf
+
+
+class _FailingHandler(_ETagHandler):
+    def send_head(self):
+        self.send_error(503)
+        return None
+
+
+@pytest.fixture
+def serve(tmp_path):
+    serve_dir = tmp_path / "serve"
+    serve_dir.mkdir()
+    write_synthetic_pdf(str(serve_dir / "doc.pdf"), 3, words=40)
+    servers = []
+
+    def start(handler=_ETagHandler, port=0):
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", port), partial(handler, directory=str(serve_dir))
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/doc.pdf"
+
+    yield start, serve_dir
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _fetch(cache, url):
+    metrics = RunMetrics()
+    with activate(metrics):
+        path, digest = cache.fetch(url)
+    counters = {
+        name: metrics.counter(name, "load_documents")
+        for name in ("pdf_downloads", "pdf_not_modified", "pdf_offline_hits")
+    }
+    return path, digest, {name: n for name, n in counters.items() if n}
+
+
+def test_revalidates_with_conditional_requests(tmp_path, serve):
+    start, serve_dir = serve
+    _, url = start()
+    cache = PDFCache(str(tmp_path / "cache"))
+
+    path, digest, counters = _fetch(cache, url)
+    assert counters == {"pdf_downloads": 1}
+    with open(path, "rb") as fetched, open(serve_dir / "doc.pdf", "rb") as served:
+        assert fetched.read() == served.read()
+
+    assert _fetch(cache, url) == (path, digest, {"pdf_not_modified": 1})
+
+    write_synthetic_pdf(str(serve_dir / "doc.pdf"), 4, words=40)
+    new_path, new_digest, counters = _fetch(cache, url)
+    assert counters == {"pdf_downloads": 1}
+    assert new_digest != digest and os.path.exists(new_path)
+
+
+def test_falls_back_to_the_cached_copy(tmp_path, serve):
+    start, _ = serve
+    server, url = start()
+    cache = PDFCache(str(tmp_path / "cache"))
+    path, digest, _ = _fetch(cache, url)
+
+    failing, failing_url = start(_FailingHandler)
+    cache._save_source(failing_url, cache._sources()[url])
+    assert _fetch(cache, failing_url) == (path, digest, {"pdf_offline_hits": 1})
+
+    server.shutdown()
+    server.server_close()
+    assert _fetch(cache, url) == (path, digest, {"pdf_offline_hits": 1})
+
+
+def test_errors_without_a_cached_copy_propagate(tmp_path, serve):
+    start, _ = serve
+    _, url = start(_FailingHandler)
+    with pytest.raises(requests.HTTPError):
+        PDFCache(str(tmp_path / "cache")).fetch(url)
+
+
+def test_concurrent_source_updates_are_kept(tmp_path):
+    cache = PDFCache(str(tmp_path / "cache"))
+    threads = [
+        threading.Thread(
+            target=cache._save_source, args=(f"http://host/{i}.pdf", {"sha256": str(i)})
+        )
+        for i in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache._sources()) == 16
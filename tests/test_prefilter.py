@@ -0,0 +1,64 @@
+import pytest
+
+from agents.prefilter import rule_check
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is EBITDA?",
+        "Who founded Apple?",
+        "How did operating margin change between 2022 and 2023?",
+    ],
+)
+def test_well_formed_questions_pass(question):
+    assert rule_check(question, "simple_question") is None
+
+
+@pytest.mark.parametrize(
+    "question, reason",
+    [
+        ("", "empty"),
+        ("Revenue?", "too_short"),
+        ("Evolved Question: What is EBITDA?", "leftover_label"),
+        ("Revenue grew by four percent.", "not_a_question"),
+        ("What is EBITDA? Why did it fall?", "multiple_questions"),
+    ],
+)
+def test_broken_output_is_rejected(question, reason):
+    assert rule_check(question, "simple_question") == reason
+
+
+def test_conversational_questions_may_contain_several():
+    assert (
+        rule_check("What is EBITDA? Why did it fall?", "conversational_question")
+        is None
+    )
+
+
+def test_pipeline_sends_every_question_to_the_critic_by_default():
+    from agents.question_generator import question_generation_pipeline
+    from benchmarks.corpus import synthetic_documents
+    from benchmarks.fakes import FakeChatModel
+
+    state = question_generation_pipeline(
+        {
+            "documents": synthetic_documents(4, 60),
+            "model": FakeChatModel("fake-generator", broken_rate=0.5),
+            "critic_model": FakeChatModel("fake-critic", accept_rate=1.0),
+        },
+        max_evolved_questions=6,
+        max_evolutions_per_technique=2,
+    )
+    feedback = [q.critic_feedback for q in state["evolved_questions"]]
+    assert feedback and all("prefilter" not in f for f in feedback)
+
+
+def test_default_classifier_reports_missing_scikit_learn(monkeypatch):
+    import sys
+
+    from agents.prefilter import train_prefilter_classifier
+
+    monkeypatch.setitem(sys.modules, "sklearn.linear_model", None)
+    with pytest.raises(ImportError, match="classifier"):
+        train_prefilter_classifier([("What is EBITDA?", "simple_question", 6)])
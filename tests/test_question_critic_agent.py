@@ -0,0 +1,27 @@
+from agents.question_critic_agent import critic_agent
+from agents.records import EvolvedQuestion
+from benchmarks.fakes import FakeChatModel
+
+
+def _questions(n):
+    return [
+        {
+            "id": f"q{i}",
+            "original_question_id": f"o{i}",
+            "evolved_question": f"What drove the change in segment {i} revenue?",
+            "evolution_type": "simple_question",
+        }
+        for i in range(n)
+    ]
+
+
+def test_critic_agent_accepts_plain_dicts():
+    state = critic_agent(
+        {"evolved_questions": _questions(5)},
+        FakeChatModel(accept_rate=1.0),
+        max_validated_questions=3,
+    )
+    validated = state["validated_questions"]
+    assert validated.ids() == ["q0", "q1", "q2"]
+    assert all(isinstance(q, EvolvedQuestion) for q in validated)
+    assert all(q.critic_feedback for q in validated)
@@ -0,0 +1,76 @@
+import json
+import logging
+
+import pytest
+
+from agents.export_agent import export_agent
+from agents.records import Answer, EvolvedQuestion, QuestionContext, RecordStore
+
+
+def _question(i):
+    return EvolvedQuestion(
+        id=f"q{i}",
+        original_question_id=f"o{i}",
+        evolved_question=f"Question {i}?",
+        evolution_type="simple_question",
+    )
+
+
+def test_store_indexes_by_id_position_and_slice():
+    store = RecordStore(EvolvedQuestion, [_question(i) for i in range(5)])
+    assert store["q3"].id == "q3"
+    assert store[0].id == "q0"
+    assert store[-1].id == "q4"
+    assert [q.id for q in store[1:3]] == ["q1", "q2"]
+    assert isinstance(store[1:3], RecordStore)
+    with pytest.raises(IndexError):
+        store[5]
+    with pytest.raises(KeyError):
+        store["missing"]
+
+    store.remove("q0")
+    store.add(_question(9))
+    assert store[0].id == "q1"
+    assert store[-1].id == "q9"
+
+
+def test_duplicate_ids_keep_the_first_record(caplog):
+    first, second = _question(1), _question(1)
+    second.evolved_question = "Another question?"
+    with caplog.at_level(logging.WARNING, logger="agents.records"):
+        store = RecordStore(EvolvedQuestion, [first, second])
+    assert len(store) == 1
+    assert store["q1"] is first
+    assert "Duplicate EvolvedQuestion id q1" in caplog.text
+
+
+def test_records_reject_unknown_keys():
+    question = _question(1)
+    question["critic_feedback"] = {"Independence": 3}
+    assert question["critic_feedback"] == {"Independence": 3}
+    with pytest.raises(KeyError):
+        question["score"]
+    with pytest.raises(KeyError):
+        question["score"] = 1
+
+
+def test_final_output_is_a_list_of_dicts():
+    questions = RecordStore(EvolvedQuestion, [_question(i) for i in range(3)])
+    state = export_agent(
+        {
+            "evolved_questions": questions,
+            "answers": RecordStore(
+                Answer, [Answer(id="q0", question="Q?", answer="A.", context="C")]
+            ),
+            "contexts": RecordStore(
+                QuestionContext,
+                [QuestionContext(id="q0", question="Q?", contexts=["C"])],
+            ),
+        }
+    )
+    final_output = state["final_output"]
+    assert isinstance(final_output, list)
+    assert final_output[0]["answer"] == "A."
+    assert final_output[1]["answer"] is None
+    assert [item["id"] for item in final_output[:2]] == ["q0", "q1"]
+    assert json.loads(json.dumps(final_output)) == final_output
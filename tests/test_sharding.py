@@ -0,0 +1,72 @@
+from agents.sharding import merge_results, plan_work_units, run_worker
+from agents.work_queue import SQLiteWorkQueue
+from benchmarks.corpus import synthetic_documents
+from benchmarks.fakes import FakeChatModel
+
+
+def _pages(counts):
+    return lambda pdf_path: counts[pdf_path]
+
+
+def test_quota_is_split_by_shard_pages():
+    units = plan_work_units(
+        ["a.pdf"],
+        {"simple_question": 10},
+        pages_per_shard=40,
+        questions_per_unit=3,
+        page_counter=_pages({"a.pdf": 100}),
+    )
+    shards = {}
+    for unit in units:
+        assert unit["count"] <= 3
+        key = (unit["page_start"], unit["page_end"])
+        shards[key] = shards.get(key, 0) + unit["count"]
+    assert shards == {(0, 40): 4, (40, 80): 4, (80, 100): 2}
+
+
+def test_every_technique_and_document_gets_its_quota():
+    quotas = {"simple_question": 7, "reasoning_question": 2}
+    units = plan_work_units(
+        ["a.pdf", "b.pdf"],
+        quotas,
+        pages_per_shard=10,
+        questions_per_unit=5,
+        page_counter=_pages({"a.pdf": 35, "b.pdf": None}),
+    )
+    for pdf_path in ("a.pdf", "b.pdf"):
+        for technique, quota in quotas.items():
+            assert (
+                sum(
+                    u["count"]
+                    for u in units
+                    if u["pdf_path"] == pdf_path and u["technique"] == technique
+                )
+                == quota
+            )
+    assert {
+        (u["page_start"], u["page_end"]) for u in units if u["pdf_path"] == "b.pdf"
+    } == {(0, None)}
+
+
+def test_worker_drains_queue_and_merges(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    queue.put(
+        plan_work_units(
+            ["doc.pdf"],
+            {"simple_question": 4},
+            pages_per_shard=5,
+            questions_per_unit=2,
+            page_counter=_pages({"doc.pdf": 10}),
+        )
+    )
+    completed = run_worker(
+        queue,
+        FakeChatModel("fake-generator"),
+        FakeChatModel("fake-critic", accept_rate=1.0),
+        document_loader=lambda pdf_path: synthetic_documents(10, words=60),
+    )
+    assert completed == 2
+    assert queue.counts() == {"done": 2}
+    rows = list(merge_results(queue, validated_only=False))
+    assert len(rows) == 4
+    assert {(r["page_start"], r["page_end"]) for r in rows} == {(0, 5), (5, 10)}
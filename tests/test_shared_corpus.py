@@ -0,0 +1,120 @@
+import gc
+
+import numpy as np
+import pytest
+
+from agents import shared_corpus
+from agents.context_gathering import context_gathering
+from agents.records import EvolvedQuestion, RecordStore
+from agents.shared_corpus import SharedCorpus
+from benchmarks.corpus import synthetic_documents
+from benchmarks.fakes import FakeEmbeddings
+
+PAGES = 12
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    yield str(tmp_path / "corpus")
+    shared_corpus._ATTACHED.clear()
+
+
+def _inputs():
+    documents = synthetic_documents(PAGES, 30)
+    for position, document in enumerate(documents):
+        document.metadata.update({"page": position, "note": f"é{position}"})
+    embeddings = FakeEmbeddings(dim=16)
+    matrix = np.asarray(
+        embeddings.embed_documents([d.page_content for d in documents]),
+        dtype=np.float32,
+    )
+    return documents, matrix, embeddings
+
+
+def test_round_trip(corpus_dir):
+    documents, matrix, _ = _inputs()
+    corpus = SharedCorpus.create(corpus_dir, documents, matrix, source="doc.pdf")
+    shared_corpus._ATTACHED.clear()
+
+    attached = SharedCorpus.attach(corpus_dir)
+    assert attached is not corpus
+    assert len(attached) == PAGES and attached.source == "doc.pdf"
+    for document, page in zip(documents, attached.documents):
+        assert page.page_content == document.page_content
+        assert page.metadata == document.metadata
+    assert attached.index.ntotal == PAGES
+    np.testing.assert_array_equal(attached.embeddings.rows(0, PAGES), matrix)
+
+
+def test_embeddings_are_a_read_only_view_of_the_index(corpus_dir):
+    documents, matrix, _ = _inputs()
+    corpus = SharedCorpus.create(corpus_dir, documents, matrix)
+    rows = corpus.embeddings.rows(0, PAGES)
+    assert not rows.flags.writeable
+    with pytest.raises(ValueError):
+        rows[0, 0] = 1.0
+
+    # The view keeps the index alive after the corpus is dropped.
+    del corpus
+    shared_corpus._ATTACHED.clear()
+    gc.collect()
+    np.testing.assert_array_equal(rows, matrix)
+
+
+def test_empty_corpus(corpus_dir):
+    corpus = SharedCorpus.create(corpus_dir, [], np.zeros((0, 8), dtype=np.float32))
+    assert len(corpus) == 0
+    assert corpus.embeddings.rows(0, 0).shape == (0, 8)
+
+
+def test_pages_index_like_a_list(corpus_dir):
+    documents, matrix, _ = _inputs()
+    pages = SharedCorpus.create(corpus_dir, documents, matrix).documents
+    assert pages[0].page_content == documents[0].page_content
+    assert pages[-1].metadata == documents[-1].metadata
+    assert [p.metadata["page"] for p in pages[2:8:3]] == [2, 5]
+    assert pages[PAGES:] == []
+    with pytest.raises(IndexError):
+        pages[PAGES]
+    with pytest.raises(IndexError):
+        pages[-PAGES - 1]
+
+
+def test_attach_reuses_the_mapping_until_recreated(corpus_dir):
+    documents, matrix, _ = _inputs()
+    corpus = SharedCorpus.create(corpus_dir, documents, matrix)
+    assert SharedCorpus.attach(corpus_dir) is corpus
+
+    recreated = SharedCorpus.create(corpus_dir, documents[:4], matrix[:4])
+    assert recreated is not corpus
+    assert SharedCorpus.attach(corpus_dir) is recreated
+    assert len(recreated) == 4
+
+
+def test_context_gathering_searches_by_page_position(corpus_dir):
+    documents, matrix, embeddings = _inputs()
+    corpus = SharedCorpus.create(corpus_dir, documents, matrix)
+    questions = RecordStore(
+        EvolvedQuestion,
+        [
+            EvolvedQuestion(
+                id=f"q{position}",
+                original_question_id=f"o{position}",
+                evolved_question=documents[position].page_content,
+                evolution_type="simple_question",
+            )
+            for position in (1, 7)
+        ],
+    )
+    state = context_gathering(
+        {
+            **corpus.state(),
+            "embedding_model": embeddings,
+            "evolved_questions": questions,
+        },
+        k=3,
+    )
+    for position in (1, 7):
+        context = state["contexts"][f"q{position}"]
+        assert len(context.contexts) == 3
+        assert context.contexts[0] == documents[position].page_content
@@ -0,0 +1,80 @@
+import pytest
+
+from agents import work_queue
+from agents.work_queue import SQLiteWorkQueue
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(work_queue.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+
+
+def test_claims_in_order_and_completes(queue):
+    first, second = queue.put([{"n": 1}, {"n": 2}])
+    unit = queue.claim("w1", 60)
+    assert (unit.id, unit.payload, unit.attempts) == (first, {"n": 1}, 1)
+    assert queue.claim("w2", 60).id == second
+    assert queue.claim("w3", 60) is None
+    assert queue.complete(first, "w1", {"ok": True})
+    assert [(u.id, r) for u, r in queue.results()] == [(first, {"ok": True})]
+    assert queue.counts() == {"done": 1, "leased": 1}
+    assert not queue.is_drained()
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    (unit_id,) = queue.put([{"n": 1}])
+    queue.claim("w1", 60)
+    clock.now += 30
+    assert queue.claim("w2", 60) is None
+    assert queue.heartbeat(unit_id, "w1", 60)
+    clock.now += 61
+    unit = queue.claim("w2", 60)
+    assert (unit.id, unit.attempts) == (unit_id, 2)
+
+
+def test_complete_after_losing_the_lease_is_discarded(queue, clock):
+    (unit_id,) = queue.put([{"n": 1}])
+    queue.claim("w1", 60)
+    clock.now += 61
+    queue.claim("w2", 60)
+    assert not queue.heartbeat(unit_id, "w1", 60)
+    assert not queue.complete(unit_id, "w1", {"from": "w1"})
+    assert queue.complete(unit_id, "w2", {"from": "w2"})
+    assert [r for _, r in queue.results()] == [{"from": "w2"}]
+
+
+def test_expired_leases_fail_after_max_attempts(queue, clock):
+    queue.put([{"n": 1}])
+    queue.claim("w1", 60)
+    clock.now += 61
+    queue.claim("w2", 60)
+    clock.now += 61
+    assert queue.claim("w3", 60) is None
+    assert queue.counts() == {"failed": 1}
+    assert queue.is_drained()
+
+
+def test_fail_retries_until_max_attempts(queue):
+    (unit_id,) = queue.put([{"n": 1}])
+    queue.claim("w1", 60)
+    queue.fail(unit_id, "w1", "boom")
+    assert queue.counts() == {"pending": 1}
+    queue.claim("w2", 60)
+    queue.fail(unit_id, "w2", "boom")
+    assert queue.counts() == {"failed": 1}
+    assert queue.claim("w3", 60) is None